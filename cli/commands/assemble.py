@@ -21,14 +21,32 @@ def run(
     engine_root = str(Path(__file__).resolve().parent.parent.parent)
     sys.path.insert(0, engine_root)
 
-    from core.assembler import assemble_and_render
-
-    markdown = assemble_and_render(
-        task=task,
-        project_root=str(root),
-        budget=budget,
-        output_path=str(output) if output else None
-    )
+    from core.server import call_server, ServerUnavailable, ServerError
+
+    output_path = str(Path(output).resolve()) if output else None
+
+    try:
+        result = call_server(str(root), "assemble", {
+            'task': task,
+            'budget': budget,
+            'output_path': output_path
+        })
+        markdown = result['markdown']
+    except ServerUnavailable:
+        markdown = None
+    except ServerError as e:
+        typer.echo(f"Error: Cortex server failed: {e}", err=True)
+        raise typer.Exit(1)
+
+    if markdown is None:
+        from core.assembler import assemble_and_render
+
+        markdown = assemble_and_render(
+            task=task,
+            project_root=str(root),
+            budget=budget,
+            output_path=output_path
+        )
 
     if output:
         typer.echo(f"Context frame written to: {output}")
@@ -9,7 +9,8 @@ import typer
 
 def run(
     force: bool = False,
-    project_root: Optional[Path] = None
+    project_root: Optional[Path] = None,
+    workers: Optional[int] = None
 ):
     """Chunk agents/ directory into Cortex as METHODOLOGY domain."""
     root = Path(project_root) if project_root else Path.cwd()
@@ -21,7 +22,7 @@ def run(
     sys.path.insert(0, engine_root)
 
     from core.config import Config
-    from core.chunker import chunk_document, get_chunks_by_source, delete_chunks
+    from core.chunker import chunk_files, get_chunks_by_source, delete_chunks
 
     cortex_path = Config.get_cortex_path(str(root))
     if not os.path.exists(cortex_path):
@@ -35,10 +36,10 @@ def run(
 
     domain = "METHODOLOGY"
     extensions = {".md", ".yaml", ".yml"}
-    total_chunks = 0
     total_deleted = 0
+    file_paths = []
 
-    # Walk agents/ directory and chunk all relevant files
+    # Walk agents/ directory and collect all relevant files
     for dirpath, _, files in os.walk(str(agents_path)):
         for filename in sorted(files):
             if Path(filename).suffix not in extensions:
@@ -53,11 +54,14 @@ def run(
                     deleted = delete_chunks(old_chunks, str(root))
                     total_deleted += deleted
 
-            chunks = chunk_document(file_path, str(root), domain)
-            total_chunks += len(chunks)
+            file_paths.append(file_path)
+
+    # Parse (optionally in parallel) and embed across files in batches
+    total_chunks = len(chunk_files(file_paths, str(root), domain, workers=workers))
 
     if total_deleted > 0:
         typer.echo(f"Deleted {total_deleted} old chunks")
 
     typer.echo(f"Bootstrapped {total_chunks} chunks from agents/ (domain: {domain})")
-    typer.echo("Run 'python -m cli index' to rebuild indices")
+    if not Config.INDEX_AUTO_UPDATE:
+        typer.echo("Run 'python -m cli index' to rebuild indices")
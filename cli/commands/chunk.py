@@ -11,7 +11,8 @@ def run(
     path: Path,
     domain: Optional[str] = None,
     refresh: bool = False,
-    project_root: Optional[Path] = None
+    project_root: Optional[Path] = None,
+    workers: Optional[int] = None
 ):
     """Chunk a file or directory."""
     root = Path(project_root) if project_root else Path.cwd()
@@ -26,42 +27,48 @@ def run(
     from core.chunker import (
         chunk_document,
         chunk_directory,
+        chunk_files,
         get_chunks_by_source,
-        delete_chunks
+        refresh_document
     )
 
     if not target.exists():
         typer.echo(f"Error: Path not found: {target}", err=True)
         raise typer.Exit(1)
 
-    # Handle --refresh flag
+    # Handle --refresh flag: re-chunk only changed sections of known sources
     if refresh:
         if target.is_dir():
-            # Find all .md files in directory and delete their chunks
-            deleted_total = 0
+            file_paths = []
             for dirpath, _, files in os.walk(str(target)):
                 for f in files:
                     if f.endswith('.md'):
-                        file_path = os.path.join(dirpath, f)
-                        old_chunks = get_chunks_by_source(file_path, str(root))
-                        if old_chunks:
-                            deleted = delete_chunks(old_chunks, str(root))
-                            deleted_total += deleted
-            if deleted_total > 0:
-                typer.echo(f"Deleted {deleted_total} old chunks")
+                        file_paths.append(os.path.join(dirpath, f))
         else:
-            # Delete chunks from this specific file
-            old_chunks = get_chunks_by_source(str(target), str(root))
-            if old_chunks:
-                deleted = delete_chunks(old_chunks, str(root))
-                typer.echo(f"Deleted {deleted} old chunks from {target.name}")
+            file_paths = [str(target)]
 
-    if target.is_dir():
-        chunks = chunk_directory(str(target), str(root), domain)
+        new_files = []
+        kept = removed = 0
+        chunks = []
+        for file_path in file_paths:
+            if not get_chunks_by_source(file_path, str(root)):
+                new_files.append(file_path)
+                continue
+            result = refresh_document(file_path, str(root), domain)
+            kept += len(result.kept)
+            removed += len(result.removed)
+            chunks.extend(result.added)
+        if new_files:
+            chunks.extend(chunk_files(new_files, str(root), domain, workers=workers))
+
+        typer.echo(f"Kept {kept} unchanged chunks, removed {removed} old chunks")
+    elif target.is_dir():
+        chunks = chunk_directory(str(target), str(root), domain, workers=workers)
     else:
         chunks = chunk_document(str(target), str(root), domain)
 
     typer.echo(f"Created {len(chunks)} chunks")
 
-    if refresh:
+    from core.config import Config
+    if not Config.INDEX_AUTO_UPDATE:
         typer.echo("Note: Run 'python -m cli index' to rebuild indices")
@@ -6,7 +6,7 @@ from typing import Optional
 import typer
 
 
-def run(project_root: Optional[Path] = None):
+def run(project_root: Optional[Path] = None, full: bool = False):
     """Build vector indices for chunks and memories."""
     root = Path(project_root) if project_root else Path.cwd()
     root = root.resolve()
@@ -22,14 +22,14 @@ def run(project_root: Optional[Path] = None):
 
     # Build chunks index
     try:
-        count, path = build_index(str(root), "chunks")
+        count, path = build_index(str(root), "chunks", full_rebuild=full)
         typer.echo(f"  chunks: {count} vectors indexed")
     except Exception as e:
         typer.echo(f"  chunks: skipped ({e})")
 
     # Build memories index
     try:
-        count, path = build_index(str(root), "memories")
+        count, path = build_index(str(root), "memories", full_rebuild=full)
         typer.echo(f"  memories: {count} vectors indexed")
     except Exception as e:
         typer.echo(f"  memories: skipped ({e})")
@@ -24,18 +24,30 @@ def add(
     engine_root = str(Path(__file__).resolve().parent.parent.parent)
     sys.path.insert(0, engine_root)
 
-    from core.memory import create_memory
+    from core.server import call_server, ServerUnavailable, ServerError
+
+    params = {
+        'learning': learning,
+        'context': context,
+        'memory_type': memory_type,
+        'domain': domain,
+        'confidence': confidence
+    }
+
+    try:
+        memory_id = call_server(str(root), "memory.add", params)['id']
+    except ServerUnavailable:
+        memory_id = None
+    except ServerError as e:
+        typer.echo(f"Error: Cortex server failed: {e}", err=True)
+        raise typer.Exit(1)
+
+    if memory_id is None:
+        from core.memory import create_memory
 
-    memory = create_memory(
-        learning=learning,
-        context=context,
-        memory_type=memory_type,
-        domain=domain,
-        confidence=confidence,
-        project_root=str(root)
-    )
+        memory_id = create_memory(project_root=str(root), **params).id
 
-    typer.echo(f"Created memory: {memory.id}")
+    typer.echo(f"Created memory: {memory_id}")
 
 
 def list_memories(
@@ -53,13 +65,30 @@ def list_memories(
     engine_root = str(Path(__file__).resolve().parent.parent.parent)
     sys.path.insert(0, engine_root)
 
-    from core.memory import list_memories as core_list_memories
+    from core.server import call_server, ServerUnavailable, ServerError
+    from core.memory import Memory
+
+    try:
+        memories = [
+            Memory(**m) for m in call_server(str(root), "memory.list", {
+                'domain': domain,
+                'memory_type': memory_type
+            })
+        ]
+    except ServerUnavailable:
+        memories = None
+    except ServerError as e:
+        typer.echo(f"Error: Cortex server failed: {e}", err=True)
+        raise typer.Exit(1)
+
+    if memories is None:
+        from core.memory import list_memories as core_list_memories
 
-    memories = core_list_memories(
-        project_root=str(root),
-        domain=domain,
-        memory_type=memory_type
-    )
+        memories = core_list_memories(
+            project_root=str(root),
+            domain=domain,
+            memory_type=memory_type
+        )
 
     if json_output:
         output = [
@@ -99,9 +128,22 @@ def delete(
     engine_root = str(Path(__file__).resolve().parent.parent.parent)
     sys.path.insert(0, engine_root)
 
-    from core.memory import delete_memory
+    from core.server import call_server, ServerUnavailable, ServerError
+
+    try:
+        deleted = call_server(str(root), "memory.delete", {'memory_id': memory_id})['deleted']
+    except ServerUnavailable:
+        deleted = None
+    except ServerError as e:
+        typer.echo(f"Error: Cortex server failed: {e}", err=True)
+        raise typer.Exit(1)
+
+    if deleted is None:
+        from core.memory import delete_memory
+
+        deleted = delete_memory(memory_id, str(root))
 
-    if delete_memory(memory_id, str(root)):
+    if deleted:
         typer.echo(f"Deleted memory: {memory_id}")
     else:
         typer.echo(f"Memory not found: {memory_id}", err=True)
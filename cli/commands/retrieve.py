@@ -8,40 +8,124 @@ import typer
 
 
 def run(
-    query: str,
+    query: Optional[str],
     top_k: int = 5,
     index_type: str = "both",
-    project_root: Optional[Path] = None
+    project_root: Optional[Path] = None,
+    queries_file: Optional[Path] = None
 ):
     """Search for relevant context."""
     root = Path(project_root) if project_root else Path.cwd()
     root = root.resolve()
 
+    if queries_file is not None:
+        _run_many(queries_file, top_k, index_type, root)
+        return
+
+    if not query:
+        typer.echo("Error: provide --query or --queries-file.", err=True)
+        raise typer.Exit(1)
+
     # Import core modules
     import sys
     engine_root = str(Path(__file__).resolve().parent.parent.parent)
     sys.path.insert(0, engine_root)
 
-    from core.retriever import retrieve
+    from core.server import call_server, ServerUnavailable, ServerError
+
+    try:
+        results = call_server(str(root), "retrieve", {
+            'query': query,
+            'top_k': top_k,
+            'index_type': index_type,
+            'include_content': True
+        })
+    except ServerUnavailable:
+        results = None
+    except ServerError as e:
+        typer.echo(f"Error: Cortex server failed: {e}", err=True)
+        raise typer.Exit(1)
+
+    if results is None:
+        from core.retriever import retrieve
 
-    results = retrieve(
-        query,
-        str(root),
-        top_k=top_k,
-        index_type=index_type,
-        include_content=True
-    )
+        results = retrieve(
+            query,
+            str(root),
+            top_k=top_k,
+            index_type=index_type,
+            include_content=True
+        )
 
     if not results:
         typer.echo("No results found.")
         return
 
     typer.echo(f"Found {len(results)} results:\n")
+    _print_results(results)
+
+
+def _run_many(queries_file: Path, top_k: int, index_type: str, root: Path):
+    """Run every query in a file (one per line) as a single batch."""
+    queries_path = Path(queries_file)
+    if not queries_path.is_file():
+        typer.echo(f"Error: queries file not found: {queries_path}", err=True)
+        raise typer.Exit(1)
+
+    queries = [
+        line.strip()
+        for line in queries_path.read_text(encoding='utf-8').splitlines()
+        if line.strip()
+    ]
+    if not queries:
+        typer.echo("No queries found.")
+        return
+
+    # Import core modules
+    import sys
+    engine_root = str(Path(__file__).resolve().parent.parent.parent)
+    sys.path.insert(0, engine_root)
+
+    from core.server import call_server, ServerUnavailable, ServerError
+
+    try:
+        all_results = call_server(str(root), "retrieve_many", {
+            'queries': queries,
+            'top_k': top_k,
+            'index_type': index_type,
+            'include_content': True
+        })
+    except ServerUnavailable:
+        all_results = None
+    except ServerError as e:
+        typer.echo(f"Error: Cortex server failed: {e}", err=True)
+        raise typer.Exit(1)
+
+    if all_results is None:
+        from core.retriever import retrieve_many
+
+        all_results = retrieve_many(
+            queries,
+            str(root),
+            top_k=top_k,
+            index_type=index_type,
+            include_content=True
+        )
+
+    for query, results in zip(queries, all_results):
+        typer.echo(f"## {query}")
+        if not results:
+            typer.echo("No results found.\n")
+            continue
+        typer.echo(f"Found {len(results)} results:\n")
+        _print_results(results)
+
 
+def _print_results(results: list[dict]):
     for i, result in enumerate(results, 1):
         score = result.get('score', 0)
         rid = result.get('id', 'unknown')
-        content = result.get('content', '')[:200]
+        content = (result.get('content') or '')[:200]
 
         typer.echo(f"{i}. [{rid}] (score: {score:.3f})")
         typer.echo(f"   {content}...")
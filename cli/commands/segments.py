@@ -0,0 +1,45 @@
+"""cortex segments - Pack, compact or export the chunk segment logs."""
+
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+
+def run(
+    pack: bool = False,
+    compact: bool = False,
+    export: Optional[Path] = None,
+    project_root: Optional[Path] = None
+):
+    """Maintain per-domain chunk segment logs."""
+    root = Path(project_root) if project_root else Path.cwd()
+    root = root.resolve()
+
+    # Import core modules
+    import sys
+    engine_root = str(Path(__file__).resolve().parent.parent.parent)
+    sys.path.insert(0, engine_root)
+
+    from core.segments import pack_chunks, compact_chunks, export_chunks
+
+    if not (pack or compact or export):
+        typer.echo("Nothing to do: pass --pack, --compact and/or --export DIR")
+        raise typer.Exit(1)
+
+    if pack:
+        packed = pack_chunks(str(root))
+        for domain, count in packed.items():
+            typer.echo(f"  {domain}: packed {count} chunks")
+        typer.echo(f"Packed {sum(packed.values())} chunk files into segment logs")
+
+    if compact:
+        reclaimed = compact_chunks(str(root))
+        for domain, size in reclaimed.items():
+            typer.echo(f"  {domain}: reclaimed {size / 1e6:.2f} MB")
+        typer.echo(f"Compacted {len(reclaimed)} segment logs")
+
+    if export:
+        dest = Path(export).resolve()
+        exported = export_chunks(str(root), str(dest))
+        typer.echo(f"Exported {sum(exported.values())} chunks as markdown to {dest}")
@@ -0,0 +1,47 @@
+"""cortex serve - Run a local server that keeps the model and indices hot."""
+
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+
+def run(
+    port: Optional[int] = None,
+    stop: bool = False,
+    project_root: Optional[Path] = None
+):
+    """Start (or stop) the Cortex server for a project."""
+    root = Path(project_root) if project_root else Path.cwd()
+    root = root.resolve()
+
+    # Import core modules
+    import sys
+    engine_root = str(Path(__file__).resolve().parent.parent.parent)
+    sys.path.insert(0, engine_root)
+
+    from core.server import serve, call_server, ServerUnavailable, ServerError
+
+    if stop:
+        try:
+            call_server(str(root), "shutdown")
+            typer.echo("Cortex server stopping")
+        except ServerUnavailable as e:
+            typer.echo(f"No running server ({e})", err=True)
+            raise typer.Exit(1)
+        except ServerError as e:
+            typer.echo(f"Error: Cortex server failed: {e}", err=True)
+            raise typer.Exit(1)
+        return
+
+    try:
+        info = call_server(str(root), "ping")
+        typer.echo(f"Cortex server already running (pid {info['pid']})", err=True)
+        raise typer.Exit(1)
+    except ServerUnavailable:
+        pass
+    except ServerError as e:
+        typer.echo(f"Cortex server is running but failing ({e})", err=True)
+        raise typer.Exit(1)
+
+    serve(str(root), port=port)
@@ -24,8 +24,8 @@ def run(
 
     from core.config import Config
     from core.indexer import get_index_stats
-    from core.memory import list_memories
     from core.chunker import get_stale_chunks
+    from core.catalog import count_chunks, count_memories
 
     cortex_path = Config.get_cortex_path(str(root))
 
@@ -48,16 +48,10 @@ def run(
     }
 
     if status['initialized']:
-        # Count chunks by domain
-        chunks_path = Config.get_chunks_path(str(root))
-        if os.path.exists(chunks_path):
-            for domain in os.listdir(chunks_path):
-                domain_path = os.path.join(chunks_path, domain)
-                if os.path.isdir(domain_path):
-                    count = len([f for f in os.listdir(domain_path) if f.endswith('.md')])
-                    if count > 0:
-                        status['chunks']['domains'].append({'name': domain, 'count': count})
-                        status['chunks']['count'] += count
+        # Count chunks by domain (catalog query)
+        for domain, count in count_chunks(str(root)).items():
+            status['chunks']['domains'].append({'name': domain, 'count': count})
+            status['chunks']['count'] += count
 
         # Check for stale chunks
         stale_chunks = get_stale_chunks(str(root))
@@ -74,15 +68,10 @@ def run(
             for src, info in stale_by_source.items()
         ]
 
-        # Count memories
-        memories = list_memories(str(root))
-        status['memories']['count'] = len(memories)
-
-        for mem in memories:
-            t = mem.type
-            d = mem.domain
-            status['memories']['by_type'][t] = status['memories']['by_type'].get(t, 0) + 1
-            status['memories']['by_domain'][d] = status['memories']['by_domain'].get(d, 0) + 1
+        # Count memories (catalog queries)
+        status['memories']['by_type'] = count_memories(str(root), 'type')
+        status['memories']['by_domain'] = count_memories(str(root), 'domain')
+        status['memories']['count'] = sum(status['memories']['by_type'].values())
 
         # Get index stats
         status['indices'] = get_index_stats(str(root))
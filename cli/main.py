@@ -7,10 +7,13 @@ Usage:
     python -m cli chunk --path "docs/"
     python -m cli index
     python -m cli retrieve --query "authentication"
+    python -m cli retrieve --queries-file queries.txt
     python -m cli assemble --task "implement login"
     python -m cli memory add --learning "..." --domain AUTH
     python -m cli extract --text "session learnings..."
     python -m cli status
+    python -m cli segments --pack
+    python -m cli serve
 """
 
 import sys
@@ -54,6 +57,10 @@ def bootstrap(
         False, "--force",
         help="Delete old methodology chunks and re-chunk"
     ),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", "-w",
+        help="Processes for parsing files (0 = one per CPU, default from CORTEX_CHUNK_WORKERS)"
+    ),
     project_root: Optional[Path] = typer.Option(
         None, "--root", "-r",
         help="Project root directory"
@@ -61,7 +68,7 @@ def bootstrap(
 ):
     """Chunk methodology resources (agents/) into Cortex for on-demand retrieval."""
     from cli.commands import bootstrap as bootstrap_cmd
-    bootstrap_cmd.run(force, project_root)
+    bootstrap_cmd.run(force, project_root, workers)
 
 
 @app.command()
@@ -76,7 +83,11 @@ def chunk(
     ),
     refresh: bool = typer.Option(
         False, "--refresh",
-        help="Delete old chunks from this source and re-chunk"
+        help="Re-chunk changed sections of this source, keeping unchanged chunks"
+    ),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", "-w",
+        help="Processes for parsing files (0 = one per CPU, default from CORTEX_CHUNK_WORKERS)"
     ),
     project_root: Optional[Path] = typer.Option(
         None, "--root", "-r",
@@ -85,11 +96,15 @@ def chunk(
 ):
     """Chunk documents into semantic units."""
     from cli.commands import chunk as chunk_cmd
-    chunk_cmd.run(path, domain, refresh, project_root)
+    chunk_cmd.run(path, domain, refresh, project_root, workers)
 
 
 @app.command()
 def index(
+    full: bool = typer.Option(
+        False, "--full",
+        help="Rebuild from every chunk/memory file instead of updating incrementally"
+    ),
     project_root: Optional[Path] = typer.Option(
         None, "--root", "-r",
         help="Project root directory"
@@ -97,13 +112,13 @@ def index(
 ):
     """Build or rebuild vector indices."""
     from cli.commands import index as index_cmd
-    index_cmd.run(project_root)
+    index_cmd.run(project_root, full)
 
 
 @app.command()
 def retrieve(
-    query: str = typer.Option(
-        ..., "--query", "-q",
+    query: Optional[str] = typer.Option(
+        None, "--query", "-q",
         help="Search query"
     ),
     top_k: int = typer.Option(
@@ -117,11 +132,15 @@ def retrieve(
     project_root: Optional[Path] = typer.Option(
         None, "--root", "-r",
         help="Project root directory"
+    ),
+    queries_file: Optional[Path] = typer.Option(
+        None, "--queries-file", "-f",
+        help="File with one query per line, retrieved as a batch"
     )
 ):
     """Search for relevant chunks or memories."""
     from cli.commands import retrieve as retrieve_cmd
-    retrieve_cmd.run(query, top_k, index_type, project_root)
+    retrieve_cmd.run(query, top_k, index_type, project_root, queries_file)
 
 
 @app.command()
@@ -260,6 +279,50 @@ def status(
     status_cmd.run(json_output, project_root)
 
 
+@app.command()
+def segments(
+    pack: bool = typer.Option(
+        False, "--pack",
+        help="Move chunk .md/.npy files into per-domain segment logs"
+    ),
+    compact: bool = typer.Option(
+        False, "--compact",
+        help="Rewrite segment logs without overwritten and deleted records"
+    ),
+    export: Optional[Path] = typer.Option(
+        None, "--export",
+        help="Write every chunk as a readable .md file under this directory"
+    ),
+    project_root: Optional[Path] = typer.Option(
+        None, "--root", "-r",
+        help="Project root directory"
+    )
+):
+    """Pack, compact or export the chunk segment store."""
+    from cli.commands import segments as segments_cmd
+    segments_cmd.run(pack, compact, export, project_root)
+
+
+@app.command()
+def serve(
+    port: Optional[int] = typer.Option(
+        None, "--port",
+        help="Port to listen on (default: CORTEX_SERVER_PORT, or a free port)"
+    ),
+    stop: bool = typer.Option(
+        False, "--stop",
+        help="Stop the running server for this project"
+    ),
+    project_root: Optional[Path] = typer.Option(
+        None, "--root", "-r",
+        help="Project root directory"
+    )
+):
+    """Run a local server that keeps the model and indices loaded."""
+    from cli.commands import serve as serve_cmd
+    serve_cmd.run(port, stop, project_root)
+
+
 def main():
     """Entry point for the CLI."""
     app()
@@ -14,6 +14,8 @@ __all__ = [
     'Embedder',
     'chunk_document',
     'chunk_directory',
+    'chunk_files',
+    'refresh_document',
     'get_stale_chunks',
     'get_chunks_by_source',
     'delete_chunks',
@@ -47,6 +49,12 @@ def __getattr__(name):
     elif name == 'chunk_directory':
         from .chunker import chunk_directory
         return chunk_directory
+    elif name == 'chunk_files':
+        from .chunker import chunk_files
+        return chunk_files
+    elif name == 'refresh_document':
+        from .chunker import refresh_document
+        return refresh_document
     elif name == 'get_stale_chunks':
         from .chunker import get_stale_chunks
         return get_stale_chunks
@@ -0,0 +1,713 @@
+"""
+Cortex Approximate Nearest-Neighbour Search
+
+Pure-NumPy ANN backends over the normalized embedding matrix of a base
+index. Similarity is the inner product, i.e. cosine similarity for e5
+embeddings.
+
+- HNSWIndex: Hierarchical Navigable Small World graph
+- IVFPQIndex: inverted file of k-means lists with product-quantized
+  residuals, for hosts where resident memory matters more than latency
+- BinaryIndex: sign-bit codes scanned by Hamming distance as a prefilter
+
+Neither stores the vectors themselves; exact scores are read from the
+base matrix it was built over (usually memory-mapped), so the matrix is
+never duplicated.
+"""
+
+import os
+import math
+import hashlib
+from typing import Optional
+import numpy as np
+
+
+def ids_signature(ids: list[str]) -> str:
+    """Fingerprint of an ordered ID list, used to tie a graph to its base index."""
+    digest = hashlib.sha256()
+    for item_id in ids:
+        digest.update(item_id.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def read_signature(path: str) -> Optional[str]:
+    """Read only the stored signature of an ANN index file (None if unreadable)."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return str(data['signature'])
+    except (KeyError, OSError, ValueError):
+        return None
+
+
+def measure_recall(
+    index,
+    vectors: np.ndarray,
+    k: int = 10,
+    ef: int = 128,
+    queries: int = 100,
+    seed: int = 0
+) -> float:
+    """
+    Recall@k of an ANN index against brute force.
+
+    Leave-one-out: sampled rows serve as queries and are excluded from
+    both the exact and the approximate answers.
+    """
+    n = len(vectors)
+    if n <= 1:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    k = min(k, n - 1)
+
+    hits = 0
+    sample = rng.choice(n, size=min(queries, n), replace=False)
+    for row in sample.tolist():
+        query = np.asarray(vectors[row], dtype=np.float32)
+        exact = np.argpartition(-(vectors @ query), k)[:k + 1]
+        found = index.search(vectors, query, k + 1, ef)
+        hits += len((set(exact.tolist()) & set(found.tolist())) - {row})
+    return hits / (k * len(sample))
+
+
+def _nearest_centroids(data: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+    """Index of the nearest (L2) centroid for every row, in row blocks."""
+    half_norms = 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+    assign = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), block):
+        part = np.asarray(data[start:start + block], dtype=np.float32)
+        assign[start:start + block] = np.argmax(part @ centroids.T - half_norms, axis=1)
+    return assign
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd's k-means; empty clusters are re-seeded from random rows.
+
+    Returns:
+        Centroids of shape (k, dim)
+    """
+    data = np.asarray(data, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = _nearest_centroids(data, centroids)
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=k)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        filled = counts > 0
+        sums = np.add.reduceat(data[order], starts[filled], axis=0)
+        centroids[filled] = sums / counts[filled, None]
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+    return centroids
+
+
+class HNSWIndex:
+    """
+    HNSW graph over the rows of an embedding matrix.
+
+    Each layer is a dense neighbour table (one row per node on that
+    layer, -1 padded) so a search step gathers the links of several
+    nodes and scores them with a single matrix-vector product.
+
+    Args:
+        m: Neighbours per node on upper layers (2*m on layer 0)
+        ef_construction: Candidate list size while inserting
+        seed: Seed for level assignment, so builds are reproducible
+    """
+
+    # Nodes expanded per search step; trades a few extra distance
+    # computations for far fewer Python-level iterations
+    EXPAND_BATCH = 16
+
+    def __init__(self, m: int = 16, ef_construction: int = 100, seed: int = 0):
+        self.m = max(2, m)
+        self.ef_construction = max(ef_construction, self.m)
+        self.seed = seed
+        self.entry_point = -1
+        self.max_level = -1
+        self.levels = np.zeros(0, dtype=np.int8)
+        self.tables: list[np.ndarray] = []   # per layer: neighbour rows, -1 padded
+        self.slots: list[np.ndarray] = []    # per layer: node -> table row, -1 if absent
+        self.signature = ""
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def _max_neighbors(self, level: int) -> int:
+        return self.m * 2 if level == 0 else self.m
+
+    @staticmethod
+    def _make_slots(levels: np.ndarray) -> list[np.ndarray]:
+        slots = []
+        for level in range(int(levels.max(initial=-1)) + 1):
+            nodes = np.flatnonzero(levels >= level)
+            layer_slots = np.full(len(levels), -1, dtype=np.int64)
+            layer_slots[nodes] = np.arange(len(nodes))
+            slots.append(layer_slots)
+        return slots
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        m: int = 16,
+        ef_construction: int = 100,
+        seed: int = 0
+    ) -> 'HNSWIndex':
+        """Build a graph by inserting every row of vectors in order."""
+        index = cls(m, ef_construction, seed)
+        n = len(vectors)
+        rng = np.random.default_rng(seed)
+        level_mult = 1.0 / math.log(index.m)
+        uniform = 1.0 - rng.random(n)   # (0, 1], keeps log() finite
+        index.levels = np.minimum(np.floor(-np.log(uniform) * level_mult), 127).astype(np.int8)
+
+        index.slots = cls._make_slots(index.levels)
+        index.tables = [
+            np.full((int((layer_slots >= 0).sum()), index._max_neighbors(level)), -1, dtype=np.int32)
+            for level, layer_slots in enumerate(index.slots)
+        ]
+        counts = [np.zeros(len(table), dtype=np.int32) for table in index.tables]
+
+        for node in range(n):
+            index._insert(vectors, node, counts)
+        return index
+
+    def _insert(self, vectors: np.ndarray, node: int, counts: list[np.ndarray]):
+        level = int(self.levels[node])
+        if self.entry_point < 0:
+            self.entry_point, self.max_level = node, level
+            return
+
+        query = np.asarray(vectors[node], dtype=np.float32)
+        entries = np.array([self.entry_point], dtype=np.int64)
+        for l in range(self.max_level, level, -1):
+            entries = self._search_layer(vectors, query, entries, 1, l)[0]
+
+        for l in range(min(level, self.max_level), -1, -1):
+            found, sims = self._search_layer(vectors, query, entries, self.ef_construction, l)
+            neighbors = self._select_neighbors(vectors, found, sims, self.m)
+            self._set_links(l, node, neighbors, counts)
+            self._link_back(vectors, l, node, neighbors, counts)
+            entries = found
+
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
+
+    def _set_links(self, level: int, node: int, neighbors: np.ndarray, counts: list[np.ndarray]):
+        row = self.slots[level][node]
+        self.tables[level][row] = -1
+        self.tables[level][row, :len(neighbors)] = neighbors
+        counts[level][row] = len(neighbors)
+
+    def _link_back(
+        self,
+        vectors: np.ndarray,
+        level: int,
+        node: int,
+        neighbors: np.ndarray,
+        counts: list[np.ndarray]
+    ):
+        """Add node to each neighbour's links."""
+        table, layer_counts = self.tables[level], counts[level]
+        width = table.shape[1]
+        rows = self.slots[level][neighbors]
+
+        free = layer_counts[rows] < width
+        free_rows = rows[free]
+        table[free_rows, layer_counts[free_rows]] = node
+        layer_counts[free_rows] += 1
+
+        # Full neighbours drop their least similar link (only one ever
+        # overflows, so the selection heuristic would change little here)
+        for nbr, row in zip(neighbors[~free].tolist(), rows[~free].tolist()):
+            links = np.append(table[row], node).astype(np.int64)
+            sims = np.asarray(vectors[links], dtype=np.float32) @ np.asarray(vectors[nbr], dtype=np.float32)
+            self._set_links(level, nbr, links[np.argsort(-sims, kind='stable')[:width]], counts)
+
+    @staticmethod
+    def _select_neighbors(
+        vectors: np.ndarray,
+        nodes: np.ndarray,
+        sims: np.ndarray,
+        limit: int
+    ) -> np.ndarray:
+        """
+        HNSW neighbour-selection heuristic.
+
+        Walks candidates (most similar first) and keeps one only if it is
+        closer to the base node than to every neighbour already kept,
+        which spreads links across directions; leftover slots are filled
+        with the nearest skipped candidates.
+        """
+        if len(nodes) <= limit:
+            return nodes
+
+        cand_vectors = np.asarray(vectors[nodes], dtype=np.float32)
+        gram = cand_vectors @ cand_vectors.T
+
+        # closest[j]: highest similarity of candidate j to any kept neighbour
+        closest = np.full(len(nodes), -np.inf, dtype=np.float32)
+        kept = []
+        start = 0
+        while len(kept) < limit:
+            eligible = np.flatnonzero(closest[start:] <= sims[start:])
+            if not len(eligible):
+                break
+            j = start + int(eligible[0])
+            kept.append(j)
+            np.maximum(closest, gram[j], out=closest)
+            start = j + 1
+
+        if len(kept) < limit:
+            skipped = np.setdiff1d(np.arange(len(nodes)), kept)
+            kept = np.sort(np.concatenate([kept, skipped[:limit - len(kept)]]))
+        return nodes[np.asarray(kept, dtype=np.int64)]
+
+    def _search_layer(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        entries: np.ndarray,
+        ef: int,
+        level: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Best-first search on one layer.
+
+        Returns:
+            Tuple of (nodes, similarities) for up to ef nodes, best first
+        """
+        table, slots = self.tables[level], self.slots[level]
+        visited = np.zeros(len(self.levels), dtype=bool)
+
+        ids = np.unique(entries)
+        visited[ids] = True
+        sims = np.asarray(vectors[ids], dtype=np.float32) @ query
+        expanded = np.zeros(len(ids), dtype=bool)
+
+        while True:
+            # The search ends once every node in the ef best has been expanded
+            open_rows = np.flatnonzero(~expanded)
+            if not len(open_rows):
+                break
+            if len(open_rows) > self.EXPAND_BATCH:
+                best = np.argpartition(-sims[open_rows], self.EXPAND_BATCH - 1)[:self.EXPAND_BATCH]
+                open_rows = open_rows[best]
+            expanded[open_rows] = True
+
+            links = table[slots[ids[open_rows]]].ravel()
+            links = links[links >= 0]
+            fresh = np.unique(links[~visited[links]])
+            if not len(fresh):
+                continue
+            visited[fresh] = True
+            fresh_sims = np.asarray(vectors[fresh], dtype=np.float32) @ query
+
+            ids = np.concatenate([ids, fresh])
+            sims = np.concatenate([sims, fresh_sims])
+            expanded = np.concatenate([expanded, np.zeros(len(fresh), dtype=bool)])
+            if len(ids) > ef:
+                keep = np.argpartition(-sims, ef - 1)[:ef]
+                ids, sims, expanded = ids[keep], sims[keep], expanded[keep]
+
+        order = np.argsort(-sims, kind='stable')
+        return ids[order], sims[order]
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, ef: int) -> np.ndarray:
+        """
+        Approximate top-k rows by inner product with query.
+
+        Args:
+            vectors: The matrix the graph was built over
+            query: Normalized query vector
+            k: Rows to return (best first)
+            ef: Search breadth; larger is more accurate and slower
+
+        Returns:
+            Row indices into vectors, best first
+        """
+        if self.entry_point < 0 or k <= 0:
+            return np.array([], dtype=np.int64)
+
+        query = np.asarray(query, dtype=np.float32)
+        entries = np.array([self.entry_point], dtype=np.int64)
+        for l in range(self.max_level, 0, -1):
+            entries = self._search_layer(vectors, query, entries, 1, l)[0]
+
+        found, _ = self._search_layer(vectors, query, entries, max(ef, k), 0)
+        return found[:k]
+
+    def save(self, path: str):
+        """Write the graph as an .npz archive (no pickled objects) atomically."""
+        arrays = {
+            'params': np.array([self.m, self.ef_construction, self.seed,
+                                self.entry_point, self.max_level], dtype=np.int64),
+            'signature': np.array(self.signature),
+            'levels': self.levels,
+        }
+        for level, table in enumerate(self.tables):
+            arrays[f'neighbors_{level}'] = table
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'HNSWIndex':
+        """
+        Read a graph written by save().
+
+        Raises:
+            ValueError: If the file is not a readable graph
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                m, ef_construction, seed, entry_point, max_level = data['params'].tolist()
+                index = cls(m, ef_construction, seed)
+                index.entry_point, index.max_level = entry_point, max_level
+                index.signature = str(data['signature'])
+                index.levels = data['levels']
+                index.slots = cls._make_slots(index.levels)
+                index.tables = [data[f'neighbors_{level}'] for level in range(len(index.slots))]
+        except (KeyError, OSError, ValueError) as e:
+            raise ValueError(f"Unreadable HNSW graph {path}: {e}")
+        return index
+
+
+class IVFPQIndex:
+    """
+    Inverted-file index with product-quantized residuals (IVF-PQ).
+
+    Rows are assigned to nlist k-means lists; each row's residual from
+    its list centroid is split into m subvectors and stored as m one-byte
+    codes (256 centroids per subspace). A query scores the rows of its
+    nprobe nearest lists with asymmetric distance computation (exact
+    query, quantized rows) and re-ranks the best candidates exactly.
+
+    Resident size is m bytes of codes plus a 4-byte row ID per vector,
+    e.g. 52 bytes instead of 1536 for 384-d float32 with m=48.
+
+    Args:
+        nlist: Number of coarse lists (0 = about 2*sqrt(rows))
+        m: Number of PQ subvectors; must divide the dimension
+        nprobe: Lists scanned per query
+        seed: Seed for k-means, so builds are reproducible
+    """
+
+    CODEBOOK_SIZE = 256
+    TRAIN_PER_LIST = 40      # Coarse training rows per list
+    PQ_TRAIN_ROWS = 16384    # Residuals used to train the PQ codebooks
+
+    def __init__(self, nlist: int = 0, m: int = 48, nprobe: int = 16, seed: int = 0):
+        self.nlist = nlist
+        self.m = m
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.codebooks = np.zeros((0, 0, 0), dtype=np.float32)   # (m, 256, dim / m)
+        self.codes = np.zeros((0, m), dtype=np.uint8)
+        self.list_offsets = np.zeros(1, dtype=np.int64)           # CSR over list_rows
+        self.list_rows = np.zeros(0, dtype=np.int32)
+        self.signature = ""
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Memory held by the index itself (codes, lists, centroids, codebooks)."""
+        return sum(a.nbytes for a in (
+            self.centroids, self.codebooks, self.codes, self.list_offsets, self.list_rows
+        ))
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        nlist: int = 0,
+        m: int = 48,
+        nprobe: int = 16,
+        seed: int = 0
+    ) -> 'IVFPQIndex':
+        """
+        Train coarse centroids and PQ codebooks on vectors and encode every row.
+
+        Raises:
+            ValueError: If m does not divide the vector dimension
+        """
+        n, dim = vectors.shape
+        if m <= 0 or dim % m:
+            raise ValueError(f"PQ subvectors ({m}) must divide the dimension ({dim})")
+        if nlist <= 0:
+            nlist = max(1, int(round(2 * math.sqrt(n))))
+        nlist = max(1, min(nlist, n))
+
+        index = cls(nlist, m, nprobe, seed)
+        if n == 0:
+            index.codebooks = np.zeros((m, cls.CODEBOOK_SIZE, dim // m), dtype=np.float32)
+            return index
+
+        rng = np.random.default_rng(seed)
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        # Coarse quantizer
+        train = vectors[rng.choice(n, size=min(n, nlist * cls.TRAIN_PER_LIST), replace=False)]
+        index.centroids = kmeans(train, nlist, seed=seed)
+        index.nlist = len(index.centroids)
+        assign = _nearest_centroids(vectors, index.centroids)
+
+        # Product quantizer over residuals, one codebook per subspace
+        residuals = vectors - index.centroids[assign]
+        sub = dim // m
+        sample = residuals[rng.choice(n, size=min(n, cls.PQ_TRAIN_ROWS), replace=False)]
+        codebooks = np.zeros((m, cls.CODEBOOK_SIZE, sub), dtype=np.float32)
+        codes = np.zeros((n, m), dtype=np.uint8)
+        for j in range(m):
+            book = kmeans(sample[:, j * sub:(j + 1) * sub], cls.CODEBOOK_SIZE, seed=seed + j)
+            codebooks[j, :len(book)] = book   # Tiny bases train fewer than 256 codes
+            codes[:, j] = _nearest_centroids(residuals[:, j * sub:(j + 1) * sub], book)
+        index.codebooks = codebooks
+        index.codes = codes
+
+        # Inverted lists as CSR: rows of list l are list_rows[offsets[l]:offsets[l + 1]]
+        index.list_rows = np.argsort(assign, kind='stable').astype(np.int32)
+        index.list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assign, minlength=index.nlist))]
+        ).astype(np.int64)
+        return index
+
+    def _adc_candidates(self, query: np.ndarray, count: int) -> np.ndarray:
+        """Rows of the nprobe nearest lists with the best approximate scores."""
+        coarse = self.centroids @ query
+        nprobe = min(self.nprobe, len(coarse))
+        probe = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+
+        starts, ends = self.list_offsets[probe], self.list_offsets[probe + 1]
+        sizes = ends - starts
+        if not sizes.sum():
+            return np.array([], dtype=np.int64)
+        rows = np.concatenate([self.list_rows[a:b] for a, b in zip(starts, ends)]).astype(np.int64)
+
+        # q·x ≈ q·centroid + sum_j q_j·codebook_j[code_j]
+        sub = self.codebooks.shape[2]
+        lut = np.einsum('jks,js->jk', self.codebooks, query.reshape(self.m, sub))
+        scores = np.repeat(coarse[probe], sizes)
+        scores += lut[np.arange(self.m), self.codes[rows]].sum(axis=1)
+
+        if len(rows) > count:
+            rows = rows[np.argpartition(-scores, count - 1)[:count]]
+        return rows
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, ef: int) -> np.ndarray:
+        """
+        Approximate top-k rows by inner product with query.
+
+        Args:
+            vectors: The matrix the index was built over (for exact re-rank)
+            query: Normalized query vector
+            k: Rows to return (best first)
+            ef: Approximate candidates re-ranked exactly
+
+        Returns:
+            Row indices into vectors, best first
+        """
+        if len(self) == 0 or k <= 0:
+            return np.array([], dtype=np.int64)
+        query = np.asarray(query, dtype=np.float32)
+        rows = self._adc_candidates(query, max(ef, k))
+        exact = np.asarray(vectors[rows], dtype=np.float32) @ query
+        return rows[np.argsort(-exact, kind='stable')[:k]]
+
+    def save(self, path: str):
+        """Write the index as an .npz archive (no pickled objects) atomically."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                params=np.array([self.nlist, self.m, self.seed], dtype=np.int64),
+                signature=np.array(self.signature),
+                centroids=self.centroids,
+                codebooks=self.codebooks,
+                codes=self.codes,
+                list_offsets=self.list_offsets,
+                list_rows=self.list_rows
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 16) -> 'IVFPQIndex':
+        """
+        Read an index written by save().
+
+        Raises:
+            ValueError: If the file is not a readable IVF-PQ index
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                nlist, m, seed = data['params'].tolist()
+                index = cls(nlist, m, nprobe, seed)
+                index.signature = str(data['signature'])
+                index.centroids = data['centroids']
+                index.codebooks = data['codebooks']
+                index.codes = data['codes']
+                index.list_offsets = data['list_offsets']
+                index.list_rows = data['list_rows']
+        except (KeyError, OSError, ValueError) as e:
+            raise ValueError(f"Unreadable IVF-PQ index {path}: {e}")
+        return index
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 element."""
+    if hasattr(np, 'bitwise_count'):   # NumPy >= 2.0
+        return np.bitwise_count(words)
+    # SWAR popcount for older NumPy
+    words = words - ((words >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    words = (words + (words >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (words * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+class BinaryIndex:
+    """
+    Sign-bit quantized copy of an embedding matrix.
+
+    Each vector is centered on the corpus mean and reduced to one bit per
+    dimension, packed into uint64 words (48 bytes for 384-d, 32x smaller
+    than float32). A query is binarized the same way, the whole corpus is
+    ranked by Hamming distance (XOR + popcount), and only the shortlist is
+    re-scored with exact dot products.
+
+    Centering matters: e5 embeddings share a strong common direction, so
+    raw signs would be nearly identical for every vector.
+    """
+
+    def __init__(self):
+        self.mean = np.zeros(0, dtype=np.float32)
+        self.codes = np.zeros((0, 0), dtype='<u8')
+        self.signature = ""
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Memory held by the codes and the centering mean."""
+        return self.codes.nbytes + self.mean.nbytes
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Pack (n, dim) vectors into (n, words) uint64 sign codes."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        packed = np.packbits(vectors - self.mean > 0, axis=1)
+        pad = -packed.shape[1] % 8
+        if pad:
+            packed = np.pad(packed, ((0, 0), (0, pad)))
+        return np.ascontiguousarray(packed).view('<u8')
+
+    @classmethod
+    def build(cls, vectors: np.ndarray) -> 'BinaryIndex':
+        index = cls()
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors):
+            index.mean = vectors.mean(axis=0)
+        else:
+            index.mean = np.zeros(vectors.shape[1], dtype=np.float32)
+        index.codes = index.encode(vectors)
+        return index
+
+    def hamming(self, query: np.ndarray) -> np.ndarray:
+        """Hamming distance from the query's code to every stored code."""
+        return _popcount(self.codes ^ self.encode(query)).sum(axis=1, dtype=np.int32)
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, ef: int) -> np.ndarray:
+        """
+        Approximate top-k rows by inner product with query.
+
+        Args:
+            vectors: The matrix the codes were built from (for exact re-rank)
+            query: Normalized query vector
+            k: Rows to return (best first)
+            ef: Hamming shortlist size re-ranked exactly
+
+        Returns:
+            Row indices into vectors, best first
+        """
+        if len(self) == 0 or k <= 0:
+            return np.array([], dtype=np.int64)
+        query = np.asarray(query, dtype=np.float32)
+        distances = self.hamming(query)
+        count = min(max(ef, k), len(distances))
+        shortlist = np.argpartition(distances, count - 1)[:count]
+        exact = np.asarray(vectors[shortlist], dtype=np.float32) @ query
+        return shortlist[np.argsort(-exact, kind='stable')[:k]]
+
+    def save(self, path: str):
+        """Write the codes as an .npz archive (no pickled objects) atomically."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, signature=np.array(self.signature), mean=self.mean, codes=self.codes)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BinaryIndex':
+        """
+        Read codes written by save().
+
+        Raises:
+            ValueError: If the file is not a readable binary index
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                index = cls()
+                index.signature = str(data['signature'])
+                index.mean = data['mean']
+                index.codes = data['codes']
+        except (KeyError, OSError, ValueError) as e:
+            raise ValueError(f"Unreadable binary index {path}: {e}")
+        return index
+
+
+ANN_BACKENDS = {
+    'hnsw': HNSWIndex,
+    'ivfpq': IVFPQIndex,
+    'binary': BinaryIndex,
+}
+
+
+class ANNSearcher:
+    """
+    Candidate generator for a merged index (base + delta log).
+
+    The ANN index (HNSWIndex or IVFPQIndex) covers the base rows it was
+    built over; tombstoned base rows are dropped from its answers and rows
+    added by the delta log are always returned as candidates, so callers
+    can score the candidates exactly instead of the whole index.
+    """
+
+    def __init__(
+        self,
+        index,
+        base_vectors: np.ndarray,
+        base_to_merged: np.ndarray,
+        extra_rows: np.ndarray,
+        ef_search: int
+    ):
+        self.index = index
+        self.base_vectors = base_vectors
+        self.base_to_merged = base_to_merged
+        self.extra_rows = extra_rows
+        self.ef_search = ef_search
+
+    def candidates(self, query: np.ndarray, k: int) -> np.ndarray:
+        """Rows of the merged index worth scoring exactly for a query."""
+        ef = max(self.ef_search, k)
+        base_rows = self.index.search(self.base_vectors, query, ef, ef)
+        merged = self.base_to_merged[base_rows]
+        return np.concatenate([merged[merged >= 0], self.extra_rows])
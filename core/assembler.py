@@ -176,7 +176,8 @@ def assemble_context(
     instructions: Optional[str] = None,
     budget: Optional[int] = None,
     chunk_top_k: int = 10,
-    memory_top_k: int = 5
+    memory_top_k: int = 5,
+    indices: Optional[dict] = None
 ) -> ContextFrame:
     """
     Assemble a context frame for a task.
@@ -190,6 +191,7 @@ def assemble_context(
         budget: Total token budget (default from config)
         chunk_top_k: Max chunks to retrieve
         memory_top_k: Max memories to retrieve
+        indices: Optional preloaded indices by type (see retrieve)
 
     Returns:
         ContextFrame object
@@ -208,7 +210,8 @@ def assemble_context(
             project_root,
             top_k=chunk_top_k,
             index_type="chunks",
-            include_content=False
+            include_content=False,
+            indices=indices
         )
         # Load content and track tokens
         chunks_tokens = 0
@@ -238,7 +241,8 @@ def assemble_context(
             project_root,
             top_k=memory_top_k,
             index_type="memories",
-            include_content=False
+            include_content=False,
+            indices=indices
         )
         # Load content and track tokens
         memories_tokens = 0
@@ -299,7 +303,8 @@ def assemble_and_render(
     current_state: Optional[str] = None,
     instructions: Optional[str] = None,
     budget: Optional[int] = None,
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    indices: Optional[dict] = None
 ) -> str:
     """
     Assemble context frame and render to markdown.
@@ -312,6 +317,7 @@ def assemble_and_render(
         instructions: Custom instructions
         budget: Total token budget
         output_path: Optional file path to write output
+        indices: Optional preloaded indices by type (see retrieve)
 
     Returns:
         Rendered markdown string
@@ -322,7 +328,8 @@ def assemble_and_render(
         acceptance_criteria=acceptance_criteria,
         current_state=current_state,
         instructions=instructions,
-        budget=budget
+        budget=budget,
+        indices=indices
     )
 
     markdown = frame.to_markdown()
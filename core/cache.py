@@ -0,0 +1,127 @@
+"""
+Cortex Embedding Cache
+
+Content-addressed, size-bounded cache of passage embeddings.
+Entries are keyed by model name plus a hash of the prefixed passage text,
+so unchanged content is never sent through the model twice.
+"""
+
+import os
+import hashlib
+from typing import Optional
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    On-disk LRU cache of embedding vectors.
+
+    Layout: {cache_dir}/{key[:2]}/{key}.npy
+
+    Recency is tracked through file mtimes (bumped on every hit), so the
+    cache survives across processes without a separate bookkeeping file.
+    When the entry count exceeds max_entries, the least recently used
+    entries are evicted down to 90% of the limit.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._count: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, prefixed_text: str) -> str:
+        """Build the cache key for a model and a prefixed passage."""
+        digest = hashlib.sha256()
+        digest.update(model_name.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(prefixed_text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached vector for a key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            embedding = np.load(path)
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray):
+        """Store a vector, evicting old entries if the cache is full."""
+        path = self._entry_path(key)
+        existed = os.path.exists(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file first so readers never see partial entries
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.asarray(embedding, dtype=np.float32))
+        os.replace(tmp_path, path)
+
+        if existed:
+            return
+
+        if self._count is None:
+            self._count = len(self._list_entries())
+        else:
+            self._count += 1
+
+        if self._count > self.max_entries:
+            self.evict(int(self.max_entries * 0.9))
+
+    def _list_entries(self) -> list[str]:
+        entries = []
+        if not os.path.exists(self.cache_dir):
+            return entries
+        for shard in os.listdir(self.cache_dir):
+            shard_path = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for f in os.listdir(shard_path):
+                if f.endswith('.npy'):
+                    entries.append(os.path.join(shard_path, f))
+        return entries
+
+    def evict(self, target_entries: int) -> int:
+        """Remove least recently used entries until target_entries remain."""
+        entries = self._list_entries()
+        excess = len(entries) - target_entries
+        if excess <= 0:
+            self._count = len(entries)
+            return 0
+
+        def _mtime(path: str) -> float:
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+
+        entries.sort(key=_mtime)
+        removed = 0
+        for path in entries[:excess]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+        self._count = len(entries) - removed
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._list_entries())
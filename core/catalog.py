@@ -0,0 +1,358 @@
+"""
+Cortex Metadata Catalog
+
+SQLite database (.cortex/catalog.db, WAL mode) mirroring the frontmatter
+of every chunk and memory, so listings, filters and counts are indexed
+queries instead of a parse of every .md file:
+
+    chunks(id, domain, source_doc, source_section, source_start, source_end,
+           source_path, source_hash, section_hash, tokens, keywords, created)
+    memories(id, type, domain, confidence, keywords, learning, context,
+             source_session, source_task, trigger, created, updated,
+             verified, retrieval_count, last_retrieved, usefulness_score)
+
+Indexed on domain, type, confidence, source_path and created. Rows are
+written by chunker.py and memory.py next to the files, which stay the
+source of truth: a table that was never filled (a project from before
+the catalog, or a deleted catalog.db) is filled from the files on first
+use, and `cortex index --full` refills it. Memory rows also record their
+file's mtime; memory queries first re-read files whose mtime differs
+and drop rows whose file is gone, so hand edits are picked up.
+"""
+
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from .config import Config
+from . import segments
+from .utils import parse_chunk_id, parse_frontmatter
+
+
+SCHEMA_VERSION = 2
+
+CHUNK_COLUMNS = (
+    'id', 'domain', 'source_doc', 'source_section', 'source_start', 'source_end',
+    'source_path', 'source_hash', 'section_hash', 'tokens', 'keywords', 'created'
+)
+MEMORY_COLUMNS = (
+    'id', 'type', 'domain', 'confidence', 'keywords', 'learning', 'context',
+    'source_session', 'source_task', 'trigger', 'created', 'updated',
+    'verified', 'retrieval_count', 'last_retrieved', 'usefulness_score'
+)
+MEMORY_ROW_COLUMNS = MEMORY_COLUMNS + ('mtime_ns',)
+TABLES = ('chunks', 'memories')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS filled (name TEXT PRIMARY KEY);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    source_doc TEXT,
+    source_section TEXT,
+    source_start INTEGER,
+    source_end INTEGER,
+    source_path TEXT,
+    source_hash TEXT,
+    section_hash TEXT,
+    tokens INTEGER,
+    keywords TEXT,
+    created TEXT
+);
+CREATE INDEX IF NOT EXISTS chunks_domain ON chunks(domain);
+CREATE INDEX IF NOT EXISTS chunks_source_path ON chunks(source_path, source_hash);
+CREATE INDEX IF NOT EXISTS chunks_created ON chunks(created);
+
+CREATE TABLE IF NOT EXISTS memories (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    confidence TEXT NOT NULL,
+    keywords TEXT,
+    learning TEXT,
+    context TEXT,
+    source_session TEXT,
+    source_task TEXT,
+    "trigger" TEXT,
+    created TEXT,
+    updated TEXT,
+    verified INTEGER,
+    retrieval_count INTEGER,
+    last_retrieved TEXT,
+    usefulness_score REAL,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS memories_domain ON memories(domain);
+CREATE INDEX IF NOT EXISTS memories_type ON memories(type);
+CREATE INDEX IF NOT EXISTS memories_confidence ON memories(confidence);
+CREATE INDEX IF NOT EXISTS memories_created ON memories(created);
+"""
+
+
+def _chunk_row(meta: dict) -> tuple:
+    """Catalog row from chunk frontmatter (or asdict(Chunk))."""
+    parsed = parse_chunk_id(meta['id'])
+    lines = meta.get('source_lines') or (None, None)
+    return (
+        meta['id'], parsed[1] if parsed else '', meta.get('source_doc'), meta.get('source_section'),
+        lines[0], lines[1], meta.get('source_path') or '', meta.get('source_hash') or '',
+        meta.get('section_hash') or '', meta.get('tokens'), json.dumps(meta.get('keywords') or []),
+        meta.get('created')
+    )
+
+
+def _memory_row(memory: dict, mtime_ns: Optional[int]) -> tuple:
+    """Catalog row from asdict(Memory) and its file's mtime."""
+    row = dict(
+        memory, keywords=json.dumps(memory.get('keywords') or []),
+        verified=int(bool(memory.get('verified'))), mtime_ns=mtime_ns
+    )
+    return tuple(row.get(column) for column in MEMORY_ROW_COLUMNS)
+
+
+def _memory_dict(row: sqlite3.Row) -> dict:
+    """Memory fields from a catalog row."""
+    memory = dict(zip(MEMORY_COLUMNS, row))
+    memory['keywords'] = json.loads(memory['keywords'] or '[]')
+    memory['verified'] = bool(memory['verified'])
+    return memory
+
+
+def _upsert(conn: sqlite3.Connection, table: str, columns: tuple, rows: Iterable[tuple]):
+    names = ', '.join(f'"{column}"' for column in columns)
+    marks = ', '.join('?' for _ in columns)
+    conn.executemany(f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({marks})", rows)
+
+
+def _scan_chunks(project_root: str):
+    """Catalog rows for every chunk on disk (files and segment logs)."""
+    chunks_path = Config.get_chunks_path(project_root)
+    if not os.path.exists(chunks_path):
+        return
+    for domain in sorted(os.listdir(chunks_path)):
+        for chunk_id, markdown, _ in segments.iter_chunks(os.path.join(chunks_path, domain), embeddings=False):
+            meta = parse_frontmatter(markdown)
+            meta.setdefault('id', chunk_id)
+            yield _chunk_row(meta)
+
+
+def _memories_path(project_root: str) -> str:
+    return os.path.join(Config.get_cortex_path(project_root), Config.MEMORIES_DIR)
+
+
+def _memory_mtime(project_root: str, memory_id: str) -> Optional[int]:
+    try:
+        return os.stat(os.path.join(_memories_path(project_root), f"{memory_id}.md")).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _memory_mtimes(project_root: str) -> dict[str, int]:
+    """Memory ID -> file mtime, from one directory scan (no file reads)."""
+    mtimes = {}
+    try:
+        with os.scandir(_memories_path(project_root)) as entries:
+            for entry in entries:
+                if entry.name.endswith('.md'):
+                    mtimes[entry.name[:-3]] = entry.stat().st_mtime_ns
+    except FileNotFoundError:
+        pass
+    return mtimes
+
+
+def _scan_memories(project_root: str, memory_ids: Optional[Iterable[str]] = None):
+    """Catalog rows for every memory file (or just memory_ids); unreadable files are skipped."""
+    from dataclasses import asdict
+    from .memory import parse_memory_file
+
+    memories_path = _memories_path(project_root)
+    if memory_ids is None:
+        memory_ids = sorted(_memory_mtimes(project_root))
+    for memory_id in memory_ids:
+        path = os.path.join(memories_path, f"{memory_id}.md")
+        mtime_ns = _memory_mtime(project_root, memory_id)
+        memory = parse_memory_file(path) if mtime_ns is not None else None
+        if memory is not None:
+            yield _memory_row(asdict(memory), mtime_ns)
+
+
+def _sync_memories(conn: sqlite3.Connection, project_root: str):
+    """Re-read memory files added or edited behind the catalog's back, and drop deleted ones."""
+    on_disk = _memory_mtimes(project_root)
+    known = dict(conn.execute("SELECT id, mtime_ns FROM memories").fetchall())
+    changed = [memory_id for memory_id, mtime_ns in on_disk.items() if known.get(memory_id) != mtime_ns]
+    stale = set(known) - set(on_disk) | set(changed)
+    if stale:
+        conn.executemany("DELETE FROM memories WHERE id = ?", ((memory_id,) for memory_id in stale))
+    if changed:
+        _upsert(conn, 'memories', MEMORY_ROW_COLUMNS, _scan_memories(project_root, changed))
+
+
+def _fill(conn: sqlite3.Connection, project_root: str, tables: Iterable[str], refill: bool = False):
+    """Load tables from the files, unless already filled (or refill)."""
+    for table in tables:
+        if not refill and conn.execute("SELECT 1 FROM filled WHERE name = ?", (table,)).fetchone():
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if refill or not conn.execute("SELECT 1 FROM filled WHERE name = ?", (table,)).fetchone():
+                conn.execute(f"DELETE FROM {table}")
+                if table == 'chunks':
+                    _upsert(conn, 'chunks', CHUNK_COLUMNS, _scan_chunks(project_root))
+                else:
+                    _upsert(conn, 'memories', MEMORY_ROW_COLUMNS, _scan_memories(project_root))
+                conn.execute("INSERT OR REPLACE INTO filled (name) VALUES (?)", (table,))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def _migrate(conn: sqlite3.Connection):
+    """Create the schema, dropping any other version's tables (derived data, refilled from the files)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for table in ('filled',) + TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+@contextmanager
+def connect(project_root: str):
+    """
+    Open the catalog, creating and filling it if needed.
+
+    The block runs in one transaction, committed when it exits cleanly.
+    """
+    project_root = os.path.abspath(project_root)
+    path = Config.get_catalog_file(project_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30.0)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            _migrate(conn)
+        _fill(conn, project_root, TABLES)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def refill(project_root: str, tables: Iterable[str] = TABLES):
+    """Reload tables from the chunk and memory files."""
+    with connect(project_root) as conn:
+        _fill(conn, project_root, tables, refill=True)
+
+
+def upsert_chunks(project_root: str, metas: Iterable[dict]):
+    """Record chunks from their frontmatter (or asdict(Chunk)); existing rows are replaced."""
+    with connect(project_root) as conn:
+        _upsert(conn, 'chunks', CHUNK_COLUMNS, (_chunk_row(meta) for meta in metas))
+
+
+def remove_chunks(project_root: str, chunk_ids: Iterable[str]):
+    with connect(project_root) as conn:
+        conn.executemany("DELETE FROM chunks WHERE id = ?", ((chunk_id,) for chunk_id in chunk_ids))
+
+
+def upsert_memories(project_root: str, memories: Iterable[dict]):
+    """Record memories from asdict(Memory), after their files are written; existing rows are replaced."""
+    with connect(project_root) as conn:
+        _upsert(conn, 'memories', MEMORY_ROW_COLUMNS, (
+            _memory_row(memory, _memory_mtime(project_root, memory['id'])) for memory in memories
+        ))
+
+
+def remove_memories(project_root: str, memory_ids: Iterable[str]):
+    with connect(project_root) as conn:
+        conn.executemany("DELETE FROM memories WHERE id = ?", ((memory_id,) for memory_id in memory_ids))
+
+
+def query_memories(
+    project_root: str,
+    domain: Optional[str] = None,
+    memory_type: Optional[str] = None,
+    confidence: Optional[str] = None
+) -> list[dict]:
+    """
+    Memory fields matching every given filter, newest first.
+
+    The domain filter ignores case, like the file-based listing it
+    replaced (domains are stored upper-cased).
+    """
+    clauses, params = [], []
+    for column, value in (('domain', domain), ('type', memory_type), ('confidence', confidence)):
+        if value:
+            clauses.append(f"{column} = ? COLLATE NOCASE" if column == 'domain' else f"{column} = ?")
+            params.append(value)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    names = ', '.join(f'"{column}"' for column in MEMORY_COLUMNS)
+
+    with connect(project_root) as conn:
+        _sync_memories(conn, project_root)
+        rows = conn.execute(f"SELECT {names} FROM memories{where} ORDER BY created DESC", params).fetchall()
+    return [_memory_dict(row) for row in rows]
+
+
+def retrieval_counts(project_root: str) -> dict[str, int]:
+    """Retrieval count per memory ID."""
+    with connect(project_root) as conn:
+        _sync_memories(conn, project_root)
+        rows = conn.execute("SELECT id, retrieval_count FROM memories").fetchall()
+    return {memory_id: count or 0 for memory_id, count in rows}
+
+
+def get_catalog_version(project_root: str) -> Optional[tuple]:
+    """
+    Stat signature (mtime, size) of the catalog and its WAL file.
+
+    Changes whenever a write is committed; reads leave it alone. None if
+    the catalog does not exist.
+    """
+    path = Config.get_catalog_file(os.path.abspath(project_root))
+    version = []
+    for suffix in ('', '-wal'):
+        try:
+            st = os.stat(path + suffix)
+        except FileNotFoundError:
+            if not suffix:
+                return None
+            continue
+        version.append((suffix, st.st_mtime_ns, st.st_size))
+    return tuple(version)
+
+
+def count_chunks(project_root: str) -> dict[str, int]:
+    """Chunk count per domain."""
+    with connect(project_root) as conn:
+        rows = conn.execute("SELECT domain, COUNT(*) FROM chunks GROUP BY domain ORDER BY domain").fetchall()
+    return dict(rows)
+
+
+def count_memories(project_root: str, column: str) -> dict[str, int]:
+    """
+    Memory count per value of column (type, domain or confidence).
+
+    Raises:
+        ValueError: For any other column
+    """
+    if column not in ('type', 'domain', 'confidence'):
+        raise ValueError(f"Cannot group memories by: {column}")
+    with connect(project_root) as conn:
+        _sync_memories(conn, project_root)
+        rows = conn.execute(f"SELECT {column}, COUNT(*) FROM memories GROUP BY {column} ORDER BY {column}").fetchall()
+    return dict(rows)
@@ -8,15 +8,23 @@ import os
 import re
 import json
 import hashlib
+from collections import Counter, deque
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 from datetime import datetime
-from dataclasses import dataclass, asdict
-from typing import Optional
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, replace
+from typing import Iterable, Optional
 import numpy as np
 
 from .config import Config
-from .embedder import embed_passage
-from .utils import parse_frontmatter, parse_chunk_id, extract_keywords
+from .embedder import embed_passage, embed_passages_batch, enable_cache
+from .indexer import update_index
+from .pipeline import run_pipeline, PipelineStats
+from . import catalog, manifest, segments
+from .ids import format_doc_id, format_chunk_id, allocate_doc_numbers, allocate_chunk_seqs
+from .utils import parse_frontmatter, parse_chunk_id, chunk_id_sort_key, extract_keywords
 
 
 @dataclass
@@ -32,13 +40,45 @@ class Chunk:
     created: str
     source_path: str = ""
     source_hash: str = ""
+    section_hash: str = ""
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
 
 
 def count_tokens(text: str) -> int:
     """Count tokens using tiktoken (cl100k_base for GPT-4 compatibility)."""
-    import tiktoken
-    encoder = tiktoken.get_encoding("cl100k_base")
-    return len(encoder.encode(text))
+    return len(_encoding().encode(text))
+
+
+def token_offsets(text: str) -> list[int]:
+    """Character offset at which each cl100k_base token of text starts."""
+    encoding = _encoding()
+    return encoding.decode_with_offsets(encoding.encode(text))[1]
+
+
+class TokenizedText:
+    """
+    Text tokenized once, so token counts of any character span are a
+    bisection over token start offsets instead of another encode.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.starts = token_offsets(text)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def count(self, start: int, end: int) -> int:
+        """Tokens overlapping text[start:end]."""
+        if start >= end or not self.starts:
+            return 0
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        return bisect_left(self.starts, end) - first
 
 
 def detect_domain(path: str) -> str:
@@ -68,28 +108,6 @@ def detect_domain(path: str) -> str:
     return "GENERAL"
 
 
-def get_next_doc_number(chunks_path: str, domain: str) -> int:
-    """Get next document number for a domain."""
-    domain_path = os.path.join(chunks_path, domain)
-    if not os.path.exists(domain_path):
-        return 1
-
-    # Find existing doc numbers
-    existing = set()
-    for f in os.listdir(domain_path):
-        if f.endswith('.md'):
-            parsed = parse_chunk_id(f.replace('.md', ''))
-            if parsed:
-                try:
-                    existing.add(int(parsed[2]))
-                except ValueError:
-                    pass
-
-    if not existing:
-        return 1
-    return max(existing) + 1
-
-
 def parse_sections(content: str) -> list[dict]:
     """
     Parse markdown into sections based on headers.
@@ -135,66 +153,175 @@ def parse_sections(content: str) -> list[dict]:
     return sections
 
 
-def split_by_paragraphs(text: str, max_tokens: int) -> list[str]:
+def _stripped(text: str, start: int, end: int) -> Optional[tuple[int, int]]:
+    """Span of text[start:end] without surrounding whitespace (None if blank)."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def _split_spans(text: str, separator: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Stripped, non-blank spans of text[start:end] between separator matches."""
+    spans = []
+    pos = start
+    for match in re.compile(separator).finditer(text, start, end):
+        spans.append(_stripped(text, pos, match.start()))
+        pos = match.end()
+    spans.append(_stripped(text, pos, end))
+    return [span for span in spans if span]
+
+
+def _pack_spans(tokens: TokenizedText, max_tokens: int) -> list[tuple[str, int, int]]:
     """
-    Split text into chunks by paragraphs.
+    Pack paragraphs (sentences of oversized paragraphs) into chunks.
 
-    Tries to keep paragraphs together, splits at sentence boundaries if needed.
+    Returns:
+        List of (chunk text, start, end) with start/end the character
+        span of the chunk in the tokenized text
     """
-    paragraphs = text.split('\n\n')
+    text = tokens.text
     chunks = []
+
+    def flush(spans: list[tuple[int, int]], joiner: str):
+        chunks.append((joiner.join(text[s:e] for s, e in spans), spans[0][0], spans[-1][1]))
+
     current_chunk = []
     current_tokens = 0
 
-    for para in paragraphs:
-        para = para.strip()
-        if not para:
-            continue
-
-        para_tokens = count_tokens(para)
+    for para_start, para_end in _split_spans(text, r'\n\n', 0, len(text)):
+        para_tokens = tokens.count(para_start, para_end)
 
         # If single paragraph exceeds max, split it
         if para_tokens > max_tokens:
             # Flush current chunk first
             if current_chunk:
-                chunks.append('\n\n'.join(current_chunk))
+                flush(current_chunk, '\n\n')
                 current_chunk = []
                 current_tokens = 0
 
             # Split paragraph by sentences
-            sentences = re.split(r'(?<=[.!?])\s+', para)
             sent_chunk = []
             sent_tokens = 0
 
-            for sent in sentences:
-                sent_tok = count_tokens(sent)
+            for sent in _split_spans(text, r'(?<=[.!?])\s+', para_start, para_end):
+                sent_tok = tokens.count(*sent)
                 if sent_tokens + sent_tok > max_tokens and sent_chunk:
-                    chunks.append(' '.join(sent_chunk))
+                    flush(sent_chunk, ' ')
                     sent_chunk = []
                     sent_tokens = 0
                 sent_chunk.append(sent)
                 sent_tokens += sent_tok
 
             if sent_chunk:
-                chunks.append(' '.join(sent_chunk))
+                flush(sent_chunk, ' ')
             continue
 
         # Check if adding this paragraph exceeds limit
         if current_tokens + para_tokens > max_tokens and current_chunk:
-            chunks.append('\n\n'.join(current_chunk))
+            flush(current_chunk, '\n\n')
             current_chunk = []
             current_tokens = 0
 
-        current_chunk.append(para)
+        current_chunk.append((para_start, para_end))
         current_tokens += para_tokens
 
     # Flush remaining
     if current_chunk:
-        chunks.append('\n\n'.join(current_chunk))
+        flush(current_chunk, '\n\n')
 
     return chunks
 
 
+CHUNK_STRATEGIES = ("greedy", "content")
+
+
+def _content_units(tokens: TokenizedText, max_tokens: int) -> list[tuple[int, int, int]]:
+    """Paragraphs, or the sentences of oversized ones, as (start, end, tokens)."""
+    text = tokens.text
+    units = []
+    for para in _split_spans(text, r'\n\n', 0, len(text)):
+        para_tokens = tokens.count(*para)
+        if para_tokens <= max_tokens:
+            units.append((*para, para_tokens))
+            continue
+        for sent in _split_spans(text, r'(?<=[.!?])\s+', *para):
+            units.append((*sent, tokens.count(*sent)))
+    return units
+
+
+def _pack_content_defined(tokens: TokenizedText, max_tokens: int, min_tokens: int) -> list[tuple[str, int, int]]:
+    """
+    Pack units into chunks cut where a rolling hash says so.
+
+    The hash covers each unit and the one before it. Once a chunk holds
+    min_tokens, it ends after a unit whose hash falls below that unit's
+    share of the distance to the midpoint of min_tokens and max_tokens, so
+    chunks average roughly that midpoint; a unit that would overflow
+    max_tokens always starts a new chunk. Cut points depend only on nearby
+    text, so an edit moves at most the boundaries around it and later
+    chunks come out byte-identical.
+
+    Returns:
+        List of (chunk text, start, end), chunk text being the source span
+    """
+    text = tokens.text
+    spread = max((max_tokens - min_tokens) // 2, 1)
+    chunks = []
+    current = []
+    current_tokens = 0
+    previous = b''
+
+    def flush():
+        start, end = current[0][0], current[-1][1]
+        chunks.append((text[start:end], start, end))
+
+    for start, end, unit_tokens in _content_units(tokens, max_tokens):
+        if current and current_tokens + unit_tokens > max_tokens:
+            flush()
+            current = []
+            current_tokens = 0
+
+        current.append((start, end))
+        current_tokens += unit_tokens
+
+        unit = text[start:end].encode('utf-8')
+        digest = hashlib.blake2b(previous + b'\0' + unit, digest_size=8).digest()
+        previous = unit
+        if current_tokens >= min_tokens and int.from_bytes(digest, 'big') < min(unit_tokens / spread, 1.0) * 2 ** 64:
+            flush()
+            current = []
+            current_tokens = 0
+
+    if current:
+        start, end = current[0][0], current[-1][1]
+        # Fold a short tail into the previous chunk rather than let it be dropped
+        if chunks and current_tokens < min_tokens and tokens.count(chunks[-1][1], end) <= max_tokens:
+            start = chunks.pop()[1]
+        chunks.append((text[start:end], start, end))
+
+    return chunks
+
+
+def split_by_paragraphs(text: str, max_tokens: int) -> list[str]:
+    """
+    Split text into chunks by paragraphs.
+
+    Tries to keep paragraphs together, splits at sentence boundaries if needed.
+    """
+    return [chunk for chunk, _, _ in _pack_spans(TokenizedText(text), max_tokens)]
+
+
+def _overlap_words(overlap_tokens: int) -> int:
+    # Estimate words for overlap (rough: 1.3 tokens per word)
+    return int(overlap_tokens / 1.3)
+
+
+# "..." marker and blank line that add_overlap puts before the overlap text
+OVERLAP_MARKER_TOKENS = 2
+
+
 def add_overlap(chunks: list[str], overlap_tokens: int) -> list[str]:
     """Add overlap between consecutive chunks."""
     if len(chunks) <= 1 or overlap_tokens <= 0:
@@ -210,8 +337,7 @@ def add_overlap(chunks: list[str], overlap_tokens: int) -> list[str]:
         prev_chunk = chunks[i - 1]
         prev_words = prev_chunk.split()
 
-        # Estimate words for overlap (rough: 1.3 tokens per word)
-        overlap_words = int(overlap_tokens / 1.3)
+        overlap_words = _overlap_words(overlap_tokens)
         if overlap_words > 0 and len(prev_words) > overlap_words:
             overlap_text = ' '.join(prev_words[-overlap_words:])
             chunk = f"...{overlap_text}\n\n{chunk}"
@@ -221,44 +347,76 @@ def add_overlap(chunks: list[str], overlap_tokens: int) -> list[str]:
     return result
 
 
-def chunk_document(
-    path: str,
-    project_root: str = ".",
-    domain: Optional[str] = None,
-    force: bool = False
-) -> list[Chunk]:
+def split_section(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    min_tokens: int = 0,
+    strategy: Optional[str] = None
+) -> list[tuple[str, int]]:
     """
-    Chunk a markdown document into semantic units.
+    Split a section into overlapping chunks with one tokenizer pass.
+
+    With the greedy strategy this produces the same text as
+    split_by_paragraphs followed by add_overlap; the content strategy
+    picks cut points by rolling hash instead (see _pack_content_defined).
+    A section that fits is kept whole either way. Token counts come from
+    the token offsets of the section, so a token straddling a paragraph
+    or sentence cut counts towards both pieces, and the overlap prefix
+    adds OVERLAP_MARKER_TOKENS.
 
     Args:
-        path: Path to markdown file
-        project_root: Project root directory
-        domain: Optional domain override (auto-detected if not provided)
-        force: Re-chunk even if chunks exist
+        text: Section content
+        max_tokens: Maximum tokens per chunk (before overlap)
+        overlap_tokens: Overlap carried over from the previous chunk
+        min_tokens: Smallest chunk the content strategy cuts
+        strategy: "greedy" or "content" (default from config)
 
     Returns:
-        List of Chunk objects
+        List of (chunk text, token count)
+
+    Raises:
+        ValueError: If the strategy is unknown
     """
-    path = os.path.abspath(path)
-    project_root = os.path.abspath(project_root)
+    strategy = strategy or Config.CHUNK_STRATEGY
+    if strategy not in CHUNK_STRATEGIES:
+        raise ValueError(f"Unknown chunk strategy: {strategy} (expected one of {', '.join(CHUNK_STRATEGIES)})")
 
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Document not found: {path}")
+    tokens = TokenizedText(text)
+    if len(tokens) <= max_tokens:
+        return [(text, len(tokens))]
 
-    # Auto-detect domain if not provided
-    if domain is None:
-        domain = detect_domain(path)
+    if strategy == "content":
+        pieces = _pack_content_defined(tokens, max_tokens, min_tokens)
+    else:
+        pieces = _pack_spans(tokens, max_tokens)
+    texts = add_overlap([chunk for chunk, _, _ in pieces], overlap_tokens)
+    counts = [tokens.count(start, end) for _, start, end in pieces]
 
-    # Setup paths
-    chunks_path = Config.get_chunks_path(project_root)
-    domain_path = os.path.join(chunks_path, domain)
-    os.makedirs(domain_path, exist_ok=True)
+    for i in range(1, len(pieces)):
+        if texts[i] == pieces[i][0]:
+            continue
+        # Overlap words are the last words of the previous chunk's span
+        _, prev_start, prev_end = pieces[i - 1]
+        words = [m.start() for m in re.finditer(r'\S+', text[prev_start:prev_end])]
+        overlap_start = prev_start + words[-_overlap_words(overlap_tokens)]
+        counts[i] += tokens.count(overlap_start, prev_end) + OVERLAP_MARKER_TOKENS
+
+    return list(zip(texts, counts))
+
+
+def section_hash(section: dict) -> str:
+    """SHA256 of a section's title and content, shared by all its chunks."""
+    return hashlib.sha256(f"{section['title']}\n{section['content']}".encode('utf-8')).hexdigest()
 
-    # Get document number
-    doc_num = get_next_doc_number(chunks_path, domain)
-    doc_id = f"DOC-{domain}-{doc_num:03d}"
 
-    # Read document and compute hash
+def _read_source(path: str, project_root: str) -> tuple[str, str, str]:
+    """
+    Read a source document.
+
+    Returns:
+        Tuple of (content, path relative to project root, content SHA256)
+    """
     with open(path, 'r', encoding='utf-8') as f:
         content = f.read()
     source_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
@@ -270,46 +428,38 @@ def chunk_document(
         # On Windows, relpath fails across drives
         source_path = path
 
-    # Parse into sections
-    sections = parse_sections(content)
+    return content, source_path, source_hash
+
 
-    # Process each section into chunks
+def _chunk_sections(
+    sections: list[dict],
+    domain: str,
+    doc_num: int,
+    first_seq: int,
+    source_path: str,
+    source_hash: str
+) -> list[Chunk]:
+    """Split sections into Chunk objects numbered from first_seq."""
+    doc_id = format_doc_id(domain, doc_num)
     all_chunks = []
-    chunk_seq = 1
+    chunk_seq = first_seq
 
     for section in sections:
         section_content = section['content']
         if not section_content.strip():
             continue
 
-        section_tokens = count_tokens(section_content)
-
-        # If section fits in one chunk, keep it together
-        if section_tokens <= Config.CHUNK_SIZE:
-            # Skip if too small
-            if section_tokens < Config.CHUNK_MIN:
-                continue
-
-            text_chunks = [section_content]
-        else:
-            # Split by paragraphs
-            text_chunks = split_by_paragraphs(
-                section_content,
-                Config.CHUNK_SIZE
-            )
-
-        # Add overlap between chunks
-        text_chunks = add_overlap(text_chunks, Config.CHUNK_OVERLAP)
+        # Tokenize once; split only if the section does not fit in one chunk
+        text_chunks = split_section(section_content, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, Config.CHUNK_MIN)
+        content_hash = section_hash(section)
 
         # Create chunk objects
-        for chunk_text in text_chunks:
-            chunk_tokens = count_tokens(chunk_text)
+        for chunk_text, chunk_tokens in text_chunks:
             if chunk_tokens < Config.CHUNK_MIN:
                 continue
 
-            chunk_id = f"CHK-{domain}-{doc_num:03d}-{chunk_seq:03d}"
             chunk = Chunk(
-                id=chunk_id,
+                id=format_chunk_id(domain, doc_num, chunk_seq),
                 source_doc=doc_id,
                 source_section=section['title'],
                 source_lines=(section['start_line'], section['end_line']),
@@ -318,25 +468,105 @@ def chunk_document(
                 content=chunk_text,
                 created=datetime.now().isoformat(),
                 source_path=source_path,
-                source_hash=source_hash
+                source_hash=source_hash,
+                section_hash=content_hash
             )
             all_chunks.append(chunk)
             chunk_seq += 1
 
-    # Save chunks
-    for chunk in all_chunks:
-        save_chunk(chunk, domain_path)
+    return all_chunks
+
+
+def build_chunks(
+    path: str,
+    project_root: str,
+    domain: str,
+    doc_num: int
+) -> list[Chunk]:
+    """
+    Parse a markdown document into Chunk objects without embedding or saving.
+
+    Args:
+        path: Absolute path to markdown file
+        project_root: Absolute project root directory
+        domain: Domain tag
+        doc_num: Document number to allocate chunk IDs under
+
+    Returns:
+        List of Chunk objects
+    """
+    content, source_path, source_hash = _read_source(path, project_root)
+    sections = parse_sections(content)
+    return _chunk_sections(sections, domain, doc_num, 1, source_path, source_hash)
 
-    print(f"Created {len(all_chunks)} chunks from {path}")
+
+def _report_chunks(path: str, domain: str, chunks: list[Chunk]):
+    """Print the per-document chunking summary."""
+    print(f"Created {len(chunks)} chunks from {path}")
     print(f"  Domain: {domain}")
-    print(f"  Doc ID: {doc_id}")
-    print(f"  Chunks: {all_chunks[0].id} to {all_chunks[-1].id}" if all_chunks else "  Chunks: (none)")
+    print(f"  Doc ID: {chunks[0].source_doc}" if chunks else "  Doc ID: (none allocated)")
+    print(f"  Chunks: {chunks[0].id} to {chunks[-1].id}" if chunks else "  Chunks: (none)")
+
+
+def chunk_document(
+    path: str,
+    project_root: str = ".",
+    domain: Optional[str] = None,
+    force: bool = False,
+    batch_size: Optional[int] = None
+) -> list[Chunk]:
+    """
+    Chunk a markdown document into semantic units.
+
+    Args:
+        path: Path to markdown file
+        project_root: Project root directory
+        domain: Optional domain override (auto-detected if not provided)
+        force: Re-chunk even if chunks exist
+        batch_size: Passages per embedding batch (default from config)
+
+    Returns:
+        List of Chunk objects
+    """
+    path = os.path.abspath(path)
+    project_root = os.path.abspath(project_root)
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Document not found: {path}")
+
+    # Auto-detect domain if not provided
+    if domain is None:
+        domain = detect_domain(path)
+
+    # Setup paths
+    chunks_path = Config.get_chunks_path(project_root)
+    domain_path = os.path.join(chunks_path, domain)
+    os.makedirs(domain_path, exist_ok=True)
+    enable_cache(project_root)
+
+    # Parse first; only documents that yield chunks take a doc number
+    all_chunks = build_chunks(path, project_root, domain, 0)
+    if all_chunks:
+        all_chunks = _renumber_chunks(all_chunks, domain, allocate_doc_numbers(project_root, domain))
+
+    # Embed in batches and save
+    save_chunks(all_chunks, project_root, batch_size)
+
+    _report_chunks(path, domain, all_chunks)
 
     return all_chunks
 
 
-def save_chunk(chunk: Chunk, domain_path: str):
-    """Save chunk as .md file with frontmatter and .emb embedding file."""
+def save_chunk(chunk: Chunk, domain_path: str, embedding: Optional[np.ndarray] = None, track: bool = True):
+    """
+    Save chunk as markdown with frontmatter plus its embedding, as .md/.npy
+    files or a segment record depending on CORTEX_CHUNK_STORE.
+
+    If embedding is not provided, the chunk content is embedded on its own.
+    With track, the chunk is also recorded in the catalog and under its
+    source in the manifest; bulk writers pass track=False and record a
+    whole run at once.
+    """
     # Build frontmatter
     frontmatter = f"""---
 id: {chunk.id}
@@ -345,6 +575,7 @@ source_section: "{chunk.source_section}"
 source_lines: [{chunk.source_lines[0]}, {chunk.source_lines[1]}]
 source_path: "{chunk.source_path}"
 source_hash: "{chunk.source_hash}"
+section_hash: "{chunk.section_hash}"
 tokens: {chunk.tokens}
 keywords: {json.dumps(chunk.keywords)}
 created: "{chunk.created}"
@@ -355,22 +586,206 @@ retrieval_count: 0
 {chunk.content}
 """
 
-    # Save markdown file
-    md_path = os.path.join(domain_path, f"{chunk.id}.md")
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(frontmatter)
+    # Generate embedding and save both
+    if embedding is None:
+        embedding = embed_passage(chunk.content)
+    segments.write_chunk(domain_path, chunk.id, frontmatter, embedding)
+
+    if track:
+        # domain_path is {project_root}/.cortex/chunks/{DOMAIN}
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(domain_path))))
+        catalog.upsert_chunks(project_root, [asdict(chunk)])
+        if chunk.source_path and chunk.source_hash:
+            with manifest.edit_manifest(project_root) as sources:
+                manifest.add_chunks(sources, chunk.source_path, chunk.source_hash, [chunk.id])
+
+
+def save_chunks(
+    chunks: list[Chunk],
+    project_root: str = ".",
+    batch_size: Optional[int] = None
+) -> PipelineStats:
+    """
+    Embed chunks in batches and save them.
+
+    Args:
+        chunks: Chunks to save (may span several documents and domains)
+        project_root: Project root directory
+        batch_size: Passages per embedding batch (default from config)
+
+    Returns:
+        Per-stage throughput of the encode/write pipeline
+    """
+    return _ingest([chunks], project_root, batch_size)
 
-    # Generate and save embedding
-    embedding = embed_passage(chunk.content)
-    emb_path = os.path.join(domain_path, f"{chunk.id}.npy")
-    np.save(emb_path, embedding)
+
+def _ingest(documents: Iterable[list[Chunk]], project_root: str, batch_size: Optional[int]) -> PipelineStats:
+    """
+    Stream chunk groups through the encode/write pipeline, then index them.
+
+    documents is consumed by the pipeline's reader thread, so parsing
+    overlaps with encoding of earlier batches and writing of earlier files.
+    """
+    project_root = os.path.abspath(project_root)
+    chunks_path = Config.get_chunks_path(project_root)
+    saved = []
+    by_source = {}  # (source_path, source_hash) -> chunk IDs
+
+    def encode(batch: list[Chunk]) -> np.ndarray:
+        return embed_passages_batch([chunk.content for chunk in batch])
+
+    def write(chunk: Chunk, embedding: np.ndarray):
+        save_chunk(chunk, os.path.join(chunks_path, parse_chunk_id(chunk.id)[1]), embedding, track=False)
+
+    def tracked():
+        for chunks in documents:
+            saved.extend(chunks)
+            for chunk in chunks:
+                by_source.setdefault((chunk.source_path, chunk.source_hash), []).append(chunk.id)
+            yield chunks
+
+    stats = run_pipeline(tracked(), encode, write, batch_size or Config.EMBEDDING_BATCH_SIZE)
+
+    # Make the new chunks retrievable without a full rebuild
+    if saved:
+        update_index(project_root, "chunks", added_ids=[chunk.id for chunk in saved])
+        catalog.upsert_chunks(project_root, (asdict(chunk) for chunk in saved))
+    if by_source:
+        with manifest.edit_manifest(project_root) as sources:
+            for (source_path, source_hash), chunk_ids in by_source.items():
+                if source_path and source_hash:
+                    manifest.add_chunks(sources, source_path, source_hash, chunk_ids)
+    return stats
+
+
+def _parse_document(job: tuple[str, str, str]) -> tuple[list[Chunk], Optional[str]]:
+    """
+    Parse one document under doc number 0 (runs in a pool worker).
+
+    Returns:
+        Tuple of (chunks, error message or None)
+    """
+    file_path, project_root, domain = job
+    try:
+        return build_chunks(file_path, project_root, domain, 0), None
+    except Exception as e:
+        return [], str(e)
+
+
+def _parse_in_window(executor: ProcessPoolExecutor, jobs: list, window: int) -> Iterable:
+    """
+    _parse_document results in job order, with at most window documents
+    submitted ahead of the consumer, so parsed chunks never pile up
+    faster than the ingest pipeline takes them.
+    """
+    pending = deque()
+    remaining = iter(jobs)
+    for job in remaining:
+        pending.append(executor.submit(_parse_document, job))
+        if len(pending) >= window:
+            break
+    while pending:
+        result = pending.popleft().result()
+        for job in remaining:
+            pending.append(executor.submit(_parse_document, job))
+            break
+        yield result
+
+
+def _renumber_chunks(chunks: list[Chunk], domain: str, doc_num: int, first_seq: int = 1) -> list[Chunk]:
+    """Move parsed chunks to their allocated document and sequence numbers."""
+    return [
+        replace(chunk, id=format_chunk_id(domain, doc_num, seq), source_doc=format_doc_id(domain, doc_num))
+        for seq, chunk in enumerate(chunks, first_seq)
+    ]
+
+
+def chunk_files(
+    file_paths: list[str],
+    project_root: str = ".",
+    domain: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None
+) -> list[Chunk]:
+    """
+    Chunk a list of documents.
+
+    Passages are collected across documents and embedded in batches,
+    so small files share encode calls instead of paying for one each.
+    With workers > 1, parsing, token counting and keyword extraction run
+    in a process pool while this process embeds and saves; results are
+    consumed in input order and doc numbers are allocated here, so the
+    output is identical to a serial run.
+
+    Args:
+        file_paths: Documents to chunk, in order
+        project_root: Project root directory
+        domain: Optional domain override for all files
+        batch_size: Passages per embedding batch (default from config)
+        workers: Parsing processes (default from config, 0 = one per CPU)
+
+    Returns:
+        List of all Chunk objects
+    """
+    project_root = os.path.abspath(project_root)
+    chunks_path = Config.get_chunks_path(project_root)
+    batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+    workers = Config.CHUNK_WORKERS if workers is None else workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    enable_cache(project_root)
+
+    jobs = []
+    for file_path in file_paths:
+        file_path = os.path.abspath(file_path)
+        jobs.append((file_path, project_root, domain or detect_domain(file_path)))
+
+    all_chunks = []
+
+    def documents(results):
+        """Number parsed documents in input order (runs in the reader thread)."""
+        for (file_path, _, file_domain), (chunks, error) in zip(jobs, results):
+            if error is not None:
+                print(f"Error chunking {file_path}: {error}")
+                continue
+
+            os.makedirs(os.path.join(chunks_path, file_domain), exist_ok=True)
+
+            # Reserved numbers are safe from other processes before files exist
+            if chunks:
+                chunks = _renumber_chunks(chunks, file_domain, allocate_doc_numbers(project_root, file_domain))
+
+            _report_chunks(file_path, file_domain, chunks)
+            all_chunks.extend(chunks)
+            yield chunks
+
+    executor = None
+    if workers > 1 and len(jobs) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+    try:
+        if executor:
+            results = _parse_in_window(executor, jobs, workers * 2)
+        else:
+            results = map(_parse_document, jobs)
+        stats = _ingest(documents(results), project_root, batch_size)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    if all_chunks:
+        for line in stats.report():
+            print(f"  Pipeline {line}")
+
+    return all_chunks
 
 
 def chunk_directory(
     path: str,
     project_root: str = ".",
     domain: Optional[str] = None,
-    force: bool = False
+    force: bool = False,
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None
 ) -> list[Chunk]:
     """
     Chunk all markdown files in a directory.
@@ -380,24 +795,21 @@ def chunk_directory(
         project_root: Project root directory
         domain: Optional domain override for all files
         force: Re-chunk even if chunks exist
+        batch_size: Passages per embedding batch (default from config)
+        workers: Parsing processes (default from config, 0 = one per CPU)
 
     Returns:
         List of all Chunk objects
     """
     path = os.path.abspath(path)
-    all_chunks = []
 
+    file_paths = []
     for root, _, files in os.walk(path):
         for f in files:
             if f.endswith('.md'):
-                file_path = os.path.join(root, f)
-                try:
-                    chunks = chunk_document(file_path, project_root, domain, force)
-                    all_chunks.extend(chunks)
-                except Exception as e:
-                    print(f"Error chunking {file_path}: {e}")
+                file_paths.append(os.path.join(root, f))
 
-    return all_chunks
+    return chunk_files(file_paths, project_root, domain, batch_size, workers)
 
 
 def compute_file_hash(path: str) -> str:
@@ -418,7 +830,11 @@ def get_stale_chunks(project_root: str = ".") -> list[dict]:
     """
     Find chunks whose source files have changed.
 
-    Returns list of {chunk_id, source_path, stored_hash, current_hash}
+    Reads the source manifest instead of chunk files. A source is only
+    re-hashed when its size or mtime differs from when it was last
+    hashed; the new stat and hash are stored back in the manifest.
+
+    Returns list of {chunk_id, source_path, stored_hash, current_hash, status}
     """
     project_root = os.path.abspath(project_root)
     chunks_path = Config.get_chunks_path(project_root)
@@ -427,60 +843,42 @@ def get_stale_chunks(project_root: str = ".") -> list[dict]:
         return []
 
     stale = []
-    checked_sources = {}  # Cache: source_path -> current_hash
-
-    for domain in os.listdir(chunks_path):
-        domain_path = os.path.join(chunks_path, domain)
-        if not os.path.isdir(domain_path):
-            continue
-
-        for f in os.listdir(domain_path):
-            if not f.endswith('.md'):
-                continue
-
-            chunk_path = os.path.join(domain_path, f)
-            meta = parse_chunk_metadata(chunk_path)
-
-            source_path = meta.get('source_path', '')
-            stored_hash = meta.get('source_hash', '')
-
-            if not source_path or not stored_hash:
-                continue  # Old chunk without provenance data
 
+    with manifest.edit_manifest(project_root) as sources:
+        for source_path, entry in sources.items():
             # Resolve source path relative to project root
             full_source_path = os.path.join(project_root, source_path)
 
-            if not os.path.exists(full_source_path):
-                # Source file deleted - mark as stale
-                stale.append({
-                    'chunk_id': meta.get('id', f.replace('.md', '')),
-                    'source_path': source_path,
-                    'stored_hash': stored_hash,
-                    'current_hash': None,
-                    'status': 'deleted'
-                })
-                continue
-
-            # Get or compute current hash
-            if source_path not in checked_sources:
-                checked_sources[source_path] = compute_file_hash(full_source_path)
-
-            current_hash = checked_sources[source_path]
-
-            if current_hash != stored_hash:
-                stale.append({
-                    'chunk_id': meta.get('id', f.replace('.md', '')),
+            try:
+                stat = os.stat(full_source_path)
+            except FileNotFoundError:
+                current_hash = None  # Source file deleted
+            else:
+                if entry['hash'] is None or (stat.st_size, stat.st_mtime_ns) != (entry['size'], entry['mtime_ns']):
+                    entry['hash'] = compute_file_hash(full_source_path)
+                    entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+                current_hash = entry['hash']
+
+            for stored_hash, chunk_ids in entry['chunks'].items():
+                if stored_hash == current_hash:
+                    continue
+                stale.extend({
+                    'chunk_id': chunk_id,
                     'source_path': source_path,
                     'stored_hash': stored_hash,
                     'current_hash': current_hash,
-                    'status': 'modified'
-                })
+                    'status': 'deleted' if current_hash is None else 'modified'
+                } for chunk_id in chunk_ids)
 
     return stale
 
 
 def get_chunks_by_source(source_path: str, project_root: str = ".") -> list[str]:
-    """Find all chunk IDs that came from a given source file."""
+    """
+    Find all chunk IDs that came from a given source file.
+
+    Answered from the source manifest, so no chunk files are read.
+    """
     project_root = os.path.abspath(project_root)
     chunks_path = Config.get_chunks_path(project_root)
 
@@ -493,55 +891,176 @@ def get_chunks_by_source(source_path: str, project_root: str = ".") -> list[str]
     if not os.path.exists(chunks_path):
         return []
 
-    chunk_ids = []
+    entry = manifest.load_manifest(project_root).get(normalized_source)
+    if not entry:
+        return []
+    return sorted((chunk_id for chunk_ids in entry['chunks'].values() for chunk_id in chunk_ids), key=chunk_id_sort_key)
 
-    for domain in os.listdir(chunks_path):
-        domain_path = os.path.join(chunks_path, domain)
-        if not os.path.isdir(domain_path):
-            continue
 
-        for f in os.listdir(domain_path):
-            if not f.endswith('.md'):
-                continue
+def delete_chunks(chunk_ids: list[str], project_root: str = ".") -> int:
+    """Delete chunks by their IDs. Returns count of deleted chunks."""
+    project_root = os.path.abspath(project_root)
+    chunks_path = Config.get_chunks_path(project_root)
 
-            chunk_path = os.path.join(domain_path, f)
-            meta = parse_chunk_metadata(chunk_path)
+    by_domain = {}
+    for chunk_id in chunk_ids:
+        parsed = parse_chunk_id(chunk_id)
+        if parsed:
+            by_domain.setdefault(parsed[1], []).append(chunk_id)
 
-            chunk_source = meta.get('source_path', '')
+    deleted_ids = []
+    for domain, domain_ids in by_domain.items():
+        deleted_ids.extend(segments.remove_chunks(os.path.join(chunks_path, domain), domain_ids))
 
-            # Compare normalized paths
-            if chunk_source == normalized_source:
-                chunk_ids.append(meta.get('id', f.replace('.md', '')))
+    # Tombstone deleted chunks in the index
+    update_index(project_root, "chunks", removed_ids=deleted_ids)
+    if chunk_ids:
+        catalog.remove_chunks(project_root, chunk_ids)
+        with manifest.edit_manifest(project_root) as sources:
+            manifest.remove_chunks(sources, chunk_ids)
 
-    return chunk_ids
+    return len(deleted_ids)
 
 
-def delete_chunks(chunk_ids: list[str], project_root: str = ".") -> int:
-    """Delete chunks by their IDs. Returns count of deleted chunks."""
-    project_root = os.path.abspath(project_root)
-    chunks_path = Config.get_chunks_path(project_root)
+@dataclass
+class RefreshResult:
+    """Outcome of refresh_document()."""
+    kept: list[str]       # Chunk IDs of unchanged sections (embeddings reused)
+    added: list[Chunk]    # Chunks of added or modified sections
+    removed: list[str]    # Chunk IDs of sections that changed or disappeared
 
-    deleted = 0
 
-    for chunk_id in chunk_ids:
-        parsed = parse_chunk_id(chunk_id)
-        if not parsed:
-            continue
+def _chunk_domain_path(chunks_path: str, chunk_id: str) -> str:
+    return os.path.join(chunks_path, parse_chunk_id(chunk_id)[1])
+
 
-        domain = parsed[1]
-        domain_path = os.path.join(chunks_path, domain)
+def _rewrite_provenance(content: str, source_lines: tuple[int, int], source_path: str, source_hash: str) -> str:
+    """Point a kept chunk's markdown at the refreshed source, leaving content and tracking fields alone."""
+    end_idx = content.find('---', 3)
+    frontmatter, body = content[:end_idx], content[end_idx:]
+    fields = {
+        'source_lines': f"[{source_lines[0]}, {source_lines[1]}]",
+        'source_path': f'"{source_path}"',
+        'source_hash': f'"{source_hash}"',
+    }
+    for key, value in fields.items():
+        frontmatter = re.sub(rf'^{key}: .*$', lambda _: f"{key}: {value}", frontmatter, count=1, flags=re.M)
+    return frontmatter + body
 
-        md_path = os.path.join(domain_path, f"{chunk_id}.md")
-        npy_path = os.path.join(domain_path, f"{chunk_id}.npy")
 
-        if os.path.exists(md_path):
-            os.remove(md_path)
-            deleted += 1
+def refresh_document(
+    path: str,
+    project_root: str = ".",
+    domain: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> RefreshResult:
+    """
+    Re-chunk a changed document, re-embedding only changed sections.
 
-        if os.path.exists(npy_path):
-            os.remove(npy_path)
+    The new sections are diffed against the section_hash of the existing
+    chunks. Chunks of unchanged sections keep their IDs, embeddings and
+    retrieval history; only their line range and source hash are
+    updated. Added or modified sections are chunked under the same doc
+    number with fresh sequence numbers, and chunks of modified or removed
+    sections are deleted. A document without chunks, or a domain override
+    that differs from the existing chunks, is chunked from scratch.
 
-    return deleted
+    Args:
+        path: Path to markdown file
+        project_root: Project root directory
+        domain: Optional domain override (existing chunks' domain if not provided)
+        batch_size: Passages per embedding batch (default from config)
+
+    Returns:
+        RefreshResult with kept, added and removed chunks
+    """
+    path = os.path.abspath(path)
+    project_root = os.path.abspath(project_root)
+    chunks_path = Config.get_chunks_path(project_root)
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Document not found: {path}")
+
+    old_ids = [chunk_id for chunk_id in get_chunks_by_source(path, project_root) if parse_chunk_id(chunk_id)]
+    docs = Counter(parse_chunk_id(chunk_id)[1:3] for chunk_id in old_ids)
+    if not docs or (domain is not None and domain not in {d for d, _ in docs}):
+        delete_chunks(old_ids, project_root)
+        return RefreshResult(kept=[], added=chunk_document(path, project_root, domain, batch_size=batch_size), removed=old_ids)
+
+    # Keep the document number most of the old chunks live under
+    domain, doc_num = max(docs, key=lambda doc: (doc[0] == domain, docs[doc]))
+    doc_num = int(doc_num)
+
+    # Group old chunks by the section occurrence they came from
+    groups = {}  # (section_hash, source_lines) -> chunk IDs
+    markdowns = {}
+    metas = {}
+    removed = []
+    for chunk_id in old_ids:
+        loaded = segments.read_chunk(_chunk_domain_path(chunks_path, chunk_id), chunk_id, embedding=False)
+        if loaded is None:
+            removed.append(chunk_id)  # Deleted behind the manifest's back
+            continue
+        markdowns[chunk_id] = loaded[0]
+        meta = metas[chunk_id] = parse_frontmatter(loaded[0])
+        if not meta.get('section_hash'):
+            removed.append(chunk_id)  # Written before section hashes existed
+            continue
+        key = (meta['section_hash'], tuple(meta.get('source_lines') or (0, 0)))
+        groups.setdefault(key, []).append(chunk_id)
+
+    by_hash = {}  # section_hash -> [chunk IDs per occurrence, in document order]
+    for (content_hash, _), chunk_ids in sorted(groups.items(), key=lambda item: item[0][1]):
+        by_hash.setdefault(content_hash, []).append(sorted(chunk_ids, key=chunk_id_sort_key))
+
+    content, source_path, source_hash = _read_source(path, project_root)
+    kept = []
+    moved = []  # Kept chunks whose provenance changed
+    moved_metas = []
+    changed = []
+    for section in parse_sections(content):
+        if not section['content'].strip():
+            continue
+        occurrences = by_hash.get(section_hash(section))
+        if not occurrences:
+            changed.append(section)
+            continue
+        source_lines = (section['start_line'], section['end_line'])
+        for chunk_id in occurrences.pop(0):
+            meta = metas[chunk_id]
+            if (meta.get('source_hash'), meta.get('source_path'), tuple(meta.get('source_lines') or ())) \
+                    != (source_hash, source_path, source_lines):
+                markdown = _rewrite_provenance(markdowns[chunk_id], source_lines, source_path, source_hash)
+                segments.rewrite_markdown(_chunk_domain_path(chunks_path, chunk_id), chunk_id, markdown)
+                moved_metas.append(parse_frontmatter(markdown))
+                moved.append(chunk_id)
+            kept.append(chunk_id)
+
+    for occurrences in by_hash.values():
+        for chunk_ids in occurrences:
+            removed.extend(chunk_ids)
+
+    added = _chunk_sections(changed, domain, doc_num, 1, source_path, source_hash)
+    if added:
+        highest = max(int(parse_chunk_id(chunk_id)[3]) for chunk_id in old_ids)
+        first_seq = allocate_chunk_seqs(project_root, domain, doc_num, len(added), floor=highest)
+        added = _renumber_chunks(added, domain, doc_num, first_seq)
+
+    if removed:
+        delete_chunks(removed, project_root)
+    update_index(project_root, "chunks", added_ids=moved)
+    catalog.upsert_chunks(project_root, moved_metas)
+    with manifest.edit_manifest(project_root) as sources:
+        manifest.add_chunks(sources, source_path, source_hash, kept)
+    if added:
+        enable_cache(project_root)
+        save_chunks(added, project_root, batch_size)
+
+    print(f"Refreshed {path}")
+    print(f"  Doc ID: {format_doc_id(domain, doc_num)}")
+    print(f"  Kept: {len(kept)}, re-chunked: {len(added)} (from {len(changed)} sections), removed: {len(removed)}")
+
+    return RefreshResult(kept=kept, added=added, removed=removed)
 
 
 # CLI entry point
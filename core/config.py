@@ -18,15 +18,51 @@ class Config:
     # Embedding
     EMBEDDING_MODEL = os.getenv("CORTEX_EMBEDDING_MODEL", "intfloat/e5-small-v2")
     EMBEDDING_DIMENSIONS = 384  # Fixed for e5-small-v2
+    EMBEDDING_MAX_TOKENS = 512  # Longer inputs are truncated by the model
+    EMBEDDING_BATCH_SIZE = int(os.getenv("CORTEX_EMBEDDING_BATCH_SIZE", "256"))  # Passages per embed call during chunking
+    EMBEDDING_BATCH_TOKENS = int(os.getenv("CORTEX_EMBEDDING_BATCH_TOKENS", "8192"))  # Padded tokens per model batch
+    EMBEDDING_DTYPE = os.getenv("CORTEX_EMBEDDING_DTYPE", "float32")  # Stored precision: float32, float16 or int8
+    EMBEDDING_BACKEND = os.getenv("CORTEX_EMBEDDING_BACKEND", "torch")  # torch, onnx or onnx-int8
+    ONNX_DIR = os.getenv("CORTEX_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cortex", "onnx"))
+
+    # Embedding cache (content-addressed, LRU-evicted)
+    EMBEDDING_CACHE_ENABLED = os.getenv("CORTEX_EMBEDDING_CACHE", "1") != "0"
+    EMBEDDING_CACHE_SIZE = int(os.getenv("CORTEX_EMBEDDING_CACHE_SIZE", "50000"))  # Max entries
 
     # Chunking
     CHUNK_SIZE = int(os.getenv("CORTEX_CHUNK_SIZE", "500"))      # Max tokens per chunk
     CHUNK_MIN = int(os.getenv("CORTEX_CHUNK_MIN", "50"))         # Min tokens per chunk
     CHUNK_OVERLAP = int(os.getenv("CORTEX_CHUNK_OVERLAP", "50")) # Overlap tokens
+    CHUNK_STRATEGY = os.getenv("CORTEX_CHUNK_STRATEGY", "greedy")  # greedy | content (edit-stable cut points)
+    CHUNK_WORKERS = int(os.getenv("CORTEX_CHUNK_WORKERS", "1"))  # Parsing processes (0 = one per CPU)
+    ID_DIGITS = int(os.getenv("CORTEX_ID_DIGITS", "3"))  # Min digits of doc/chunk numbers in IDs
+    PIPELINE_QUEUE_BATCHES = int(os.getenv("CORTEX_PIPELINE_QUEUE_BATCHES", "4"))  # Queue capacity between ingest stages
+    PIPELINE_WRITERS = int(os.getenv("CORTEX_PIPELINE_WRITERS", "2"))  # Threads writing .md/.npy files
+    CHUNK_STORE = os.getenv("CORTEX_CHUNK_STORE", "files")  # files (.md/.npy per chunk) | segments (one log per domain)
+    SEGMENT_COMPACT_RATIO = float(os.getenv("CORTEX_SEGMENT_COMPACT_RATIO", "0.5"))  # Dead fraction of a segment log that triggers compaction
+    SEGMENT_COMPACT_MIN_BYTES = int(os.getenv("CORTEX_SEGMENT_COMPACT_MIN_BYTES", "1048576"))  # ...once the log is this large
 
     # Retrieval
     RETRIEVAL_TOP_K = int(os.getenv("CORTEX_RETRIEVAL_TOP_K", "10"))
     MEMORY_TOP_K = int(os.getenv("CORTEX_MEMORY_TOP_K", "5"))
+    QUERY_CACHE_SIZE = int(os.getenv("CORTEX_QUERY_CACHE_SIZE", "256"))  # Query embeddings kept per process
+    RETRIEVAL_QUERY_BLOCK = int(os.getenv("CORTEX_RETRIEVAL_QUERY_BLOCK", "256"))  # Queries per matrix product in retrieve_many
+    BM25_K1 = float(os.getenv("CORTEX_BM25_K1", "1.2"))  # Term-frequency saturation of the keyword score
+    BM25_B = float(os.getenv("CORTEX_BM25_B", "0.75"))  # Document-length normalization (0 = none)
+    BM25_CANDIDATES = int(os.getenv("CORTEX_BM25_CANDIDATES", "200"))  # Best keyword rows added to ANN candidates
+
+    # Approximate nearest-neighbour search
+    ANN_ENABLED = os.getenv("CORTEX_ANN", "1") != "0"
+    ANN_BACKEND = os.getenv("CORTEX_ANN_BACKEND", "hnsw")  # hnsw, ivfpq or binary (sign-bit prefilter, opt-in)
+    ANN_MIN_ITEMS = int(os.getenv("CORTEX_ANN_MIN_ITEMS", "20000"))  # Brute force below this size
+    HNSW_M = int(os.getenv("CORTEX_HNSW_M", "16"))  # Links per node (2*M on layer 0)
+    HNSW_EF_CONSTRUCTION = int(os.getenv("CORTEX_HNSW_EF_CONSTRUCTION", "100"))
+    HNSW_EF_SEARCH = int(os.getenv("CORTEX_HNSW_EF_SEARCH", "128"))  # Candidates scored per query
+    IVF_NLIST = int(os.getenv("CORTEX_IVF_NLIST", "0"))  # Coarse lists (0 = about 2*sqrt(items))
+    IVF_NPROBE = int(os.getenv("CORTEX_IVF_NPROBE", "16"))  # Lists scanned per query
+    IVF_RERANK = int(os.getenv("CORTEX_IVF_RERANK", "128"))  # Candidates re-ranked exactly per query
+    PQ_SUBVECTORS = int(os.getenv("CORTEX_PQ_SUBVECTORS", "48"))  # One-byte codes per vector
+    BINARY_RERANK = int(os.getenv("CORTEX_BINARY_RERANK", "200"))  # Hamming shortlist re-ranked exactly
 
     # Scoring weights
     SCORE_SEMANTIC = 0.6
@@ -34,15 +70,32 @@ class Config:
     SCORE_RECENCY = 0.1
     SCORE_FREQUENCY = 0.1
 
+    # Index maintenance
+    INDEX_AUTO_UPDATE = os.getenv("CORTEX_INDEX_AUTO_UPDATE", "1") != "0"  # Writes update indices
+    INDEX_COMPACT_MIN = int(os.getenv("CORTEX_INDEX_COMPACT_MIN", "256"))  # Delta ops before compaction
+    INDEX_COMPACT_RATIO = float(os.getenv("CORTEX_INDEX_COMPACT_RATIO", "0.25"))  # ...or this fraction of base
+    INDEX_MMAP_MIN_BYTES = int(os.getenv("CORTEX_INDEX_MMAP_MIN_BYTES", "1048576"))  # Memory-map larger indices
+
     # Token budget
     TOKEN_BUDGET = int(os.getenv("CORTEX_TOKEN_BUDGET", "15000"))
 
+    # Server (cortex serve)
+    SERVER_ENABLED = os.getenv("CORTEX_SERVER", "1") != "0"  # CLI uses a running server
+    SERVER_HOST = os.getenv("CORTEX_SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("CORTEX_SERVER_PORT", "0"))  # 0 = pick a free port
+    SERVER_TIMEOUT = float(os.getenv("CORTEX_SERVER_TIMEOUT", "60"))  # Seconds per request
+
     # Paths (relative to project root)
     CORTEX_DIR = ".cortex"
     CHUNKS_DIR = "chunks"
     MEMORIES_DIR = "memories"
     INDEX_DIR = "index"
     CACHE_DIR = "cache"
+    EMBEDDINGS_CACHE_DIR = "embeddings"
+    SERVER_FILE = "server.json"
+    MANIFEST_FILE = "manifest.json"
+    IDS_FILE = "ids.json"
+    CATALOG_FILE = "catalog.db"
 
     @classmethod
     def get_cortex_path(cls, project_root: str) -> str:
@@ -59,6 +112,31 @@ class Config:
         """Get full path to index directory."""
         return os.path.join(project_root, cls.CORTEX_DIR, cls.INDEX_DIR)
 
+    @classmethod
+    def get_embeddings_cache_path(cls, project_root: str) -> str:
+        """Get full path to the embedding cache directory."""
+        return os.path.join(project_root, cls.CORTEX_DIR, cls.CACHE_DIR, cls.EMBEDDINGS_CACHE_DIR)
+
+    @classmethod
+    def get_server_file(cls, project_root: str) -> str:
+        """Get full path to the server discovery file."""
+        return os.path.join(project_root, cls.CORTEX_DIR, cls.SERVER_FILE)
+
+    @classmethod
+    def get_manifest_file(cls, project_root: str) -> str:
+        """Get full path to the source manifest."""
+        return os.path.join(project_root, cls.CORTEX_DIR, cls.MANIFEST_FILE)
+
+    @classmethod
+    def get_ids_file(cls, project_root: str) -> str:
+        """Get full path to the doc/chunk ID counters."""
+        return os.path.join(project_root, cls.CORTEX_DIR, cls.IDS_FILE)
+
+    @classmethod
+    def get_catalog_file(cls, project_root: str) -> str:
+        """Get full path to the SQLite metadata catalog."""
+        return os.path.join(project_root, cls.CORTEX_DIR, cls.CATALOG_FILE)
+
     @classmethod
     def get_venv_python(cls, engine_root: str) -> str:
         """Get path to the venv Python interpreter."""
@@ -3,11 +3,20 @@ Cortex Embedder
 
 Embedding wrapper for e5-small-v2 model with lazy loading.
 Handles the e5 prefix requirements for queries vs passages.
+The model runs on sentence-transformers (PyTorch) or, with
+CORTEX_EMBEDDING_BACKEND=onnx / onnx-int8, on onnxruntime.
+Passage embeddings are served from the project's embedding cache when one
+is attached (see enable_cache).
 """
 
+import os
 import numpy as np
-from typing import Union
+from typing import Optional, Union
 from .config import Config
+from .cache import EmbeddingCache
+
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
 
 
 class Embedder:
@@ -21,6 +30,7 @@ class Embedder:
 
     _instance = None
     _model = None
+    _cache = None
 
     def __new__(cls):
         """Singleton pattern for model reuse."""
@@ -30,12 +40,47 @@ class Embedder:
 
     @property
     def model(self):
-        """Lazy load the embedding model."""
+        """
+        Lazy load the embedding model for the configured backend.
+
+        Raises:
+            ValueError: If CORTEX_EMBEDDING_BACKEND is not a known backend
+        """
         if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
+            backend = Config.EMBEDDING_BACKEND
+            if backend not in EMBEDDING_BACKENDS:
+                raise ValueError(
+                    f"Unknown embedding backend: {backend} (expected torch, onnx or onnx-int8)"
+                )
+            if backend == "torch":
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(Config.EMBEDDING_MODEL)
+            else:
+                from .onnx_encoder import OnnxEncoder
+                self._model = OnnxEncoder.load(Config.EMBEDDING_MODEL, quantized=backend == "onnx-int8")
         return self._model
 
+    @property
+    def model_key(self) -> str:
+        """
+        Model identity for the embedding cache.
+
+        The int8-quantized ONNX model produces slightly different vectors,
+        so its cache entries are kept apart; fp32 ONNX matches PyTorch.
+        """
+        if Config.EMBEDDING_BACKEND == "onnx-int8":
+            return f"{Config.EMBEDDING_MODEL}#int8"
+        return Config.EMBEDDING_MODEL
+
+    @property
+    def cache(self) -> Optional[EmbeddingCache]:
+        """The attached passage embedding cache, if any."""
+        return self._cache
+
+    def set_cache(self, cache: Optional[EmbeddingCache]):
+        """Attach (or detach with None) a passage embedding cache."""
+        self._cache = cache
+
     def embed_query(self, text: str) -> np.ndarray:
         """
         Embed a search query.
@@ -51,6 +96,21 @@ class Embedder:
         embedding = self.model.encode(prefixed, normalize_embeddings=True)
         return np.array(embedding, dtype=np.float32)
 
+    def embed_queries_batch(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed multiple search queries in one encode call.
+
+        Args:
+            texts: List of query texts
+
+        Returns:
+            Array of shape (n, 384) with embeddings
+        """
+        if not texts:
+            return np.zeros((0, Config.EMBEDDING_DIMENSIONS), dtype=np.float32)
+        prefixed = [f"query: {text}" for text in texts]
+        return self._encode_bucketed(prefixed)
+
     def embed_passage(self, text: str) -> np.ndarray:
         """
         Embed a document passage.
@@ -63,8 +123,7 @@ class Embedder:
         """
         # e5 requires "passage: " prefix for documents
         prefixed = f"passage: {text}"
-        embedding = self.model.encode(prefixed, normalize_embeddings=True)
-        return np.array(embedding, dtype=np.float32)
+        return self._encode_passages([prefixed])[0]
 
     def embed_passages_batch(self, texts: list[str]) -> np.ndarray:
         """
@@ -78,8 +137,89 @@ class Embedder:
         """
         # Add prefix to each passage
         prefixed = [f"passage: {text}" for text in texts]
-        embeddings = self.model.encode(prefixed, normalize_embeddings=True)
-        return np.array(embeddings, dtype=np.float32)
+        return self._encode_passages(prefixed)
+
+    def _encode_passages(self, prefixed: list[str]) -> np.ndarray:
+        """
+        Encode prefixed passages, consulting the cache first.
+
+        Only cache misses are sent to the model, in a single encode call.
+        """
+        if not prefixed:
+            return np.zeros((0, Config.EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+        cache = self._cache
+        if cache is None:
+            return self._encode_bucketed(prefixed)
+
+        result = np.zeros((len(prefixed), Config.EMBEDDING_DIMENSIONS), dtype=np.float32)
+        keys = [EmbeddingCache.make_key(self.model_key, text) for text in prefixed]
+
+        missing = []
+        for i, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is not None and cached.shape == (Config.EMBEDDING_DIMENSIONS,):
+                result[i] = cached
+            else:
+                missing.append(i)
+
+        if missing:
+            embeddings = self._encode_bucketed([prefixed[i] for i in missing])
+            for i, embedding in zip(missing, embeddings):
+                result[i] = embedding
+                cache.put(keys[i], embedding)
+
+        return result
+
+    def _encode_bucketed(self, prefixed: list[str]) -> np.ndarray:
+        """
+        Encode texts in length-sorted batches under a padded-token budget.
+
+        Each batch is padded to its longest member, so texts are sorted by
+        token count and packed until batch size x longest length would
+        exceed EMBEDDING_BATCH_TOKENS. Results come back in input order.
+
+        The ONNX encoder tokenizes once and its token IDs are fed straight
+        to the session. sentence-transformers models only take text, so
+        their lengths come from a separate pass of the model's fast
+        tokenizer; models without a tokenizer fall back to a
+        4-characters-per-token estimate.
+        """
+        result = np.zeros((len(prefixed), Config.EMBEDDING_DIMENSIONS), dtype=np.float32)
+        if not prefixed:
+            return result
+
+        model = self.model
+        token_ids = model.tokenize(prefixed) if hasattr(model, 'encode_ids') else None
+        tokenizer = getattr(model, 'tokenizer', None)
+        if token_ids is not None:
+            lengths = np.array([len(ids) for ids in token_ids])
+        elif callable(tokenizer):
+            encoded = tokenizer(prefixed, truncation=True, max_length=Config.EMBEDDING_MAX_TOKENS)
+            lengths = np.array([len(ids) for ids in encoded['input_ids']])
+        else:
+            lengths = np.array([len(text) // 4 + 2 for text in prefixed])
+        lengths = np.minimum(lengths, Config.EMBEDDING_MAX_TOKENS)
+        order = np.argsort(-lengths, kind='stable')
+        budget = max(1, Config.EMBEDDING_BATCH_TOKENS)
+
+        start = 0
+        while start < len(order):
+            longest = max(1, int(lengths[order[start]]))
+            size = max(1, budget // longest)
+            batch = order[start:start + size]
+            if token_ids is not None:
+                embeddings = model.encode_ids([token_ids[i] for i in batch], normalize_embeddings=True)
+            else:
+                embeddings = model.encode(
+                    [prefixed[i] for i in batch],
+                    batch_size=len(batch),
+                    normalize_embeddings=True
+                )
+            result[batch] = np.asarray(embeddings, dtype=np.float32)
+            start += len(batch)
+
+        return result
 
     def similarity(self, query_emb: np.ndarray, passage_embs: np.ndarray) -> np.ndarray:
         """
@@ -109,11 +249,35 @@ def get_embedder() -> Embedder:
     return _embedder
 
 
+def enable_cache(project_root: str):
+    """
+    Attach the persistent embedding cache for a project.
+
+    The cache lives under .cortex/cache/embeddings and is shared by every
+    passage embedding call made through the singleton embedder.
+    Disabled when CORTEX_EMBEDDING_CACHE=0.
+    """
+    embedder = get_embedder()
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        embedder.set_cache(None)
+        return
+
+    cache_dir = Config.get_embeddings_cache_path(os.path.abspath(project_root))
+    if embedder.cache is not None and embedder.cache.cache_dir == cache_dir:
+        return
+    embedder.set_cache(EmbeddingCache(cache_dir, Config.EMBEDDING_CACHE_SIZE))
+
+
 def embed_query(text: str) -> np.ndarray:
     """Embed a search query."""
     return get_embedder().embed_query(text)
 
 
+def embed_queries_batch(texts: list[str]) -> np.ndarray:
+    """Embed multiple search queries in a batch."""
+    return get_embedder().embed_queries_batch(texts)
+
+
 def embed_passage(text: str) -> np.ndarray:
     """Embed a document passage."""
     return get_embedder().embed_passage(text)
@@ -0,0 +1,126 @@
+"""
+Cortex ID Allocator
+
+Hands out document numbers per domain, and chunk sequence numbers per
+document, from counters in .cortex/ids.json:
+
+    {"version": 1,
+     "docs": {DOMAIN: next doc number},
+     "chunks": {"DOMAIN-DOC": next chunk sequence}}
+
+Every allocation is a read-increment-write under a cross-process lock,
+so concurrent chunking processes never hand out the same number and no
+allocation lists the chunks directory. A domain's counter is seeded
+once from the highest doc number on disk, so projects chunked before
+the allocator existed continue where they left off.
+
+Numbers are zero-padded to CORTEX_ID_DIGITS (default 3). Larger numbers
+just get longer; parse_chunk_id() reads IDs of any width, and code that
+orders chunk IDs sorts them numerically with chunk_id_sort_key().
+"""
+
+import os
+import json
+
+from .config import Config
+from .segments import chunk_ids
+from .utils import file_lock, parse_chunk_id
+
+
+VERSION = 1
+
+
+def format_doc_id(domain: str, doc_num: int) -> str:
+    """DOC-{DOMAIN}-{DOC} with the configured padding."""
+    return f"DOC-{domain}-{doc_num:0{Config.ID_DIGITS}d}"
+
+
+def format_chunk_id(domain: str, doc_num: int, seq: int) -> str:
+    """CHK-{DOMAIN}-{DOC}-{SEQ} with the configured padding."""
+    return f"CHK-{domain}-{doc_num:0{Config.ID_DIGITS}d}-{seq:0{Config.ID_DIGITS}d}"
+
+
+def get_next_doc_number(chunks_path: str, domain: str) -> int:
+    """Next document number for a domain by scanning its chunks (seeds the allocator)."""
+    domain_path = os.path.join(chunks_path, domain)
+    if not os.path.exists(domain_path):
+        return 1
+
+    # Find existing doc numbers
+    existing = set()
+    for chunk_id in chunk_ids(domain_path):
+        parsed = parse_chunk_id(chunk_id)
+        if parsed:
+            try:
+                existing.add(int(parsed[2]))
+            except ValueError:
+                pass
+
+    if not existing:
+        return 1
+    return max(existing) + 1
+
+
+def _read_counters(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == VERSION:
+            return data
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {'version': VERSION, 'docs': {}, 'chunks': {}}
+
+
+def _write_counters(path: str, data: dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def allocate_doc_numbers(project_root: str, domain: str, count: int = 1) -> int:
+    """
+    Reserve count consecutive document numbers in a domain.
+
+    Returns:
+        The first reserved number
+    """
+    path = Config.get_ids_file(project_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with file_lock(f"{path}.lock"):
+        data = _read_counters(path)
+        first = data['docs'].get(domain)
+        if first is None:
+            first = get_next_doc_number(Config.get_chunks_path(project_root), domain)
+        data['docs'][domain] = first + count
+        _write_counters(path, data)
+    return first
+
+
+def allocate_chunk_seqs(project_root: str, domain: str, doc_num: int, count: int, floor: int = 0) -> int:
+    """
+    Reserve count consecutive chunk sequence numbers in a document.
+
+    Args:
+        project_root: Project root directory
+        domain: Domain of the document
+        doc_num: Document number
+        count: Sequence numbers to reserve
+        floor: Highest sequence number the caller knows is taken (seeds
+            documents the allocator has not numbered chunks for yet)
+
+    Returns:
+        The first reserved sequence number
+    """
+    path = Config.get_ids_file(project_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    key = f"{domain}-{doc_num}"
+
+    with file_lock(f"{path}.lock"):
+        data = _read_counters(path)
+        first = max(data['chunks'].get(key, 1), floor + 1)
+        data['chunks'][key] = first + count
+        _write_counters(path, data)
+    return first
@@ -0,0 +1,200 @@
+"""
+Cortex Index File Format
+
+Versioned single-file container for a vector index ({type}.cidx):
+
+    [header: 64 bytes]
+    [embedding matrix: rows x dim, contiguous, 64-byte aligned]
+    [int8 only: row scales, rows x float32, 64-byte aligned]
+    [ID offset table: (rows + 1) x uint64, offsets into the ID blob]
+    [ID blob: UTF-8 IDs concatenated]
+
+The header alone is enough to report counts and shapes, and the matrix
+can be memory-mapped read-only so queries only touch the pages they need
+and concurrent processes share the page cache.
+
+Version 2 added float16 and per-row-scaled int8 matrices; version 1
+files (float32 only) have the same layout and are still read.
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+
+MAGIC = b'CTXIDX\0\0'
+VERSION = 2
+
+# magic, version, dtype code, rows, dim, reserved,
+# matrix offset, ID table offset, ID blob offset, ID blob size
+HEADER_FORMAT = '<8sIIQIIQQQQ'
+HEADER_SIZE = 64
+ALIGNMENT = 64
+
+DTYPE_CODES = {0: np.dtype('<f4'), 1: np.dtype('<f2'), 2: np.dtype('i1')}
+DTYPE_LOOKUP = {dtype: code for code, dtype in DTYPE_CODES.items()}
+
+
+@dataclass
+class IndexHeader:
+    """Fixed-size header of a .cidx file."""
+    version: int
+    dtype: np.dtype
+    rows: int
+    dim: int
+    matrix_offset: int
+    ids_offset: int
+    blob_offset: int
+    blob_size: int
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (self.rows, self.dim)
+
+    @property
+    def scales_offset(self) -> Optional[int]:
+        """Offset of the int8 row scales, or None for float matrices."""
+        if self.dtype.kind != 'i':
+            return None
+        return _align(self.matrix_offset + self.rows * self.dim * self.dtype.itemsize)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_index_file(path: str, embeddings: np.ndarray, ids: list[str], scales: Optional[np.ndarray] = None):
+    """
+    Write embeddings and their IDs to a .cidx file atomically.
+
+    float16 and int8 matrices are stored as-is; other dtypes are written
+    as float32. int8 matrices need their per-row float32 scales.
+
+    Raises:
+        ValueError: If the embedding rows, scales and IDs do not line up
+    """
+    dtype = np.dtype(embeddings.dtype)
+    if dtype not in DTYPE_LOOKUP:
+        dtype = np.dtype('<f4')
+    embeddings = np.ascontiguousarray(embeddings, dtype=dtype)
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(ids):
+        raise ValueError(f"Expected {len(ids)} embedding rows, got shape {embeddings.shape}")
+    if dtype.kind == 'i':
+        if scales is None or len(scales) != len(ids):
+            raise ValueError(f"int8 index needs {len(ids)} row scales")
+        scales = np.ascontiguousarray(scales, dtype='<f4')
+
+    rows, dim = embeddings.shape
+    encoded_ids = [item_id.encode('utf-8') for item_id in ids]
+    offsets = np.zeros(rows + 1, dtype='<u8')
+    if rows:
+        offsets[1:] = np.cumsum([len(b) for b in encoded_ids])
+    blob = b''.join(encoded_ids)
+
+    matrix_offset = _align(HEADER_SIZE)
+    matrix_end = matrix_offset + embeddings.nbytes
+    if dtype.kind == 'i':
+        scales_offset = _align(matrix_end)
+        matrix_end = scales_offset + scales.nbytes
+    ids_offset = _align(matrix_end)
+    blob_offset = ids_offset + offsets.nbytes
+
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, VERSION, DTYPE_LOOKUP[dtype], rows, dim, 0,
+        matrix_offset, ids_offset, blob_offset, len(blob)
+    )
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(matrix_offset, b'\0'))
+        f.write(embeddings.tobytes())
+        if dtype.kind == 'i':
+            f.write(b'\0' * (scales_offset - matrix_offset - embeddings.nbytes))
+            f.write(scales.tobytes())
+        f.write(b'\0' * (ids_offset - f.tell()))
+        f.write(offsets.tobytes())
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def read_index_header(path: str) -> IndexHeader:
+    """
+    Read only the header of a .cidx file.
+
+    Raises:
+        ValueError: If the file is not a supported .cidx file
+    """
+    with open(path, 'rb') as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < struct.calcsize(HEADER_FORMAT):
+        raise ValueError(f"Truncated index file: {path}")
+
+    (magic, version, dtype_code, rows, dim, _,
+     matrix_offset, ids_offset, blob_offset, blob_size) = struct.unpack_from(HEADER_FORMAT, raw)
+
+    if magic != MAGIC:
+        raise ValueError(f"Not a Cortex index file: {path}")
+    if version > VERSION:
+        raise ValueError(f"Unsupported index version {version} (max {VERSION}): {path}")
+    if dtype_code not in DTYPE_CODES:
+        raise ValueError(f"Unknown embedding dtype code {dtype_code}: {path}")
+
+    return IndexHeader(
+        version=version,
+        dtype=DTYPE_CODES[dtype_code],
+        rows=rows,
+        dim=dim,
+        matrix_offset=matrix_offset,
+        ids_offset=ids_offset,
+        blob_offset=blob_offset,
+        blob_size=blob_size
+    )
+
+
+def read_index_ids(path: str, header: IndexHeader = None) -> list[str]:
+    """Read the ID table of a .cidx file without touching the matrix."""
+    header = header or read_index_header(path)
+    with open(path, 'rb') as f:
+        f.seek(header.ids_offset)
+        offsets = np.frombuffer(f.read((header.rows + 1) * 8), dtype='<u8')
+        f.seek(header.blob_offset)
+        blob = f.read(header.blob_size)
+    return [
+        blob[offsets[i]:offsets[i + 1]].decode('utf-8')
+        for i in range(header.rows)
+    ]
+
+
+def open_index_matrix(path: str, header: IndexHeader = None, mmap: bool = True) -> np.ndarray:
+    """
+    Open the embedding matrix of a .cidx file.
+
+    With mmap=True the matrix is memory-mapped read-only; otherwise it is
+    read into a private in-memory array.
+    """
+    header = header or read_index_header(path)
+    if header.rows == 0:
+        return np.zeros((0, header.dim), dtype=header.dtype)
+
+    if mmap:
+        return np.memmap(
+            path, dtype=header.dtype, mode='r',
+            offset=header.matrix_offset, shape=header.shape
+        )
+
+    with open(path, 'rb') as f:
+        f.seek(header.matrix_offset)
+        data = f.read(header.rows * header.dim * header.dtype.itemsize)
+    return np.frombuffer(data, dtype=header.dtype).reshape(header.shape)
+
+
+def open_index_scales(path: str, header: IndexHeader = None) -> Optional[np.ndarray]:
+    """Read the per-row scales of an int8 .cidx matrix (None for float matrices)."""
+    header = header or read_index_header(path)
+    if header.scales_offset is None:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(header.scales_offset)
+        return np.frombuffer(f.read(header.rows * 4), dtype='<f4')
@@ -2,23 +2,45 @@
 Cortex Indexer
 
 Build and manage vector indices for chunks and memories.
+
+Each index is a consolidated base ({type}.cidx plus {type}.meta.json)
+and an append-only delta log ({type}.delta.jsonl) of added and
+tombstoned items, folded back into the base by compaction. Large bases
+also get an ANN index for approximate search: an HNSW graph
+({type}.hnsw.npz), an IVF-PQ index ({type}.ivfpq.npz) or sign-bit
+codes for a Hamming prefilter ({type}.binary.npz). Every base has a
+BM25 inverted index over its items' full text ({type}.lex.npz); delta
+log entries carry their items' term counts so it can be merged forward.
 """
 
 import os
 import json
+import time
+import base64
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Union
 import numpy as np
 
 from .config import Config
-from .utils import parse_frontmatter
+from .utils import parse_frontmatter, parse_chunk_id, file_lock
+from .index_format import (
+    write_index_file, read_index_header, read_index_ids, open_index_matrix, open_index_scales
+)
+from .quantization import EmbeddingMatrix, OverlayMatrix, load_embedding
+from .lexical import LexicalIndex, term_counts, strip_frontmatter
+from . import catalog, segments
+from .ann import (
+    IVFPQIndex, ANNSearcher, ANN_BACKENDS, ids_signature, read_signature, measure_recall
+)
 
 
 def scan_chunks(chunks_path: str) -> list[dict]:
     """
-    Scan all chunks in the chunks directory.
+    Scan all chunks in the chunks directory (chunk files and segment logs).
 
-    Returns list of {id, embedding_path, metadata}
+    Returns list of {id, embedding, metadata, terms}
     """
     chunks = []
 
@@ -27,28 +49,17 @@ def scan_chunks(chunks_path: str) -> list[dict]:
         if not os.path.isdir(domain_path):
             continue
 
-        for f in os.listdir(domain_path):
-            if not f.endswith('.md'):
-                continue
-
-            chunk_id = f.replace('.md', '')
-            md_path = os.path.join(domain_path, f)
-            npy_path = os.path.join(domain_path, f"{chunk_id}.npy")
-
+        for chunk_id, markdown, embedding in segments.iter_chunks(domain_path):
             # Skip if no embedding file
-            if not os.path.exists(npy_path):
+            if embedding is None:
                 print(f"Warning: No embedding for {chunk_id}")
                 continue
 
-            # Read metadata from markdown frontmatter
-            with open(md_path, 'r', encoding='utf-8') as mf:
-                content = mf.read()
-                metadata = parse_frontmatter(content)
-
             chunks.append({
                 'id': chunk_id,
-                'embedding_path': npy_path,
-                'metadata': metadata
+                'embedding': embedding,
+                'metadata': parse_frontmatter(markdown),
+                'terms': term_counts(strip_frontmatter(markdown))
             })
 
     return chunks
@@ -60,7 +71,7 @@ def scan_memories(memories_path: str) -> list[dict]:
 
     Memories are stored flat (not nested by domain like chunks).
 
-    Returns list of {id, embedding_path, metadata}
+    Returns list of {id, embedding_path, metadata, terms}
     """
     memories = []
 
@@ -88,40 +99,461 @@ def scan_memories(memories_path: str) -> list[dict]:
         memories.append({
             'id': memory_id,
             'embedding_path': npy_path,
-            'metadata': metadata
+            'metadata': metadata,
+            'terms': term_counts(strip_frontmatter(content))
         })
 
     return memories
 
 
+def _index_files(project_root: str, index_type: str) -> dict:
+    """Paths of every file making up an index."""
+    index_path = Config.get_index_path(project_root)
+    return {
+        'cidx': os.path.join(index_path, f"{index_type}.cidx"),
+        'npy': os.path.join(index_path, f"{index_type}.npy"),          # Legacy (v2.3.0)
+        'ids': os.path.join(index_path, f"{index_type}.ids.json"),     # Legacy (v2.3.0)
+        'meta': os.path.join(index_path, f"{index_type}.meta.json"),
+        'delta': os.path.join(index_path, f"{index_type}.delta.jsonl"),
+        'hnsw': os.path.join(index_path, f"{index_type}.hnsw.npz"),
+        'ivfpq': os.path.join(index_path, f"{index_type}.ivfpq.npz"),
+        'binary': os.path.join(index_path, f"{index_type}.binary.npz"),
+        'lex': os.path.join(index_path, f"{index_type}.lex.npz"),
+        'state': os.path.join(index_path, f"{index_type}.state.json"),
+        'lock': os.path.join(index_path, f"{index_type}.lock"),
+    }
+
+
+def _source_dir(project_root: str, index_type: str) -> str:
+    """Directory holding the .md/.npy items for an index type."""
+    cortex_path = Config.get_cortex_path(project_root)
+    if index_type == "chunks":
+        return os.path.join(cortex_path, Config.CHUNKS_DIR)
+    return os.path.join(cortex_path, Config.MEMORIES_DIR)
+
+
+def _list_source_items(source_path: str, index_type: str) -> dict[str, float]:
+    """Map item ID -> modification time using listings and stats only (no file reads)."""
+    items = {}
+    if not os.path.exists(source_path):
+        return items
+
+    if index_type == "chunks":
+        for d in os.listdir(source_path):
+            items.update(segments.chunk_mtimes(os.path.join(source_path, d)))
+        return items
+
+    with os.scandir(source_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.md'):
+                items[entry.name[:-3]] = entry.stat().st_mtime
+    return items
+
+
+def _load_item(source_path: str, index_type: str, item_id: str) -> Optional[tuple[np.ndarray, dict, dict]]:
+    """Read one item's embedding, frontmatter metadata and term counts, or None if missing or incomplete."""
+    if index_type == "chunks":
+        parsed = parse_chunk_id(item_id)
+        if not parsed:
+            return None
+        loaded = segments.read_chunk(os.path.join(source_path, parsed[1]), item_id)
+        if loaded is None:
+            return None
+        markdown, embedding = loaded
+        return embedding, parse_frontmatter(markdown), term_counts(strip_frontmatter(markdown))
+
+    md_path = os.path.join(source_path, f"{item_id}.md")
+    npy_path = os.path.join(source_path, f"{item_id}.npy")
+    if not os.path.exists(md_path) or not os.path.exists(npy_path):
+        return None
+    with open(md_path, 'r', encoding='utf-8') as mf:
+        markdown = mf.read()
+    return load_embedding(npy_path), parse_frontmatter(markdown), term_counts(strip_frontmatter(markdown))
+
+
+def _encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def _decode_vector(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+
+
+def _read_delta(delta_path: str) -> list[dict]:
+    """Read delta log operations, skipping a torn trailing line."""
+    ops = []
+    if not os.path.exists(delta_path):
+        return ops
+    with open(delta_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return ops
+
+
+def _append_delta(delta_path: str, ops: list[dict]):
+    """Append operations to the delta log (caller holds the index lock)."""
+    if not ops:
+        return
+    os.makedirs(os.path.dirname(delta_path), exist_ok=True)
+    data = ''.join(json.dumps(op) + '\n' for op in ops)
+    with open(delta_path, 'a', encoding='utf-8') as f:
+        f.write(data)
+
+
+def _write_json(path: str, data, indent: Optional[int] = None):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def _write_base(
+    files: dict,
+    embeddings: EmbeddingMatrix,
+    ids: list[str],
+    metadata: dict,
+    lexical: Optional[LexicalIndex] = None
+) -> EmbeddingMatrix:
+    """
+    Write the consolidated base index (.cidx + metadata JSON) in the
+    configured storage precision, with its lexical index if given (an
+    old one is removed otherwise).
+
+    Returns:
+        The matrix as written
+    """
+    os.makedirs(os.path.dirname(files['cidx']), exist_ok=True)
+
+    embeddings = embeddings.as_storage()
+    write_index_file(files['cidx'], embeddings.values, ids, embeddings.scales)
+    _write_json(files['meta'], metadata)
+    if lexical is not None:
+        lexical.signature = ids_signature(ids)
+        lexical.save(files['lex'])
+    elif os.path.exists(files['lex']):
+        os.remove(files['lex'])
+
+    # Drop the pre-.cidx files so they can't shadow the new format
+    for key in ('npy', 'ids'):
+        if os.path.exists(files[key]):
+            os.remove(files[key])
+    return embeddings
+
+
+def _base_exists(files: dict) -> bool:
+    return os.path.exists(files['cidx']) or os.path.exists(files['npy'])
+
+
+def _read_base_ids(files: dict) -> list[str]:
+    """Read the base index's IDs without loading its embeddings."""
+    if os.path.exists(files['cidx']):
+        return read_index_ids(files['cidx'])
+    if os.path.exists(files['ids']):
+        with open(files['ids'], 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return []
+
+
+def _read_base_embeddings(files: dict, mmap: Optional[bool] = None) -> EmbeddingMatrix:
+    """Open the base embedding matrix, memory-mapped when it is large."""
+    if os.path.exists(files['cidx']):
+        header = read_index_header(files['cidx'])
+        if mmap is None:
+            mmap = os.path.getsize(files['cidx']) >= Config.INDEX_MMAP_MIN_BYTES
+        return EmbeddingMatrix(
+            open_index_matrix(files['cidx'], header, mmap=mmap),
+            open_index_scales(files['cidx'], header)
+        )
+    return EmbeddingMatrix(np.load(files['npy']))
+
+
+def _needs_compaction(base_rows: int, delta_ops: int) -> bool:
+    return delta_ops >= max(Config.INDEX_COMPACT_MIN, int(base_rows * Config.INDEX_COMPACT_RATIO))
+
+
+def _replay_delta(base_ids: list[str], delta_ops: list[dict]) -> tuple[np.ndarray, dict]:
+    """
+    Replay delta operations over the base IDs.
+
+    Later operations win; re-added IDs move to the end.
+
+    Returns:
+        Tuple of (live mask over base rows, {added_id: add_op} in order)
+    """
+    live = np.ones(len(base_ids), dtype=bool)
+    positions = {item_id: i for i, item_id in enumerate(base_ids)}
+    added = {}
+
+    for op in delta_ops:
+        item_id = op.get('id')
+        if item_id in positions:
+            live[positions.pop(item_id)] = False
+        added.pop(item_id, None)
+        if op.get('op') == 'add':
+            added[item_id] = op
+
+    return live, added
+
+
+def _merge_index(files: dict) -> tuple[Union[EmbeddingMatrix, OverlayMatrix], list[str], dict, int, int]:
+    """
+    Load the base index and replay the delta log on top of it.
+
+    With pending delta operations the embeddings are an OverlayMatrix:
+    the (possibly memory-mapped) base is never copied, tombstoned rows
+    are masked and added vectors sit in a small appended matrix.
+
+    Returns:
+        Tuple of (embeddings, ids, metadata, base_rows, delta_ops)
+    """
+    base_exists = _base_exists(files)
+    delta_ops = _read_delta(files['delta'])
+
+    if not base_exists and not delta_ops:
+        raise FileNotFoundError(f"Index not found: {files['cidx']}")
+
+    embeddings = EmbeddingMatrix.from_vectors(np.zeros((0, Config.EMBEDDING_DIMENSIONS)))
+    ids = []
+    metadata = {}
+
+    if base_exists:
+        embeddings = _read_base_embeddings(files)
+        ids = _read_base_ids(files)
+
+        if os.path.exists(files['meta']):
+            with open(files['meta'], 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+
+    base_rows = len(ids)
+    if not delta_ops:
+        return embeddings, ids, metadata, base_rows, 0
+
+    live, added = _replay_delta(ids, delta_ops)
+
+    merged_ids = [item_id for item_id, keep in zip(ids, live) if keep]
+    merged_meta = {item_id: metadata.get(item_id, {}) for item_id in merged_ids}
+
+    # Delta rows are held in the base's storage precision
+    added_vectors = np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+    if added:
+        added_vectors = np.vstack([_decode_vector(op['vector']) for op in added.values()])
+        for item_id, op in added.items():
+            merged_ids.append(item_id)
+            merged_meta[item_id] = op.get('meta', {})
+
+    merged = OverlayMatrix(embeddings, live, EmbeddingMatrix.from_vectors(added_vectors, embeddings.storage))
+    return merged, merged_ids, merged_meta, base_rows, len(delta_ops)
+
+
+def _load_lexical(files: dict, base_ids: list[str], delta_ops: list[dict]) -> Optional[LexicalIndex]:
+    """
+    Lexical index of the merged index: the base's .lex.npz with the
+    delta log replayed over it.
+
+    Returns None when the base has none, it belongs to another base, or
+    a delta entry predates term counts.
+    """
+    if not os.path.exists(files['lex']):
+        return None
+    try:
+        lexical = LexicalIndex.load(files['lex'])
+    except ValueError:
+        return None
+    if lexical.signature != ids_signature(base_ids) or len(lexical) != len(base_ids):
+        return None
+
+    live, added = _replay_delta(base_ids, delta_ops)
+    if any('terms' not in op for op in added.values()):
+        return None
+    if not delta_ops:
+        return lexical
+    return lexical.merge(live, [op['terms'] for op in added.values()])
+
+
+def _lexical_current(files: dict) -> bool:
+    """Whether the base has a lexical index built over its rows."""
+    return read_signature(files['lex']) == ids_signature(_read_base_ids(files))
+
+
+def _storage_summary(embeddings: EmbeddingMatrix) -> str:
+    """One-line size and ranking-error report for a compact matrix."""
+    float32_bytes = embeddings.shape[0] * embeddings.shape[1] * 4
+    return (
+        f"{embeddings.storage}, {embeddings.nbytes / 1e6:.2f} MB vs {float32_bytes / 1e6:.2f} MB float32; "
+        f"score error vs float32 <= {embeddings.score_error_bound():.4f}"
+    )
+
+
+def _compact(files: dict) -> int:
+    """Fold the delta log into the base index (caller holds the index lock)."""
+    lexical = _load_lexical(files, _read_base_ids(files), _read_delta(files['delta']))
+    embeddings, ids, metadata, _, _ = _merge_index(files)
+    _write_base(files, embeddings, ids, metadata, lexical)
+    if os.path.exists(files['delta']):
+        os.remove(files['delta'])
+    return len(ids)
+
+
+def _try_compact(files: dict) -> bool:
+    """
+    Compact opportunistically, leaving the delta log in place on failure.
+
+    On Windows a memory-mapped .cidx cannot be replaced while mapped;
+    compaction is simply retried on a later write.
+    """
+    try:
+        _compact(files)
+        return True
+    except PermissionError:
+        return False
+
+
+def compact_index(project_root: str = ".", index_type: str = "chunks") -> int:
+    """
+    Fold an index's delta log into its base files.
+
+    Returns:
+        Number of items in the compacted index
+    """
+    files = _index_files(os.path.abspath(project_root), index_type)
+    with file_lock(files['lock']):
+        count = _compact(files)
+    invalidate_index_cache(project_root, index_type)
+    return count
+
+
+def update_index(
+    project_root: str = ".",
+    index_type: str = "chunks",
+    added_ids: Optional[list[str]] = None,
+    removed_ids: Optional[list[str]] = None
+) -> int:
+    """
+    Apply item changes to an index without rebuilding it.
+
+    Added (or re-saved) items are read from their files (or segment records) and
+    appended to the delta log; removed items are tombstoned. The delta
+    log is compacted into the base files once it grows large enough.
+    No-op when CORTEX_INDEX_AUTO_UPDATE=0.
+
+    Best-effort: callers have already written the item files, so if the
+    index lock cannot be taken (e.g. a long build_index holds it), an
+    item cannot be read back or the append fails, a warning is printed and the next build_index
+    reconciles the items instead of the write failing.
+
+    Args:
+        project_root: Project root directory
+        index_type: "chunks" or "memories"
+        added_ids: IDs of new or modified items
+        removed_ids: IDs of deleted items
+
+    Returns:
+        Number of delta operations appended (0 if the update was skipped)
+    """
+    if not Config.INDEX_AUTO_UPDATE or not (added_ids or removed_ids):
+        return 0
+
+    project_root = os.path.abspath(project_root)
+    files = _index_files(project_root, index_type)
+    source_path = _source_dir(project_root, index_type)
+
+    ops = [{'op': 'del', 'id': item_id} for item_id in (removed_ids or [])]
+    try:
+        for item_id in added_ids or []:
+            loaded = _load_item(source_path, index_type, item_id)
+            if loaded is None:
+                continue
+            vector, meta, terms = loaded
+            ops.append({'op': 'add', 'id': item_id, 'vector': _encode_vector(vector), 'meta': meta, 'terms': terms})
+
+        with file_lock(files['lock']):
+            _append_delta(files['delta'], ops)
+
+            base_rows = 0
+            if os.path.exists(files['cidx']):
+                base_rows = read_index_header(files['cidx']).rows
+            elif _base_exists(files):
+                base_rows = len(_read_base_ids(files))
+            if _needs_compaction(base_rows, len(_read_delta(files['delta']))):
+                _try_compact(files)
+    except (TimeoutError, OSError, ValueError) as e:
+        print(f"Warning: {index_type} index not updated ({e}); the next 'cortex index' reconciles it")
+        return 0
+    finally:
+        invalidate_index_cache(project_root, index_type)
+    return len(ops)
+
+
 def build_index(
     project_root: str = ".",
     index_type: str = "chunks",
     full_rebuild: bool = False
 ) -> tuple[int, str]:
     """
-    Build or rebuild the vector index.
+    Build or incrementally update the vector index.
+
+    Incremental mode (default) only lists item directories, reads items
+    that are new or modified since the last build, tombstones items that
+    no longer exist, and compacts when the delta log is large. A full
+    rebuild (or a missing base index, or one without a current lexical
+    index) rescans every item from scratch; an explicit full rebuild
+    also refills that type's catalog table.
 
     Args:
         project_root: Project root directory
         index_type: Type of index to build ("chunks" or "memories")
-        full_rebuild: If True, re-embed everything (currently same as normal)
+        full_rebuild: If True, rebuild from every item file
 
     Returns:
         Tuple of (count, index_path)
     """
     project_root = os.path.abspath(project_root)
-    cortex_path = Config.get_cortex_path(project_root)
-
-    if index_type == "chunks":
-        source_path = os.path.join(cortex_path, Config.CHUNKS_DIR)
-    else:
-        source_path = os.path.join(cortex_path, Config.MEMORIES_DIR)
+    source_path = _source_dir(project_root, index_type)
 
     if not os.path.exists(source_path):
         print(f"No {index_type} directory found at {source_path}")
         return 0, ""
 
+    files = _index_files(project_root, index_type)
+    os.makedirs(os.path.dirname(files['cidx']), exist_ok=True)
+
+    state = {}
+    if os.path.exists(files['state']):
+        with open(files['state'], 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+    with file_lock(files['lock']):
+        scan_started = time.time()
+
+        if (full_rebuild or not _base_exists(files) or 'reconciled_at' not in state
+                or not _lexical_current(files)):
+            count = _full_build(source_path, index_type, files)
+            if full_rebuild:
+                catalog.refill(project_root, [index_type])
+        else:
+            count = _incremental_build(source_path, index_type, files, state['reconciled_at'])
+
+        if count:
+            _write_json(files['state'], {'reconciled_at': scan_started})
+            ann_status = _ensure_ann(files)
+            if ann_status:
+                print(f"  ANN:   {ann_status}")
+
+    invalidate_index_cache(project_root, index_type)
+
+    if not count:
+        return 0, ""
+    return count, files['cidx']
+
+
+def _full_build(source_path: str, index_type: str, files: dict) -> int:
+    """Rebuild an index from every item file (caller holds the index lock)."""
     # Scan for items
     if index_type == "chunks":
         items = scan_chunks(source_path)
@@ -130,110 +562,396 @@ def build_index(
 
     if not items:
         print(f"No {index_type} found to index")
-        return 0, ""
+        return 0
 
     # Load all embeddings
     embeddings = []
     metadata = {}
 
     for item in items:
-        emb = np.load(item['embedding_path'])
+        emb = item['embedding'] if 'embedding' in item else load_embedding(item['embedding_path'])
         embeddings.append(emb)
         metadata[item['id']] = item['metadata']
 
     # Stack into array
     embeddings_array = np.vstack(embeddings)
+    lexical = LexicalIndex.build([item['terms'] for item in items])
 
-    # Save index
-    index_path = Config.get_index_path(project_root)
-    os.makedirs(index_path, exist_ok=True)
-
-    # Save embeddings as numpy array
-    npy_path = os.path.join(index_path, f"{index_type}.npy")
-    np.save(npy_path, embeddings_array)
-
-    # Save IDs as JSON
-    ids_path = os.path.join(index_path, f"{index_type}.ids.json")
-    with open(ids_path, 'w', encoding='utf-8') as f:
-        json.dump([item['id'] for item in items], f, indent=2)
-
-    # Save metadata as JSON
-    meta_path = os.path.join(index_path, f"{index_type}.meta.json")
-    with open(meta_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2)
+    stored = _write_base(
+        files, EmbeddingMatrix(embeddings_array), [item['id'] for item in items], metadata, lexical
+    )
+    if os.path.exists(files['delta']):
+        os.remove(files['delta'])
 
     print(f"Built {index_type} index:")
     print(f"  Items: {len(items)}")
     print(f"  Shape: {embeddings_array.shape}")
-    print(f"  Index: {npy_path}")
-    print(f"  Meta:  {meta_path}")
+    print(f"  Index: {files['cidx']}")
+    print(f"  Meta:  {files['meta']}")
+    print(f"  Lexical: {len(lexical.vocabulary)} terms, {len(lexical.rows)} postings")
+    if stored.storage != 'float32':
+        print(f"  Storage: {_storage_summary(stored)}")
+
+    return len(items)
+
 
-    return len(items), npy_path
+def _incremental_build(source_path: str, index_type: str, files: dict, reconciled_at: float) -> int:
+    """Reconcile an existing index with the item files (caller holds the index lock)."""
+    _, indexed_ids, _, _, _ = _merge_index(files)
+    indexed = set(indexed_ids)
+    on_disk = _list_source_items(source_path, index_type)
+
+    ops = [{'op': 'del', 'id': item_id} for item_id in indexed - on_disk.keys()]
+    added = modified = 0
+
+    for item_id, mtime in on_disk.items():
+        is_new = item_id not in indexed
+        if not is_new and mtime <= reconciled_at:
+            continue
+        loaded = _load_item(source_path, index_type, item_id)
+        if loaded is None:
+            print(f"Warning: No embedding for {item_id}")
+            continue
+        vector, meta, terms = loaded
+        ops.append({'op': 'add', 'id': item_id, 'vector': _encode_vector(vector), 'meta': meta, 'terms': terms})
+        if is_new:
+            added += 1
+        else:
+            modified += 1
+
+    _append_delta(files['delta'], ops)
+
+    embeddings, ids, _, base_rows, delta_ops = _merge_index(files)
+    if _needs_compaction(base_rows, delta_ops) and _try_compact(files):
+        delta_ops = 0
+
+    print(f"Updated {index_type} index:")
+    print(f"  Items: {len(ids)} (+{added} new, ~{modified} modified, -{len(indexed - on_disk.keys())} removed)")
+    print(f"  Shape: {embeddings.shape}")
+    print(f"  Pending delta ops: {delta_ops}")
+
+    return len(ids)
+
+
+def _ann_params() -> tuple[str, dict]:
+    """Configured ANN backend name and its build parameters."""
+    if Config.ANN_BACKEND == "ivfpq":
+        return "ivfpq", {'nlist': Config.IVF_NLIST, 'm': Config.PQ_SUBVECTORS}
+    if Config.ANN_BACKEND == "binary":
+        return "binary", {}
+    if Config.ANN_BACKEND != "hnsw":
+        raise ValueError(f"Unknown ANN backend: {Config.ANN_BACKEND} (expected hnsw, ivfpq or binary)")
+    return "hnsw", {'m': Config.HNSW_M, 'ef_construction': Config.HNSW_EF_CONSTRUCTION}
+
+
+def _ann_signature(base_ids: list[str], backend: str, params: dict) -> str:
+    """Signature an ANN index must carry to be used with a base (IDs plus build parameters)."""
+    settings = ','.join(f"{key}={value}" for key, value in sorted(params.items()))
+    return f"{ids_signature(base_ids)}|{backend}|{settings}"
+
+
+def _ann_search_breadth(backend: str) -> int:
+    if backend == "ivfpq":
+        return Config.IVF_RERANK
+    if backend == "binary":
+        return Config.BINARY_RERANK
+    return Config.HNSW_EF_SEARCH
+
+
+def _ensure_ann(files: dict) -> Optional[str]:
+    """
+    Build the configured ANN index for a large base if it is missing or
+    stale (caller holds the index lock). Small bases drop theirs.
+
+    Returns:
+        Status line for build output, or None if no ANN index applies
+    """
+    if not Config.ANN_ENABLED or not os.path.exists(files['cidx']):
+        return None
+
+    backend, params = _ann_params()
+    for other in ANN_BACKENDS:
+        if other != backend and os.path.exists(files[other]):
+            os.remove(files[other])
+
+    header = read_index_header(files['cidx'])
+    if header.rows < Config.ANN_MIN_ITEMS:
+        if os.path.exists(files[backend]):
+            os.remove(files[backend])
+        return None
+
+    signature = _ann_signature(read_index_ids(files['cidx'], header), backend, params)
+    if read_signature(files[backend]) == signature:
+        return f"{backend} index up to date"
+
+    started = time.time()
+    vectors = np.asarray(_read_base_embeddings(files, mmap=False))
+    ann = ANN_BACKENDS[backend].build(vectors, **params)
+    ann.signature = signature
+    ann.save(files[backend])
+    elapsed = time.time() - started
+
+    if backend == "ivfpq":
+        ann.nprobe = Config.IVF_NPROBE
+    recall = measure_recall(ann, vectors, k=10, ef=_ann_search_breadth(backend))
+    settings = ', '.join(f"{key}={value}" for key, value in params.items()) or "defaults"
+    status = f"{backend} index built over {header.rows} items in {elapsed:.1f}s ({settings})"
+    if backend in ("ivfpq", "binary"):
+        status += f", {ann.resident_bytes / 1e6:.1f} MB vs {vectors.nbytes / 1e6:.1f} MB float32"
+    return f"{status}; recall@10 vs brute force: {recall:.3f}"
+
+
+def _load_ann(backend: str, path: str):
+    """
+    Raises:
+        ValueError: If the file is not a readable index of that backend
+    """
+    if backend == "ivfpq":
+        return IVFPQIndex.load(path, nprobe=Config.IVF_NPROBE)
+    return ANN_BACKENDS[backend].load(path)
+
+
+def load_ann_searcher(
+    project_root: str,
+    index_type: str,
+    ids: list[str]
+) -> Optional[ANNSearcher]:
+    """
+    Open the ANN index (HNSW, IVF-PQ or binary) of an index for candidate generation.
+
+    Args:
+        project_root: Project root directory
+        index_type: "chunks" or "memories"
+        ids: IDs of the loaded (merged) index the searcher must map onto
+
+    Returns:
+        An ANNSearcher, or None when the index is below ANN_MIN_ITEMS,
+        has no ANN index, or it does not match the current base and
+        settings (callers then fall back to brute force)
+    """
+    if not Config.ANN_ENABLED or len(ids) < Config.ANN_MIN_ITEMS:
+        return None
+
+    backend, params = _ann_params()
+    files = _index_files(os.path.abspath(project_root), index_type)
+    if not os.path.exists(files['cidx']) or not os.path.exists(files[backend]):
+        return None
+
+    base_ids = _read_base_ids(files)
+    try:
+        ann = _load_ann(backend, files[backend])
+    except ValueError:
+        return None
+    if ann.signature != _ann_signature(base_ids, backend, params) or len(ann) != len(base_ids):
+        return None
+
+    # Map base rows onto the merged index (tombstoned rows -> -1)
+    live, added = _replay_delta(base_ids, _read_delta(files['delta']))
+    live_count = int(live.sum())
+    if live_count + len(added) != len(ids) or list(added) != ids[live_count:]:
+        return None  # Index changed since it was loaded
+
+    base_to_merged = np.full(len(base_ids), -1, dtype=np.int64)
+    base_to_merged[live] = np.arange(live_count)
+    extra_rows = np.arange(live_count, len(ids), dtype=np.int64)
+
+    return ANNSearcher(
+        ann, _read_base_embeddings(files), base_to_merged, extra_rows, _ann_search_breadth(backend)
+    )
+
+
+def load_lexical_index(
+    project_root: str,
+    index_type: str,
+    ids: list[str]
+) -> Optional[LexicalIndex]:
+    """
+    Open the BM25 inverted index of an index, with delta log items merged in.
+
+    Args:
+        project_root: Project root directory
+        index_type: "chunks" or "memories"
+        ids: IDs of the loaded (merged) index the lexical rows must match
+
+    Returns:
+        A LexicalIndex whose rows line up with ids, or None when the
+        base has no current lexical index (callers then fall back to
+        frontmatter keyword overlap until the next build)
+    """
+    files = _index_files(os.path.abspath(project_root), index_type)
+    if not os.path.exists(files['cidx']):
+        return None
+
+    base_ids = _read_base_ids(files)
+    delta_ops = _read_delta(files['delta'])
+    live, added = _replay_delta(base_ids, delta_ops)
+    live_count = int(live.sum())
+    if live_count + len(added) != len(ids) or list(added) != ids[live_count:]:
+        return None  # Index changed since it was loaded
+    return _load_lexical(files, base_ids, delta_ops)
+
+
+def get_index_generation(project_root: str = ".", index_type: str = "chunks") -> Optional[tuple]:
+    """
+    Stat signature (mtime, size) of an index's files.
+
+    Changes whenever build_index, update_index or compaction changes the
+    index. Returns None if the index has not been built.
+    """
+    files = _index_files(os.path.abspath(project_root), index_type)
+    generation = []
+    for key in ('cidx', 'npy', 'ids', 'meta', 'delta', 'hnsw', 'ivfpq', 'binary', 'lex'):
+        try:
+            st = os.stat(files[key])
+        except FileNotFoundError:
+            continue
+        generation.append((key, st.st_mtime_ns, st.st_size))
+
+    keys = {entry[0] for entry in generation}
+    if not keys & {'cidx', 'npy', 'delta'}:
+        return None
+    return tuple(generation)
 
 
 def load_index(
     project_root: str = ".",
-    index_type: str = "chunks"
+    index_type: str = "chunks",
+    compact: bool = False
 ) -> tuple[np.ndarray, list[str], dict]:
     """
     Load an index from disk.
 
+    The base files are merged with any pending delta log operations,
+    so items added or deleted since the last build are reflected.
+
     Args:
         project_root: Project root directory
         index_type: Type of index to load ("chunks" or "memories")
+        compact: Return the embeddings in their storage precision (an
+            EmbeddingMatrix, or an OverlayMatrix over the base while
+            delta operations are pending) instead of decoding them to float32
 
     Returns:
         Tuple of (embeddings_array, id_list, metadata_dict)
     """
     project_root = os.path.abspath(project_root)
-    index_path = Config.get_index_path(project_root)
+    embeddings, ids, metadata, _, _ = _merge_index(_index_files(project_root, index_type))
+    if compact:
+        return embeddings, ids, metadata
+    return np.asarray(embeddings), ids, metadata
+
+
+@dataclass
+class CachedIndex:
+    """
+    An index held in the in-process cache.
 
-    npy_path = os.path.join(index_path, f"{index_type}.npy")
-    ids_path = os.path.join(index_path, f"{index_type}.ids.json")
-    meta_path = os.path.join(index_path, f"{index_type}.meta.json")
+    derived holds structures computed from the index (scoring columns,
+    search accelerators); they are dropped together with the index.
+    """
+    generation: tuple
+    embeddings: Union[EmbeddingMatrix, OverlayMatrix]
+    ids: list[str]
+    metadata: dict
+    derived: dict = field(default_factory=dict)
 
-    if not os.path.exists(npy_path):
-        raise FileNotFoundError(f"Index not found: {npy_path}")
+    def derive(self, name: str, factory: Callable):
+        """Return a derived structure, computing it on first use."""
+        if name not in self.derived:
+            self.derived[name] = factory()
+        return self.derived[name]
 
-    # Load embeddings
-    embeddings = np.load(npy_path)
 
-    # Load IDs
-    ids = []
-    if os.path.exists(ids_path):
-        with open(ids_path, 'r', encoding='utf-8') as f:
-            ids = json.load(f)
+_index_cache: dict[tuple[str, str], CachedIndex] = {}
+_index_cache_lock = threading.Lock()
 
-    # Load metadata
-    metadata = {}
-    if os.path.exists(meta_path):
-        with open(meta_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
 
-    return embeddings, ids, metadata
+def get_cached_index(project_root: str = ".", index_type: str = "chunks") -> CachedIndex:
+    """
+    Load an index through the in-process cache.
+
+    The cached copy is reused until the index files' generation
+    (mtime/size, see get_index_generation) changes or
+    invalidate_index_cache() is called. Treat the arrays as read-only.
+
+    Raises:
+        FileNotFoundError: If the index has not been built
+    """
+    project_root = os.path.abspath(project_root)
+    key = (project_root, index_type)
+
+    with _index_cache_lock:
+        generation = get_index_generation(project_root, index_type)
+        if generation is None:
+            _index_cache.pop(key, None)
+            raise FileNotFoundError(f"Index not found: {index_type} in {project_root}")
+
+        cached = _index_cache.get(key)
+        if cached is not None and cached.generation == generation:
+            return cached
+
+        embeddings, ids, metadata = load_index(project_root, index_type, compact=True)
+        cached = CachedIndex(generation, embeddings, ids, metadata)
+        _index_cache[key] = cached
+        return cached
+
+
+def invalidate_index_cache(project_root: Optional[str] = None, index_type: Optional[str] = None):
+    """
+    Drop cached indices.
+
+    Args:
+        project_root: Only drop indices of this project (default: all)
+        index_type: Only drop this index type (default: all)
+    """
+    root = os.path.abspath(project_root) if project_root else None
+    with _index_cache_lock:
+        for key in list(_index_cache):
+            if (root is None or key[0] == root) and (index_type is None or key[1] == index_type):
+                del _index_cache[key]
 
 
 def get_index_stats(project_root: str = ".") -> dict:
-    """Get statistics about existing indices."""
+    """
+    Get statistics about existing indices.
+
+    Reads only the .cidx header and ID table plus the delta log;
+    the embedding matrix is never loaded.
+    """
     project_root = os.path.abspath(project_root)
-    index_path = Config.get_index_path(project_root)
 
     stats = {}
 
     for index_type in ["chunks", "memories"]:
-        npy_path = os.path.join(index_path, f"{index_type}.npy")
-        ids_path = os.path.join(index_path, f"{index_type}.ids.json")
-        if os.path.exists(npy_path):
-            embeddings = np.load(npy_path)
-            ids = []
-            if os.path.exists(ids_path):
-                with open(ids_path, 'r', encoding='utf-8') as f:
-                    ids = json.load(f)
-            stats[index_type] = {
-                'count': len(ids),
-                'shape': embeddings.shape,
-                'size_bytes': os.path.getsize(npy_path)
-            }
+        files = _index_files(project_root, index_type)
+        delta_ops = _read_delta(files['delta'])
+        if not _base_exists(files) and not delta_ops:
+            continue
+
+        dtype = 'float32'
+        if os.path.exists(files['cidx']):
+            header = read_index_header(files['cidx'])
+            dim, dtype = header.dim, header.dtype.name
+        elif os.path.exists(files['npy']):
+            dim = np.load(files['npy'], mmap_mode='r').shape[1]
+        else:
+            dim = Config.EMBEDDING_DIMENSIONS
+
+        live, added = _replay_delta(_read_base_ids(files), delta_ops)
+        count = int(live.sum()) + len(added)
+
+        size_bytes = sum(
+            os.path.getsize(files[key]) for key in ('cidx', 'npy', 'delta')
+            if os.path.exists(files[key])
+        )
+        stats[index_type] = {
+            'count': count,
+            'shape': (count, dim),
+            'size_bytes': size_bytes,
+            'delta_ops': len(delta_ops),
+            'dtype': dtype,
+            'ann': next((b for b in ANN_BACKENDS if os.path.exists(files[b])), None)
+        }
 
     return stats
 
@@ -0,0 +1,217 @@
+"""
+Cortex Lexical Index
+
+BM25 inverted index over the full text of every indexed item, kept next
+to the vector index as {type}.lex.npz:
+
+    terms     uint8   vocabulary, newline-joined UTF-8
+    term_ptr  int64   postings of term t are rows/tfs[term_ptr[t]:term_ptr[t+1]]
+    rows      int32   index row of each posting, ascending within a term
+    tfs       uint16  occurrences of the term in that row
+    doc_len   uint32  tokens per row
+
+A query only touches the postings of its own terms, so lexical scoring
+grows with the matching rows rather than with the index. The file
+covers the base rows of an index; delta log items are merged in when
+the index is loaded (see indexer.load_lexical_index).
+"""
+
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable
+import numpy as np
+
+from .utils import STOPWORDS
+
+
+TOKEN_RE = re.compile(r'\b[a-z]{3,}\b')
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words of three or more letters, minus stopwords."""
+    return [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def term_counts(text: str) -> dict[str, int]:
+    """Term frequencies of a text's tokens."""
+    return dict(Counter(tokenize(text)))
+
+
+def strip_frontmatter(markdown: str) -> str:
+    """Body of a chunk or memory file (the text after its frontmatter)."""
+    if markdown.startswith('---'):
+        end = markdown.find('---', 3)
+        if end != -1:
+            return markdown[end + 3:]
+    return markdown
+
+
+@dataclass
+class LexicalIndex:
+    """Term postings with frequencies and per-row lengths, scored with BM25."""
+    vocabulary: list[str]
+    term_ptr: np.ndarray
+    rows: np.ndarray
+    tfs: np.ndarray
+    doc_len: np.ndarray
+    signature: str = ""
+    terms: dict = field(default=None, repr=False)   # term -> posting list number
+    _norm: tuple = field(default=None, repr=False)  # ((k1, b), per-row length normalization)
+
+    def __post_init__(self):
+        if self.terms is None:
+            self.terms = {term: t for t, term in enumerate(self.vocabulary)}
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def _from_postings(
+        cls,
+        vocabulary: list[str],
+        term_ids: np.ndarray,
+        rows: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray
+    ) -> 'LexicalIndex':
+        """Group (term, row, tf) postings by term, dropping terms left without postings."""
+        order = np.lexsort((rows, term_ids))
+        term_ids, rows, tfs = term_ids[order], rows[order], tfs[order]
+
+        counts = np.bincount(term_ids, minlength=len(vocabulary))
+        used = np.flatnonzero(counts)
+        term_ptr = np.zeros(len(used) + 1, dtype=np.int64)
+        np.cumsum(counts[used], out=term_ptr[1:])
+
+        return cls(
+            [vocabulary[t] for t in used], term_ptr,
+            rows.astype(np.int32), tfs.astype(np.uint16), doc_len.astype(np.uint32)
+        )
+
+    @classmethod
+    def build(cls, counts: list[dict[str, int]], row_offset: int = 0) -> 'LexicalIndex':
+        """Index rows given as term-frequency dicts (row row_offset + i = counts[i])."""
+        vocabulary, numbers = [], {}
+        term_ids, rows, tfs = [], [], []
+        doc_len = np.zeros(len(counts), dtype=np.int64)
+
+        for row, row_counts in enumerate(counts):
+            for term, tf in row_counts.items():
+                number = numbers.get(term)
+                if number is None:
+                    number = numbers[term] = len(vocabulary)
+                    vocabulary.append(term)
+                term_ids.append(number)
+                rows.append(row + row_offset)
+                tfs.append(min(tf, 65535))
+                doc_len[row] += tf
+
+        return cls._from_postings(
+            vocabulary, np.array(term_ids, dtype=np.int64), np.array(rows, dtype=np.int64),
+            np.array(tfs, dtype=np.int64), doc_len
+        )
+
+    def merge(self, live: np.ndarray, added: list[dict[str, int]]) -> 'LexicalIndex':
+        """
+        Index with the rows where live is False removed and added rows
+        appended, in the row order of the indexer's merged index.
+        """
+        live = np.asarray(live, dtype=bool)
+        new_rows = np.cumsum(live) - 1
+        term_ids = np.repeat(np.arange(len(self.vocabulary)), np.diff(self.term_ptr))
+        keep = live[self.rows]
+
+        extra = LexicalIndex.build(added, row_offset=int(live.sum()))
+        extra_ids = np.array([self.terms.get(term, -1) for term in extra.vocabulary], dtype=np.int64)
+        vocabulary = list(self.vocabulary)
+        for t in np.flatnonzero(extra_ids < 0):
+            extra_ids[t] = len(vocabulary)
+            vocabulary.append(extra.vocabulary[t])
+
+        return LexicalIndex._from_postings(
+            vocabulary,
+            np.concatenate([term_ids[keep], np.repeat(extra_ids, np.diff(extra.term_ptr))]),
+            np.concatenate([new_rows[self.rows[keep]], extra.rows]),
+            np.concatenate([self.tfs[keep], extra.tfs]),
+            np.concatenate([self.doc_len[live], extra.doc_len])
+        )
+
+    def scores(self, query_terms: Iterable[str], k1: float, b: float) -> np.ndarray:
+        """
+        BM25 score of every row for the query terms.
+
+        Only the postings of terms in the vocabulary are read; rows
+        without a query term score 0.
+        """
+        scores = np.zeros(len(self), dtype=np.float64)
+        numbers = {self.terms[term] for term in query_terms if term in self.terms}
+        if not numbers:
+            return scores
+
+        if self._norm is None or self._norm[0] != (k1, b):
+            avg_len = float(self.doc_len.mean()) or 1.0
+            self._norm = ((k1, b), k1 * (1.0 - b + b * self.doc_len / avg_len))
+        norm = self._norm[1]
+
+        n = len(self)
+        for t in numbers:
+            start, end = self.term_ptr[t], self.term_ptr[t + 1]
+            rows = self.rows[start:end]
+            tf = self.tfs[start:end].astype(np.float64)
+            df = end - start
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            scores[rows] += idf * tf * (k1 + 1.0) / (tf + norm[rows])
+        return scores
+
+    def max_score(self, query_terms: Iterable[str], k1: float) -> float:
+        """
+        Upper bound of scores() for the query terms: the sum of their
+        IDF x (k1 + 1), reached only by an infinitely frequent match of
+        every term. Terms outside the vocabulary add nothing.
+        """
+        n = len(self)
+        total = 0.0
+        for term in set(query_terms):
+            t = self.terms.get(term)
+            if t is not None:
+                df = self.term_ptr[t + 1] - self.term_ptr[t]
+                total += np.log1p((n - df + 0.5) / (df + 0.5)) * (k1 + 1.0)
+        return float(total)
+
+    def save(self, path: str):
+        """Write the index as an .npz archive (no pickled objects) atomically."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                signature=np.array(self.signature),
+                terms=np.frombuffer('\n'.join(self.vocabulary).encode('utf-8'), dtype=np.uint8),
+                term_ptr=self.term_ptr,
+                rows=self.rows,
+                tfs=self.tfs,
+                doc_len=self.doc_len
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'LexicalIndex':
+        """
+        Read an index written by save().
+
+        Raises:
+            ValueError: If the file is not a readable lexical index
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                terms = data['terms'].tobytes().decode('utf-8')
+                index = cls(
+                    terms.split('\n') if terms else [], data['term_ptr'], data['rows'],
+                    data['tfs'], data['doc_len'], str(data['signature'])
+                )
+        except (KeyError, OSError, ValueError) as e:
+            raise ValueError(f"Unreadable lexical index {path}: {e}")
+        if len(index.term_ptr) != len(index.vocabulary) + 1:
+            raise ValueError(f"Unreadable lexical index {path}: vocabulary and postings disagree")
+        return index
@@ -0,0 +1,160 @@
+"""
+Cortex Source Manifest
+
+Maps each chunked source file to what stale detection needs, so
+`get_stale_chunks()` neither opens chunk files nor re-hashes unchanged
+sources:
+
+    {"version": 1, "sources": {source_path: {
+        "size": ..., "mtime_ns": ...,     # stat when "hash" was computed
+        "hash": ...,                      # source content SHA256 (or null)
+        "chunks": {source_hash: [chunk IDs]}
+    }}}
+
+Chunks are grouped by the source hash they were cut from, so a source
+can hold fresh and stale chunks at once. The stat fields are filled in
+the first time a source is hashed; until then they are null and the
+file is hashed on the next check. A missing manifest is rebuilt from
+chunk frontmatter.
+
+The manifest doubles as the reverse index from source path to chunk IDs
+used by `get_chunks_by_source()`; lookups share a parsed copy that is
+reloaded when the file changes.
+"""
+
+import os
+import json
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from .config import Config
+from . import segments
+from .utils import file_lock, parse_frontmatter, chunk_id_sort_key
+
+
+VERSION = 1
+
+# Manifest path -> ((mtime_ns, size), sources) for read-only lookups
+_cache: dict[str, tuple[tuple[int, int], dict]] = {}
+
+
+def _new_entry() -> dict:
+    return {'size': None, 'mtime_ns': None, 'hash': None, 'chunks': {}}
+
+
+def add_chunks(sources: dict, source_path: str, source_hash: str, chunk_ids: Iterable[str]):
+    """Record chunks cut from source_path at source_hash (moving them from older hashes)."""
+    ids = set(chunk_ids)
+    if not ids:
+        return
+    entry = sources.setdefault(source_path, _new_entry())
+    for content_hash, group in list(entry['chunks'].items()):
+        remaining = [chunk_id for chunk_id in group if chunk_id not in ids]
+        if remaining:
+            entry['chunks'][content_hash] = remaining
+        else:
+            del entry['chunks'][content_hash]
+    entry['chunks'][source_hash] = sorted(ids.union(entry['chunks'].get(source_hash, [])), key=chunk_id_sort_key)
+
+
+def remove_chunks(sources: dict, chunk_ids: Iterable[str]):
+    """Forget chunks; sources left without chunks are dropped."""
+    ids = set(chunk_ids)
+    if not ids:
+        return
+    for source_path, entry in list(sources.items()):
+        for content_hash, group in list(entry['chunks'].items()):
+            remaining = [chunk_id for chunk_id in group if chunk_id not in ids]
+            if remaining:
+                entry['chunks'][content_hash] = remaining
+            else:
+                del entry['chunks'][content_hash]
+        if not entry['chunks']:
+            del sources[source_path]
+
+
+def scan_sources(project_root: str) -> dict:
+    """Build manifest sources from chunk frontmatter (slow path)."""
+    chunks_path = Config.get_chunks_path(project_root)
+    sources = {}
+    if not os.path.exists(chunks_path):
+        return sources
+
+    for domain in os.listdir(chunks_path):
+        domain_path = os.path.join(chunks_path, domain)
+        if not os.path.isdir(domain_path):
+            continue
+
+        for chunk_id, markdown, _ in segments.iter_chunks(domain_path, embeddings=False):
+            meta = parse_frontmatter(markdown)
+
+            source_path = meta.get('source_path', '')
+            source_hash = meta.get('source_hash', '')
+            if not source_path or not source_hash:
+                continue  # Old chunk without provenance data
+            add_chunks(sources, source_path, source_hash, [meta.get('id', chunk_id)])
+
+    return sources
+
+
+def _read(path: str) -> Optional[dict]:
+    """Sources from a manifest file, or None if missing, unreadable or from another version."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == VERSION:
+            return data['sources']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    return None
+
+
+def load_manifest(project_root: str) -> dict:
+    """
+    Manifest sources for lookups; shared between callers, do not modify.
+
+    Cached until the file's mtime or size changes. A missing or
+    unreadable manifest is rebuilt from chunk frontmatter and written.
+    """
+    path = Config.get_manifest_file(project_root)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        stat = None
+
+    if stat is not None:
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = _cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        sources = _read(path)
+        if sources is not None:
+            _cache[path] = (key, sources)
+            return sources
+
+    with edit_manifest(project_root) as sources:
+        return sources
+
+
+@contextmanager
+def edit_manifest(project_root: str):
+    """
+    Load the manifest sources under a cross-process lock and write them
+    back (atomically, only if changed) when the block exits cleanly.
+    """
+    path = Config.get_manifest_file(project_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with file_lock(f"{path}.lock"):
+        sources = _read(path)
+        exists = sources is not None
+        if not exists:
+            sources = scan_sources(project_root)
+        before = json.dumps(sources, sort_keys=True)
+        yield sources
+        if exists and json.dumps(sources, sort_keys=True) == before:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION, 'sources': sources}, f)
+        os.replace(tmp_path, path)
@@ -14,7 +14,10 @@ from enum import Enum
 import numpy as np
 
 from .config import Config
-from .embedder import embed_passage
+from . import catalog
+from .embedder import embed_passage, enable_cache
+from .indexer import update_index
+from .quantization import save_embedding, load_embedding
 from .utils import parse_frontmatter, extract_keywords
 
 
@@ -114,6 +117,7 @@ def create_memory(
     project_root = os.path.abspath(project_root)
     memories_path = get_memories_path(project_root)
     os.makedirs(memories_path, exist_ok=True)
+    enable_cache(project_root)
 
     # Generate ID
     memory_id = get_next_memory_id(memories_path)
@@ -138,6 +142,8 @@ def create_memory(
 
     # Save to disk
     save_memory(memory, memories_path)
+    catalog.upsert_memories(project_root, [asdict(memory)])
+    update_index(project_root, "memories", added_ids=[memory_id])
 
     print(f"Created memory: {memory_id}")
     print(f"  Type: {memory_type}")
@@ -185,7 +191,7 @@ usefulness_score: {memory.usefulness_score}
     embedding_text = f"{memory.learning}\n{memory.context}"
     embedding = embed_passage(embedding_text)
     npy_path = os.path.join(memories_path, f"{memory.id}.npy")
-    np.save(npy_path, embedding)
+    save_embedding(npy_path, embedding)
 
 
 def parse_memory_file(md_path: str) -> Optional[Memory]:
@@ -259,6 +265,8 @@ def list_memories(
     """
     List all memories, optionally filtered.
 
+    Answered from the metadata catalog; no memory files are read.
+
     Args:
         project_root: Project root directory
         domain: Filter by domain
@@ -274,30 +282,11 @@ def list_memories(
     if not os.path.exists(memories_path):
         return []
 
-    memories = []
-    for f in os.listdir(memories_path):
-        if not f.endswith('.md'):
-            continue
-
-        md_path = os.path.join(memories_path, f)
-        memory = parse_memory_file(md_path)
-
-        if memory is None:
-            continue
-
-        # Apply filters
-        if domain and memory.domain.upper() != domain.upper():
-            continue
-        if memory_type and memory.type != memory_type:
-            continue
-        if confidence and memory.confidence != confidence:
-            continue
-
-        memories.append(memory)
-
-    # Sort by created date descending
-    memories.sort(key=lambda m: m.created, reverse=True)
-    return memories
+    # Sorted by created date descending
+    return [
+        Memory(**fields)
+        for fields in catalog.query_memories(project_root, domain, memory_type, confidence)
+    ]
 
 
 def update_memory(
@@ -349,7 +338,10 @@ def update_memory(
     memory.updated = datetime.now().isoformat()
 
     # Re-save
+    enable_cache(project_root)
     save_memory(memory, memories_path)
+    catalog.upsert_memories(project_root, [asdict(memory)])
+    update_index(project_root, "memories", added_ids=[memory_id])
 
     print(f"Updated memory: {memory_id}")
     return memory
@@ -379,19 +371,28 @@ def delete_memory(memory_id: str, project_root: str = ".") -> bool:
     os.remove(md_path)
     if os.path.exists(npy_path):
         os.remove(npy_path)
+    catalog.remove_memories(project_root, [memory_id])
+    update_index(project_root, "memories", removed_ids=[memory_id])
 
     print(f"Deleted memory: {memory_id}")
     return True
 
 
 def increment_retrieval(memory_id: str, project_root: str = "."):
-    """Increment retrieval count for a memory."""
+    """
+    Increment retrieval count for a memory.
+
+    Only the memory file and the catalog change; the retriever reads
+    counts from the catalog, so the vector index is not touched.
+    """
     memory = get_memory(memory_id, project_root)
     if memory:
         memory.retrieval_count += 1
         memory.last_retrieved = datetime.now().isoformat()
         memories_path = get_memories_path(os.path.abspath(project_root))
+        enable_cache(project_root)
         save_memory(memory, memories_path)
+        catalog.upsert_memories(project_root, [asdict(memory)])
 
 
 def find_related_memories(
@@ -418,7 +419,7 @@ def find_related_memories(
     if not os.path.exists(source_npy):
         return []
 
-    source_emb = np.load(source_npy)
+    source_emb = load_embedding(source_npy)
 
     # Load all other memory embeddings and compute similarity
     results = []
@@ -428,7 +429,7 @@ def find_related_memories(
 
         other_id = f.replace('.npy', '')
         other_npy = os.path.join(memories_path, f)
-        other_emb = np.load(other_npy)
+        other_emb = load_embedding(other_npy)
 
         # Cosine similarity (embeddings are normalized)
         similarity = float(np.dot(source_emb, other_emb))
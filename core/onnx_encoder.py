@@ -0,0 +1,173 @@
+"""
+Cortex ONNX Encoder
+
+CPU inference backend for the embedding model without PyTorch at query
+time (CORTEX_EMBEDDING_BACKEND=onnx or onnx-int8).
+
+The model is exported to ONNX once per machine (this step still needs
+torch and transformers), optionally dynamic-int8 quantized, and then run
+with onnxruntime and the Hugging Face fast tokenizer. Pooling and
+normalization match sentence-transformers for e5: mean over non-padding
+tokens, then L2 normalization.
+
+Layout: {CORTEX_ONNX_DIR}/{model name with / as --}/
+    model.onnx, model.int8.onnx, tokenizer.json
+"""
+
+import os
+from typing import Optional, Union
+import numpy as np
+
+from .config import Config
+from .utils import file_lock
+
+
+def model_dir(model_name: Optional[str] = None) -> str:
+    """Directory holding the exported files for a model."""
+    model_name = model_name or Config.EMBEDDING_MODEL
+    return os.path.join(Config.ONNX_DIR, model_name.replace('/', '--'))
+
+
+def model_path(directory: str, quantized: bool) -> str:
+    return os.path.join(directory, 'model.int8.onnx' if quantized else 'model.onnx')
+
+
+def tokenizer_path(directory: str) -> str:
+    return os.path.join(directory, 'tokenizer.json')
+
+
+def export_model(model_name: Optional[str] = None, quantized: bool = False) -> str:
+    """
+    Export the model to ONNX (and quantize it) unless already done.
+
+    Safe to call from several processes; the first one exports while the
+    others wait on the directory lock.
+
+    Returns:
+        Path of the requested .onnx file
+    """
+    model_name = model_name or Config.EMBEDDING_MODEL
+    directory = model_dir(model_name)
+    target = model_path(directory, quantized)
+    if os.path.exists(target) and os.path.exists(tokenizer_path(directory)):
+        return target
+
+    os.makedirs(directory, exist_ok=True)
+    with file_lock(os.path.join(directory, 'export.lock'), timeout=600.0):
+        fp32_path = model_path(directory, False)
+        if not (os.path.exists(fp32_path) and os.path.exists(tokenizer_path(directory))):
+            _export_fp32(model_name, directory, fp32_path)
+        if quantized and not os.path.exists(target):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            print(f"Quantizing {model_name} to int8...")
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, target)
+    return target
+
+
+def _export_fp32(model_name: str, directory: str, path: str):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    print(f"Exporting {model_name} to ONNX (one-time)...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = dict(tokenizer(["query: export"], return_tensors='pt'))
+    dynamic = {0: 'batch', 1: 'sequence'}
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model, (sample,), tmp_path,
+            input_names=list(sample),
+            output_names=['last_hidden_state'],
+            dynamic_axes={name: dynamic for name in [*sample, 'last_hidden_state']},
+            opset_version=14
+        )
+    # The tokenizer goes first: a model file on disk means the export is complete
+    tokenizer_tmp = f"{tokenizer_path(directory)}.{os.getpid()}.tmp"
+    tokenizer.backend_tokenizer.save(tokenizer_tmp)
+    os.replace(tokenizer_tmp, tokenizer_path(directory))
+    os.replace(tmp_path, path)
+
+
+class OnnxEncoder:
+    """
+    Drop-in for SentenceTransformer.encode() backed by onnxruntime.
+
+    Takes an onnxruntime session and a `tokenizers.Tokenizer`; use
+    load() to open (exporting first if needed) the configured model.
+    """
+
+    def __init__(self, session, tokenizer):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.input_names = {i.name for i in session.get_inputs()}
+
+    @classmethod
+    def load(cls, model_name: Optional[str] = None, quantized: bool = False) -> 'OnnxEncoder':
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = export_model(model_name, quantized)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        tokenizer = Tokenizer.from_file(tokenizer_path(os.path.dirname(path)))
+        tokenizer.no_padding()
+        tokenizer.enable_truncation(max_length=Config.EMBEDDING_MAX_TOKENS)
+        return cls(session, tokenizer)
+
+    def tokenize(self, texts: list[str]) -> list[list[int]]:
+        """Token IDs of each text, truncated to EMBEDDING_MAX_TOKENS."""
+        return [encoding.ids for encoding in self.tokenizer.encode_batch(texts)]
+
+    def _feeds(self, ids: list[list[int]]) -> dict:
+        """Right-pad a batch of token IDs into int64 inputs."""
+        width = max(len(row) for row in ids)
+        input_ids = np.zeros((len(ids), width), dtype=np.int64)
+        attention_mask = np.zeros((len(ids), width), dtype=np.int64)
+        for i, row in enumerate(ids):
+            input_ids[i, :len(row)] = row
+            attention_mask[i, :len(row)] = 1
+
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.zeros_like(input_ids)
+        return feeds
+
+    def encode(
+        self,
+        sentences: Union[str, list[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Embed text(s) with mean pooling, like SentenceTransformer.encode()."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, Config.EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+        embeddings = np.vstack([
+            self.encode_ids(self.tokenize(texts[start:start + batch_size]), normalize_embeddings)
+            for start in range(0, len(texts), batch_size)
+        ])
+        return embeddings[0] if single else embeddings
+
+    def encode_ids(self, ids: list[list[int]], normalize_embeddings: bool = False) -> np.ndarray:
+        """
+        Embed already-tokenized texts (from tokenize()) as one session run.
+
+        Lets callers that tokenize to plan their batches reuse the IDs
+        instead of tokenizing each text a second time.
+        """
+        feeds = self._feeds(ids)
+        hidden = self.session.run(None, feeds)[0]
+        mask = feeds['attention_mask'][:, :, None].astype(np.float32)
+        embeddings = ((hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings
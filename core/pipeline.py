@@ -0,0 +1,215 @@
+"""
+Cortex Ingestion Pipeline
+
+Streaming producer/consumer pipeline that overlaps reading/parsing,
+model encoding and file writes:
+
+    reader thread --[items]--> encoder (caller's thread) --[batches]--> writer threads
+
+Queues are bounded (queue_batches x batch_size items, queue_batches
+batches), so memory stays flat however large the input is. The encoder
+runs in the calling thread so the embedding model is only used from one
+thread. Errors in any stage stop the others and are re-raised.
+"""
+
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from .config import Config
+
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+@dataclass
+class StageStats:
+    """Throughput of one pipeline stage."""
+    name: str
+    items: int = 0
+    busy: float = 0.0  # Seconds spent working (not waiting on queues)
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.busy if self.busy > 0 else 0.0
+
+
+@dataclass
+class QueueStats:
+    """Depth of one bounded queue, sampled on every put."""
+    name: str
+    capacity: int
+    samples: int = 0
+    total: int = 0
+    peak: int = 0
+
+    def sample(self, depth: int):
+        self.samples += 1
+        self.total += depth
+        self.peak = max(self.peak, depth)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+
+
+@dataclass
+class PipelineStats:
+    """Per-stage throughput and queue depth of one pipeline run."""
+    stages: list[StageStats] = field(default_factory=list)
+    queues: list[QueueStats] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def report(self) -> list[str]:
+        """Human-readable summary lines."""
+        lines = [
+            f"{stage.name}: {stage.items} in {stage.busy:.2f}s busy ({stage.rate:.1f}/s)"
+            for stage in self.stages
+        ]
+        lines += [
+            f"queue {q.name}: mean depth {q.mean:.1f}, peak {q.peak}/{q.capacity}"
+            for q in self.queues
+        ]
+        lines.append(f"total: {self.elapsed:.2f}s")
+        return lines
+
+
+def run_pipeline(
+    source: Iterable[list],
+    encode: Callable[[list], list],
+    write: Callable[[object, object], None],
+    batch_size: int,
+    queue_batches: Optional[int] = None,
+    writers: Optional[int] = None
+) -> PipelineStats:
+    """
+    Stream items from source through encode and write.
+
+    Args:
+        source: Iterable of item groups (e.g. one list of chunks per
+            document); iterated in the reader thread, so it may do I/O
+            and parsing lazily
+        encode: Called with up to batch_size items, returns one result
+            per item; batches are full except the last
+        write: Called as write(item, result) from writer threads
+        batch_size: Items per encode call
+        queue_batches: Queue capacity in batches (default from config)
+        writers: Writer threads (default from config)
+
+    Returns:
+        PipelineStats for the run
+    """
+    batch_size = max(1, batch_size)
+    queue_batches = max(1, queue_batches or Config.PIPELINE_QUEUE_BATCHES)
+    writers = max(1, writers or Config.PIPELINE_WRITERS)
+
+    items = queue.Queue(maxsize=queue_batches * batch_size)
+    batches = queue.Queue(maxsize=queue_batches)
+    stop = threading.Event()
+    errors = []
+
+    stats = PipelineStats(
+        stages=[StageStats('read'), StageStats('encode'), StageStats('write')],
+        queues=[QueueStats('read->encode', items.maxsize), QueueStats('encode->write', batches.maxsize)]
+    )
+    read_stats, encode_stats, write_stats = stats.stages
+    items_depth, batches_depth = stats.queues
+    write_lock = threading.Lock()
+
+    def put(q: queue.Queue, value, depth: Optional[QueueStats] = None):
+        while True:
+            if stop.is_set():
+                raise _Stopped()
+            try:
+                q.put(value, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        if depth is not None:
+            depth.sample(q.qsize())
+
+    def get(q: queue.Queue):
+        while True:
+            if stop.is_set():
+                raise _Stopped()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def fail(error: BaseException):
+        if not isinstance(error, _Stopped):
+            errors.append(error)
+        stop.set()
+
+    def reader():
+        try:
+            iterator = iter(source)
+            while True:
+                started = time.perf_counter()
+                group = next(iterator, _DONE)
+                read_stats.busy += time.perf_counter() - started
+                if group is _DONE:
+                    break
+                read_stats.items += len(group)
+                for item in group:
+                    put(items, item, items_depth)
+            put(items, _DONE)
+        except BaseException as e:
+            fail(e)
+
+    def writer():
+        try:
+            while True:
+                batch = get(batches)
+                if batch is _DONE:
+                    break
+                started = time.perf_counter()
+                for item, result in zip(*batch):
+                    write(item, result)
+                with write_lock:
+                    write_stats.busy += time.perf_counter() - started
+                    write_stats.items += len(batch[0])
+        except BaseException as e:
+            fail(e)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=reader, name='cortex-read', daemon=True)]
+    threads += [threading.Thread(target=writer, name=f'cortex-write-{i}', daemon=True) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        done = False
+        while not done:
+            batch = []
+            while len(batch) < batch_size:
+                item = get(items)
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            if batch:
+                encode_started = time.perf_counter()
+                results = encode(batch)
+                encode_stats.busy += time.perf_counter() - encode_started
+                encode_stats.items += len(batch)
+                put(batches, (batch, results), batches_depth)
+        for _ in range(writers):
+            put(batches, _DONE)
+    except BaseException as e:
+        fail(e)
+
+    for thread in threads:
+        thread.join()
+    stats.elapsed = time.perf_counter() - started
+
+    if errors:
+        raise errors[0]
+    return stats
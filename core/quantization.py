@@ -0,0 +1,270 @@
+"""
+Cortex Embedding Storage Precision
+
+Compact encodings for stored embeddings (CORTEX_EMBEDDING_DTYPE):
+
+- float32: exact (default)
+- float16: half the bytes, ~3 significant digits per component
+- int8: a quarter of the bytes; each vector is scaled by its own
+  max(|x|) / 127 and rounded, the float32 scale is stored with it
+
+Per-item .npy files and the .cidx base use the same encodings. Scores
+are always computed in float32 on decoded rows, so a query never sees
+the compact dtype.
+"""
+
+import math
+from typing import Optional
+import numpy as np
+
+from .config import Config
+
+
+STORAGE_DTYPES = {
+    'float32': np.dtype('<f4'),
+    'float16': np.dtype('<f2'),
+    'int8': np.dtype('i1'),
+}
+
+INT8_LEVELS = 127
+
+
+def storage_dtype(name: Optional[str] = None) -> np.dtype:
+    """
+    Resolve a storage precision name (default from config) to its dtype.
+
+    Raises:
+        ValueError: If the name is not float32, float16 or int8
+    """
+    name = name or Config.EMBEDDING_DTYPE
+    if name not in STORAGE_DTYPES:
+        raise ValueError(f"Unknown embedding dtype: {name} (expected float32, float16 or int8)")
+    return STORAGE_DTYPES[name]
+
+
+def quantize(vectors: np.ndarray, dtype: Optional[str] = None) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Encode one vector or a (rows x dim) matrix.
+
+    Returns:
+        Tuple of (values, scales); scales is None except for int8, where
+        it holds one float32 per vector
+    """
+    target = storage_dtype(dtype)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if target.kind != 'i':
+        return vectors.astype(target), None
+
+    peak = np.abs(vectors).max(axis=-1) if vectors.size else np.zeros(vectors.shape[:-1])
+    scales = np.where(peak > 0, peak / INT8_LEVELS, 1.0).astype(np.float32)
+    values = np.clip(np.rint(vectors / scales[..., None]), -INT8_LEVELS, INT8_LEVELS)
+    return values.astype(target), scales
+
+
+def dequantize(values: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Decode values (and int8 scales) back to float32."""
+    decoded = np.asarray(values, dtype=np.float32)
+    if scales is None:
+        return decoded
+    return decoded * np.asarray(scales, dtype=np.float32)[..., None]
+
+
+def save_embedding(path: str, vector: np.ndarray, dtype: Optional[str] = None):
+    """
+    Write one embedding as .npy in the configured storage precision.
+
+    int8 vectors are written as a structured record (scale, values) so
+    the file stays a plain, pickle-free .npy.
+    """
+    values, scale = quantize(vector, dtype)
+    if scale is None:
+        np.save(path, values)
+        return
+    record = np.zeros((), dtype=[('scale', '<f4'), ('values', 'i1', values.shape)])
+    record['scale'] = scale
+    record['values'] = values
+    np.save(path, record)
+
+
+def load_embedding(path: str) -> np.ndarray:
+    """Read an embedding written by save_embedding (any precision) as float32."""
+    data = np.load(path, allow_pickle=False)
+    if data.dtype.names:
+        return dequantize(data['values'], data['scale'])
+    return data.astype(np.float32, copy=False)
+
+
+class EmbeddingMatrix:
+    """
+    Row-major embedding matrix held in its storage precision.
+
+    Indexing returns decoded float32 rows and `matrix @ queries` decodes
+    BLOCK_ROWS rows at a time, so memory stays at the compact size plus
+    one block. np.asarray(matrix) decodes everything.
+    """
+
+    BLOCK_ROWS = 16384
+
+    def __init__(self, values: np.ndarray, scales: Optional[np.ndarray] = None):
+        self.values = values
+        self.scales = scales
+
+    @classmethod
+    def from_vectors(cls, vectors: np.ndarray, dtype: Optional[str] = None) -> 'EmbeddingMatrix':
+        values, scales = quantize(np.atleast_2d(vectors), dtype)
+        return cls(values, scales)
+
+    @staticmethod
+    def concat(parts: list['EmbeddingMatrix']) -> 'EmbeddingMatrix':
+        """Stack matrices of the same storage precision."""
+        values = np.vstack([part.values for part in parts])
+        if parts[0].scales is None:
+            return EmbeddingMatrix(values)
+        return EmbeddingMatrix(values, np.concatenate([part.scales for part in parts]))
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def storage(self) -> str:
+        """Storage precision name (float32, float16 or int8)."""
+        return self.values.dtype.name
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, rows) -> np.ndarray:
+        return dequantize(self.values[rows], None if self.scales is None else self.scales[rows])
+
+    def __matmul__(self, other: np.ndarray) -> np.ndarray:
+        if self.scales is None and self.values.dtype == np.float32:
+            return self.values @ other
+        out = np.empty((len(self),) + np.shape(other)[1:], dtype=np.float32)
+        for start in range(0, len(self), self.BLOCK_ROWS):
+            stop = start + self.BLOCK_ROWS
+            out[start:stop] = self[start:stop] @ other
+        return out
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        decoded = self[:]
+        return decoded if dtype is None else decoded.astype(dtype)
+
+    def take(self, rows) -> 'EmbeddingMatrix':
+        """Select rows (index array or boolean mask) without decoding them."""
+        return EmbeddingMatrix(
+            self.values[rows], None if self.scales is None else self.scales[rows]
+        )
+
+    def as_storage(self, dtype: Optional[str] = None) -> 'EmbeddingMatrix':
+        """This matrix re-encoded in another precision (self if unchanged)."""
+        if storage_dtype(dtype) == self.values.dtype:
+            return self
+        return EmbeddingMatrix.from_vectors(self[:], dtype)
+
+    def score_error_bound(self) -> float:
+        """
+        Upper bound on |q.x - q.x_stored| for any unit query q, against
+        the float32 vectors this matrix was encoded from.
+
+        The score error is at most the reconstruction error ||x - x_stored||:
+        half a quantization step per component for int8, half an ulp
+        (2^-11 relative, 2^-25 absolute for subnormals) for float16.
+        Two items whose float32 scores differ by more than twice this
+        bound keep their order.
+        """
+        if len(self) == 0 or self.storage == 'float32':
+            return 0.0
+        dim = self.shape[1]
+        if self.scales is not None:
+            return float(self.scales.max()) * math.sqrt(dim) / 2
+        peak_norm = max(
+            float(np.linalg.norm(self[start:start + self.BLOCK_ROWS], axis=1).max())
+            for start in range(0, len(self), self.BLOCK_ROWS)
+        )
+        return 2.0 ** -11 * peak_norm + 2.0 ** -25 * math.sqrt(dim)
+
+
+class OverlayMatrix:
+    """
+    A base EmbeddingMatrix with tombstoned rows hidden and extra rows
+    appended, without copying the base.
+
+    Row order is the live base rows followed by the added rows. Products
+    score the base (memory-mapped or not) and the added rows separately
+    and drop dead base rows from the result, so a pending delta log keeps
+    the base in the shared page cache. Supports the same reads as
+    EmbeddingMatrix; as_storage() materializes it for compaction.
+    """
+
+    def __init__(self, base: EmbeddingMatrix, live: np.ndarray, added: EmbeddingMatrix):
+        self.base = base
+        self.added = added
+        live = np.asarray(live, dtype=bool)
+        self.live_rows = None if live.all() else np.flatnonzero(live)
+        self.live_count = len(base) if self.live_rows is None else len(self.live_rows)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (self.live_count + len(self.added), self.base.shape[1])
+
+    @property
+    def storage(self) -> str:
+        return self.base.storage
+
+    @property
+    def nbytes(self) -> int:
+        return self.base.nbytes + self.added.nbytes
+
+    def __len__(self) -> int:
+        return self.live_count + len(self.added)
+
+    def _base_rows(self, rows: np.ndarray) -> np.ndarray:
+        return rows if self.live_rows is None else self.live_rows[rows]
+
+    def __getitem__(self, rows) -> np.ndarray:
+        if isinstance(rows, slice):
+            index = np.arange(*rows.indices(len(self)))
+        else:
+            index = np.asarray(rows)
+            if index.dtype == bool:
+                index = np.flatnonzero(index)
+            index = np.where(index < 0, index + len(self), index)
+        scalar = index.ndim == 0
+        index = np.atleast_1d(index)
+
+        out = np.empty((len(index), self.shape[1]), dtype=np.float32)
+        in_base = index < self.live_count
+        if in_base.any():
+            out[in_base] = self.base[self._base_rows(index[in_base])]
+        if not in_base.all():
+            out[~in_base] = self.added[index[~in_base] - self.live_count]
+        return out[0] if scalar else out
+
+    def __matmul__(self, other: np.ndarray) -> np.ndarray:
+        base_scores = self.base @ other
+        if self.live_rows is not None:
+            base_scores = base_scores[self.live_rows]
+        if len(self.added) == 0:
+            return base_scores
+        return np.concatenate([base_scores, self.added @ other])
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        decoded = self[:]
+        return decoded if dtype is None else decoded.astype(dtype)
+
+    def take(self, rows) -> EmbeddingMatrix:
+        """Select rows (index array or boolean mask) into a standalone matrix."""
+        return self.as_storage().take(rows)
+
+    def as_storage(self, dtype: Optional[str] = None) -> EmbeddingMatrix:
+        """The merged rows as one EmbeddingMatrix (copies the live base rows)."""
+        base = self.base if self.live_rows is None else self.base.take(self.live_rows)
+        return EmbeddingMatrix.concat([base, self.added]).as_storage(dtype)
+
+    def score_error_bound(self) -> float:
+        return max(self.base.score_error_bound(), self.added.score_error_bound())
@@ -6,14 +6,19 @@ Similarity search and retrieval with multi-factor scoring.
 
 import os
 import json
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from typing import Optional
 import numpy as np
 
 from .config import Config
-from .embedder import embed_query
-from .indexer import load_index
+from .embedder import embed_query, embed_queries_batch
+from .indexer import get_cached_index, load_ann_searcher, load_lexical_index
+from .lexical import LexicalIndex
+from .catalog import get_catalog_version, retrieval_counts
 from .utils import parse_chunk_id, load_chunk_content
 
 
@@ -106,12 +111,140 @@ def extract_query_keywords(query: str) -> list[str]:
     return [w for w in words if w not in stopwords]
 
 
+def _parse_epoch(created: Optional[str]) -> float:
+    """Convert an ISO creation date to a POSIX timestamp (NaN if unknown)."""
+    if not created:
+        return np.nan
+    try:
+        return datetime.fromisoformat(created.replace('Z', '+00:00')).timestamp()
+    except (ValueError, TypeError, AttributeError):
+        return np.nan
+
+
+@dataclass
+class ScoringColumns:
+    """
+    Per-item scoring factors laid out as arrays aligned with index rows.
+
+    Built once when an index is loaded so each query scores the whole
+    index with array operations instead of a Python loop per item.
+    With a lexical index the keyword factor is BM25 over full text and
+    the frontmatter keyword postings are not built.
+    """
+    created_epoch: np.ndarray     # float64 POSIX time, NaN when unknown
+    retrieval_count: np.ndarray   # float64
+    keyword_counts: np.ndarray    # int32 unique keywords per row
+    keyword_postings: dict        # keyword -> int32 array of row positions
+    lexical: Optional[LexicalIndex] = None
+
+    @classmethod
+    def from_metadata(
+        cls,
+        ids: list[str],
+        metadata: dict,
+        lexical: Optional[LexicalIndex] = None
+    ) -> 'ScoringColumns':
+        """Build columns from an index's ID list and metadata dict (and lexical index)."""
+        n = len(ids)
+        created_epoch = np.full(n, np.nan, dtype=np.float64)
+        retrieval_count = np.zeros(n, dtype=np.float64)
+        keyword_counts = np.zeros(n, dtype=np.int32)
+        postings = {}
+
+        for row, item_id in enumerate(ids):
+            meta = metadata.get(item_id, {})
+            created_epoch[row] = _parse_epoch(meta.get('created'))
+
+            try:
+                retrieval_count[row] = float(meta.get('retrieval_count') or 0)
+            except (ValueError, TypeError):
+                pass
+
+            if lexical is not None:
+                continue
+            keywords = {str(k).lower() for k in (meta.get('keywords') or [])}
+            keyword_counts[row] = len(keywords)
+            for keyword in keywords:
+                postings.setdefault(keyword, []).append(row)
+
+        keyword_postings = {
+            keyword: np.array(rows, dtype=np.int32)
+            for keyword, rows in postings.items()
+        }
+        return cls(created_epoch, retrieval_count, keyword_counts, keyword_postings, lexical)
+
+
+def compute_keyword_scores(query_keywords: list[str], columns: ScoringColumns) -> np.ndarray:
+    """
+    Keyword factor for every row of an index, between 0 and 1.
+
+    BM25 over the lexical index, divided by the query's BM25 upper bound
+    (LexicalIndex.max_score), so scores are comparable across queries and
+    a weak match of one rare term stays low; without a lexical index,
+    vectorized compute_keyword_overlap against frontmatter keywords.
+    """
+    n = len(columns.keyword_counts)
+    scores = np.zeros(n, dtype=np.float64)
+    query_set = set(k.lower() for k in query_keywords)
+    if not query_set:
+        return scores
+
+    if columns.lexical is not None:
+        scores = columns.lexical.scores(query_set, Config.BM25_K1, Config.BM25_B)
+        bound = columns.lexical.max_score(query_set, Config.BM25_K1)
+        return scores / bound if bound > 0 else scores
+
+    overlap = np.zeros(n, dtype=np.float64)
+    for keyword in query_set:
+        rows = columns.keyword_postings.get(keyword)
+        if rows is not None:
+            overlap[rows] += 1
+
+    max_possible = np.minimum(len(query_set), columns.keyword_counts)
+    np.divide(overlap, max_possible, out=scores, where=max_possible > 0)
+    return scores
+
+
+def compute_recency_scores(created_epoch: np.ndarray, now: Optional[float] = None) -> np.ndarray:
+    """Vectorized compute_recency_score over POSIX creation timestamps."""
+    if now is None:
+        now = time.time()
+
+    unknown = np.isnan(created_epoch)
+    days_old = np.floor((now - np.where(unknown, now, created_epoch)) / 86400.0)
+    # Future-dated items count as brand new
+    days_old = np.maximum(days_old, 0.0)
+
+    scores = np.clip(1.0 / (1.0 + days_old / 30.0), 0.0, 1.0)
+    scores[unknown] = 0.5
+    return scores
+
+
+def compute_frequency_scores(retrieval_count: np.ndarray) -> np.ndarray:
+    """Vectorized compute_frequency_score over retrieval counts."""
+    max_expected = 100
+    scores = np.log1p(np.maximum(retrieval_count, 0.0)) / np.log1p(max_expected)
+    return np.clip(scores, 0.0, 1.0)
+
+
+def _top_k_indices(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    n = len(scores)
+    if k is None or k >= n:
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
 def retrieve(
     query: str,
     project_root: str = ".",
     top_k: Optional[int] = None,
     index_type: str = "both",
-    include_content: bool = False
+    include_content: bool = False,
+    indices: Optional[dict] = None
 ) -> list[dict]:
     """
     Retrieve relevant chunks/memories for a query.
@@ -122,6 +255,9 @@ def retrieve(
         top_k: Number of results to return (default from config)
         index_type: What to search ("chunks", "memories", or "both")
         include_content: Whether to include full content in results
+        indices: Optional preloaded indices by type, each as returned by
+            load_index() and optionally followed by its ScoringColumns;
+            missing types come from the in-process index cache
 
     Returns:
         List of results sorted by score descending
@@ -132,7 +268,7 @@ def retrieve(
         top_k = Config.RETRIEVAL_TOP_K
 
     # Embed query
-    query_embedding = embed_query(query)
+    query_embedding = _embed_query_cached(query)
     query_keywords = extract_query_keywords(query)
 
     all_results = []
@@ -140,10 +276,11 @@ def retrieve(
     # Search chunks
     if index_type in ("chunks", "both"):
         try:
-            embeddings, ids, metadata = load_index(project_root, "chunks")
+            embeddings, ids, metadata, columns = _get_index(project_root, "chunks", indices)
             chunk_results = _search_index(
                 query_embedding, query_keywords, embeddings, ids, metadata,
-                project_root, "chunks", include_content
+                project_root, "chunks", include_content, top_k, columns,
+                _get_searcher(project_root, "chunks", indices)
             )
             all_results.extend(chunk_results)
         except FileNotFoundError:
@@ -152,10 +289,11 @@ def retrieve(
     # Search memories
     if index_type in ("memories", "both"):
         try:
-            embeddings, ids, metadata = load_index(project_root, "memories")
+            embeddings, ids, metadata, columns = _get_index(project_root, "memories", indices)
             mem_results = _search_index(
                 query_embedding, query_keywords, embeddings, ids, metadata,
-                project_root, "memories", include_content
+                project_root, "memories", include_content, top_k, columns,
+                _get_searcher(project_root, "memories", indices)
             )
             all_results.extend(mem_results)
         except FileNotFoundError:
@@ -166,6 +304,237 @@ def retrieve(
     return all_results[:top_k]
 
 
+def retrieve_many(
+    queries: list[str],
+    project_root: str = ".",
+    top_k: Optional[int] = None,
+    index_type: str = "both",
+    include_content: bool = False,
+    indices: Optional[dict] = None
+) -> list[list[dict]]:
+    """
+    Retrieve results for many queries at once.
+
+    All queries are embedded in one batched encode and scored against
+    each index with a matrix-matrix product (in blocks of
+    RETRIEVAL_QUERY_BLOCK queries), rather than one model call and one
+    matrix-vector product per query.
+
+    Args:
+        queries: Search queries
+        project_root: Project root directory
+        top_k: Number of results per query (default from config)
+        index_type: What to search ("chunks", "memories", or "both")
+        include_content: Whether to include full content in results
+        indices: Optional preloaded indices, as for retrieve()
+
+    Returns:
+        One result list per query, in query order, each sorted by score
+        descending exactly as retrieve() would return it
+    """
+    project_root = os.path.abspath(project_root)
+
+    if top_k is None:
+        top_k = Config.RETRIEVAL_TOP_K
+    if not queries:
+        return []
+
+    query_embeddings = _embed_queries_cached(queries)
+    query_keywords = [extract_query_keywords(q) for q in queries]
+    all_results = [[] for _ in queries]
+
+    index_types = [t for t in ("chunks", "memories") if index_type in (t, "both")]
+    for current_type in index_types:
+        try:
+            embeddings, ids, metadata, columns = _get_index(project_root, current_type, indices)
+        except FileNotFoundError:
+            continue
+        if len(ids) == 0:
+            continue
+
+        # Query-independent factors are shared by every query
+        recency_scores = compute_recency_scores(columns.created_epoch)
+        frequency_scores = compute_frequency_scores(columns.retrieval_count)
+
+        searcher = _get_searcher(project_root, current_type, indices)
+        if searcher is not None:
+            # Large index: score each query's ANN candidates only
+            for q, query_embedding in enumerate(query_embeddings):
+                keyword_scores = compute_keyword_scores(query_keywords[q], columns)
+                rows = _candidate_rows(searcher, query_embedding, keyword_scores, columns, top_k)
+                all_results[q].extend(_rank_results(
+                    np.dot(embeddings[rows], query_embedding).astype(np.float64), keyword_scores,
+                    recency_scores, frequency_scores, ids, metadata,
+                    project_root, current_type, include_content, top_k, rows
+                ))
+            continue
+
+        block = max(1, Config.RETRIEVAL_QUERY_BLOCK)
+        for start in range(0, len(queries), block):
+            # (N x d) . (d x Q) -> one column of cosine similarities per query
+            semantic_block = embeddings @ query_embeddings[start:start + block].T
+            for offset in range(semantic_block.shape[1]):
+                q = start + offset
+                all_results[q].extend(_rank_results(
+                    semantic_block[:, offset].astype(np.float64),
+                    compute_keyword_scores(query_keywords[q], columns),
+                    recency_scores, frequency_scores, ids, metadata,
+                    project_root, current_type, include_content, top_k
+                ))
+
+    for results in all_results:
+        results.sort(key=lambda x: x['score'], reverse=True)
+        del results[top_k:]
+    return all_results
+
+
+def _get_index(
+    project_root: str,
+    index_type: str,
+    indices: Optional[dict]
+) -> tuple[np.ndarray, list[str], dict, ScoringColumns]:
+    """
+    Return (embeddings, ids, metadata, columns) for an index.
+
+    Uses the preloaded index if one was supplied, else the in-process
+    index cache, which keeps the scoring columns alongside the index.
+    """
+    if indices and indices.get(index_type) is not None:
+        index = tuple(indices[index_type])
+        if len(index) == 4:
+            return index
+        embeddings, ids, metadata = index
+        return embeddings, ids, metadata, ScoringColumns.from_metadata(ids, metadata)
+
+    cached = get_cached_index(project_root, index_type)
+    columns = cached.derive(
+        'scoring_columns',
+        lambda: ScoringColumns.from_metadata(
+            cached.ids, cached.metadata, load_lexical_index(project_root, index_type, cached.ids)
+        )
+    )
+    if index_type == "memories":
+        _refresh_retrieval_counts(project_root, cached, columns)
+    return cached.embeddings, cached.ids, cached.metadata, columns
+
+
+def _refresh_retrieval_counts(project_root: str, cached, columns: ScoringColumns):
+    """
+    Overlay memory retrieval counts from the catalog onto cached columns.
+
+    increment_retrieval() updates only memory files and the catalog, so
+    counts change without the index changing; they are re-read whenever
+    the catalog has been written since the last overlay.
+    """
+    version = get_catalog_version(project_root)
+    if version is None or cached.derived.get('retrieval_counts_version') == version:
+        return
+    counts = retrieval_counts(project_root)
+    columns.retrieval_count = np.array(
+        [float(counts.get(item_id, fallback)) for item_id, fallback in zip(cached.ids, columns.retrieval_count)],
+        dtype=np.float64
+    )
+    cached.derived['retrieval_counts_version'] = version
+
+
+def _get_searcher(project_root: str, index_type: str, indices: Optional[dict]):
+    """
+    Return the ANN searcher for a cached index, or None to brute-force.
+
+    Preloaded indices passed by the caller are always searched exhaustively.
+    """
+    if indices and indices.get(index_type) is not None:
+        return None
+    cached = get_cached_index(project_root, index_type)
+    return cached.derive(
+        'ann_searcher',
+        lambda: load_ann_searcher(project_root, index_type, cached.ids)
+    )
+
+
+def _candidate_rows(
+    searcher,
+    query_embedding: np.ndarray,
+    keyword_scores: np.ndarray,
+    columns: ScoringColumns,
+    top_k: Optional[int]
+) -> np.ndarray:
+    """
+    Rows to score exactly for one query on an ANN-backed index.
+
+    The graph's nearest neighbours plus the strongest keyword matches
+    (the BM25_CANDIDATES best BM25 rows, or every row sharing a frontmatter
+    keyword without a lexical index), so keyword matches are not lost to
+    the approximate search. keyword_scores are the query's
+    compute_keyword_scores over every row.
+    """
+    parts = [searcher.candidates(query_embedding, top_k or Config.RETRIEVAL_TOP_K)]
+    matched = np.flatnonzero(keyword_scores)
+    if columns.lexical is not None:
+        matched = matched[_top_k_indices(keyword_scores[matched], Config.BM25_CANDIDATES)]
+    parts.append(matched)
+    return np.unique(np.concatenate(parts).astype(np.int64))
+
+
+_query_cache: OrderedDict = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def _embed_query_cached(query: str) -> np.ndarray:
+    """Embed a query, reusing recent embeddings of the same text (read-only)."""
+    with _query_cache_lock:
+        embedding = _query_cache.get(query)
+        if embedding is not None:
+            _query_cache.move_to_end(query)
+            return embedding
+
+    embedding = embed_query(query)
+    if Config.QUERY_CACHE_SIZE > 0:
+        embedding.setflags(write=False)
+        with _query_cache_lock:
+            _query_cache[query] = embedding
+            while len(_query_cache) > Config.QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+    return embedding
+
+
+def _embed_queries_cached(queries: list[str]) -> np.ndarray:
+    """Embed queries as a matrix, sending only uncached texts to the model (in one batch)."""
+    result = np.zeros((len(queries), Config.EMBEDDING_DIMENSIONS), dtype=np.float32)
+    missing = {}
+    with _query_cache_lock:
+        for i, query in enumerate(queries):
+            embedding = _query_cache.get(query)
+            if embedding is not None:
+                _query_cache.move_to_end(query)
+                result[i] = embedding
+            else:
+                missing.setdefault(query, []).append(i)
+
+    if missing:
+        texts = list(missing)
+        embeddings = embed_queries_batch(texts)
+        for query, embedding in zip(texts, embeddings):
+            result[missing[query]] = embedding
+
+        if Config.QUERY_CACHE_SIZE > 0:
+            with _query_cache_lock:
+                for query, embedding in zip(texts, embeddings):
+                    embedding = embedding.copy()
+                    embedding.setflags(write=False)
+                    _query_cache[query] = embedding
+                while len(_query_cache) > Config.QUERY_CACHE_SIZE:
+                    _query_cache.popitem(last=False)
+
+    return result
+
+
+def clear_query_cache():
+    """Forget cached query embeddings (e.g. after switching models)."""
+    with _query_cache_lock:
+        _query_cache.clear()
+
+
 def _search_index(
     query_embedding: np.ndarray,
     query_keywords: list[str],
@@ -174,44 +543,86 @@ def _search_index(
     metadata: dict,
     project_root: str,
     index_type: str,
-    include_content: bool
+    include_content: bool,
+    top_k: Optional[int] = None,
+    columns: Optional[ScoringColumns] = None,
+    searcher=None
 ) -> list[dict]:
-    """Search a single index and return scored results."""
+    """
+    Search a single index and return the top_k scored results.
+
+    All four scoring factors are computed as whole-array operations;
+    result dicts are only built for the winning rows. With an ANN
+    searcher only its candidate rows are scored.
+    """
+    if len(ids) == 0:
+        return []
+    if columns is None:
+        columns = ScoringColumns.from_metadata(ids, metadata)
+
+    keyword_scores = compute_keyword_scores(query_keywords, columns)
+    rows = None
+    if searcher is not None:
+        rows = _candidate_rows(searcher, query_embedding, keyword_scores, columns, top_k)
+
     # Compute cosine similarities (embeddings are normalized)
-    similarities = np.dot(embeddings, query_embedding)
+    if rows is None:
+        semantic_scores = (embeddings @ query_embedding).astype(np.float64)
+    else:
+        semantic_scores = np.dot(embeddings[rows], query_embedding).astype(np.float64)
+    recency_scores = compute_recency_scores(columns.created_epoch)
+    frequency_scores = compute_frequency_scores(columns.retrieval_count)
+
+    return _rank_results(
+        semantic_scores, keyword_scores, recency_scores, frequency_scores,
+        ids, metadata, project_root, index_type, include_content, top_k, rows
+    )
+
+
+def _rank_results(
+    semantic_scores: np.ndarray,
+    keyword_scores: np.ndarray,
+    recency_scores: np.ndarray,
+    frequency_scores: np.ndarray,
+    ids: list[str],
+    metadata: dict,
+    project_root: str,
+    index_type: str,
+    include_content: bool,
+    top_k: Optional[int],
+    rows: Optional[np.ndarray] = None
+) -> list[dict]:
+    """
+    Combine per-row scoring factors and build result dicts for the top_k rows.
 
-    results = []
-    for i, (chunk_id, sim) in enumerate(zip(ids, similarities)):
-        meta = metadata.get(chunk_id, {})
-
-        # Extract scoring factors
-        chunk_keywords = meta.get('keywords', [])
-        created = meta.get('created')
-        retrieval_count = meta.get('retrieval_count', 0)
-
-        # Compute component scores
-        semantic_score = float(sim)
-        keyword_score = compute_keyword_overlap(query_keywords, chunk_keywords)
-        recency_score = compute_recency_score(created)
-        frequency_score = compute_frequency_score(retrieval_count)
-
-        # Compute weighted final score
-        final_score = (
-            Config.SCORE_SEMANTIC * semantic_score +
-            Config.SCORE_KEYWORD * keyword_score +
-            Config.SCORE_RECENCY * recency_score +
-            Config.SCORE_FREQUENCY * frequency_score
-        )
+    When rows is given, semantic_scores covers only those index rows;
+    the other factors always cover every row.
+    """
+    if rows is not None:
+        keyword_scores = keyword_scores[rows]
+        recency_scores = recency_scores[rows]
+        frequency_scores = frequency_scores[rows]
+
+    # Compute weighted final scores
+    final_scores = (
+        Config.SCORE_SEMANTIC * semantic_scores +
+        Config.SCORE_KEYWORD * keyword_scores +
+        Config.SCORE_RECENCY * recency_scores +
+        Config.SCORE_FREQUENCY * frequency_scores
+    )
 
+    results = []
+    for i in _top_k_indices(final_scores, top_k):
+        chunk_id = ids[i if rows is None else rows[i]]
         result = {
             'id': chunk_id,
             'type': index_type,
-            'score': round(final_score, 4),
-            'semantic_score': round(semantic_score, 4),
-            'keyword_score': round(keyword_score, 4),
-            'recency_score': round(recency_score, 4),
-            'frequency_score': round(frequency_score, 4),
-            'metadata': meta
+            'score': round(float(final_scores[i]), 4),
+            'semantic_score': round(float(semantic_scores[i]), 4),
+            'keyword_score': round(float(keyword_scores[i]), 4),
+            'recency_score': round(float(recency_scores[i]), 4),
+            'frequency_score': round(float(frequency_scores[i]), 4),
+            'metadata': metadata.get(chunk_id, {})
         }
 
         # Optionally include content
@@ -0,0 +1,602 @@
+"""
+Cortex Segment Store
+
+Append-only chunk storage: one log per domain instead of an .md and an
+.npy file per chunk (CORTEX_CHUNK_STORE=segments).
+
+    {DOMAIN}/segment.log  24-byte header (b'CSEG', version, generation),
+                          then records of
+                          <kind u8, saved_at f64, id_len u16, md_len u32, npy_len u32>
+                          followed by the ID, the markdown and the .npy bytes
+    {DOMAIN}/segment.idx  snapshot of the offset index:
+                          {"version", "generation", "end",
+                           "entries": {id: [offset, md_len, npy_len, saved_at]}}
+
+A put record holds exactly what the .md and .npy files would; a delete
+record tombstones an ID. The offset index is the snapshot plus a replay
+of the records after it, so a stale or missing snapshot only costs a
+longer replay. A torn record at the tail is ignored and overwritten by
+the next append. Compaction copies the live records into a new log
+under a new generation; it runs on its own once dead records make up
+CORTEX_SEGMENT_COMPACT_RATIO of a log larger than
+CORTEX_SEGMENT_COMPACT_MIN_BYTES.
+
+Chunk files and segment records can coexist. Readers consult both, and
+a file shadows a record with the same ID, so a project keeps working
+when the store setting changes; `cortex segments --pack` moves files
+into the logs and `--export` writes the .md view back out on demand.
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import struct
+import threading
+from typing import Iterator, Optional
+import numpy as np
+
+from .config import Config
+from .quantization import save_embedding, load_embedding
+from .utils import file_lock, chunk_id_sort_key
+
+
+VERSION = 1
+MAGIC = b'CSEG'
+HEADER = struct.Struct('<4sH2x16s')   # magic, version, generation
+RECORD = struct.Struct('<BdHII')      # kind, saved_at, id_len, md_len, npy_len
+PUT, DELETE = 1, 2
+
+LOG_FILE = 'segment.log'
+INDEX_FILE = 'segment.idx'
+LOCK_FILE = 'segment.lock'
+
+CHUNK_STORES = ('files', 'segments')
+SNAPSHOT_EVERY = 1024  # Appended records between offset index snapshots
+PACK_BATCH = 256       # Chunk files moved into a log per append
+
+
+def _record_size(chunk_id: str, md_len: int, npy_len: int) -> int:
+    return RECORD.size + len(chunk_id.encode('utf-8')) + md_len + npy_len
+
+
+class SegmentStore:
+    """
+    The segment log of one domain directory.
+
+    Use open() to share one instance, and its offset index, per
+    directory within a process. Reads take no file lock; appends and
+    compaction hold the directory's segment.lock.
+    """
+
+    _instances: dict[str, 'SegmentStore'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, domain_path: str):
+        self.domain_path = os.path.abspath(domain_path)
+        self.log_path = os.path.join(self.domain_path, LOG_FILE)
+        self.index_path = os.path.join(self.domain_path, INDEX_FILE)
+        self.lock_path = os.path.join(self.domain_path, LOCK_FILE)
+
+        self.entries: dict[str, tuple[int, int, int, float]] = {}  # ID -> (payload offset, md_len, npy_len, saved_at)
+        self.generation: Optional[bytes] = None
+        self.end = 0         # Offset after the last complete record
+        self.live_bytes = 0  # Bytes of records still in entries
+        self.pending = 0     # Records replayed or appended since the snapshot
+        self._stat = None    # (inode, size, mtime_ns) the entries reflect
+        self._lock = threading.RLock()
+
+    @classmethod
+    def open(cls, domain_path: str) -> 'SegmentStore':
+        """The shared store of a domain directory (the log need not exist yet)."""
+        path = os.path.abspath(domain_path)
+        with cls._instances_lock:
+            store = cls._instances.get(path)
+            if store is None:
+                store = cls._instances[path] = cls(path)
+            return store
+
+    @property
+    def dead_bytes(self) -> int:
+        """Bytes of overwritten and deleted records compaction would reclaim."""
+        with self._lock:
+            self._refresh()
+            return max(0, self.end - HEADER.size - self.live_bytes) if self.generation else 0
+
+    # ── Reading ──
+
+    def _refresh(self):
+        """Bring the offset index up to date with the log (caller holds self._lock)."""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            self.entries, self.generation, self._stat = {}, None, None
+            self.end = self.live_bytes = self.pending = 0
+            return
+
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if key == self._stat:
+            return
+        with open(self.log_path, 'rb') as f:
+            magic, version, generation = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a Cortex segment log (version {VERSION}): {self.log_path}")
+            if generation != self.generation:
+                self._load_snapshot(generation, stat.st_size)
+            self._replay(f, stat.st_size)
+        self._stat = key
+
+    def _load_snapshot(self, generation: bytes, size: int):
+        """Start from the snapshot if it belongs to this log generation, else from the header."""
+        self.entries, self.generation = {}, generation
+        self.end, self.pending = HEADER.size, 0
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == VERSION and data.get('generation') == generation.hex() \
+                    and data.get('end', size + 1) <= size:
+                self.entries = {chunk_id: tuple(entry) for chunk_id, entry in data['entries'].items()}
+                self.end = data['end']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            pass
+        self.live_bytes = sum(
+            _record_size(chunk_id, md_len, npy_len) for chunk_id, (_, md_len, npy_len, _) in self.entries.items()
+        )
+
+    def _replay(self, f, size: int):
+        """Apply the complete records after self.end; a torn tail is left for the next append."""
+        f.seek(self.end)
+        while self.end + RECORD.size <= size:
+            kind, saved_at, id_len, md_len, npy_len = RECORD.unpack(f.read(RECORD.size))
+            payload = self.end + RECORD.size + id_len
+            record_end = payload + md_len + npy_len
+            if kind not in (PUT, DELETE):
+                raise ValueError(f"Corrupt segment log at offset {self.end}: {self.log_path}")
+            if record_end > size:
+                break
+            chunk_id = f.read(id_len).decode('utf-8')
+            self._apply(kind, chunk_id, (payload, md_len, npy_len, saved_at))
+            f.seek(record_end)
+            self.end = record_end
+            self.pending += 1
+
+    def _apply(self, kind: int, chunk_id: str, entry: tuple[int, int, int, float]):
+        old = self.entries.pop(chunk_id, None)
+        if old is not None:
+            self.live_bytes -= _record_size(chunk_id, old[1], old[2])
+        if kind == PUT:
+            self.entries[chunk_id] = entry
+            self.live_bytes += _record_size(chunk_id, entry[1], entry[2])
+
+    def _open_log(self):
+        """Open the log the offset index describes (retrying if it was compacted meanwhile)."""
+        while True:
+            self._refresh()
+            if self.generation is None:
+                return None
+            f = open(self.log_path, 'rb')
+            if os.fstat(f.fileno()).st_ino == self._stat[0]:
+                return f
+            f.close()
+
+    def ids(self) -> dict[str, float]:
+        """ID -> saved_at of every live record."""
+        with self._lock:
+            self._refresh()
+            return {chunk_id: entry[3] for chunk_id, entry in self.entries.items()}
+
+    def get(self, chunk_id: str, embedding: bool = True) -> Optional[tuple[str, Optional[bytes]]]:
+        """
+        Markdown and .npy bytes of one record.
+
+        Returns:
+            Tuple of (markdown, npy bytes or None if not requested), or
+            None if the ID has no live record
+        """
+        with self._lock:
+            f = self._open_log()
+            if f is None or chunk_id not in self.entries:
+                if f is not None:
+                    f.close()
+                return None
+            payload, md_len, npy_len, _ = self.entries[chunk_id]
+        with f:
+            f.seek(payload)
+            data = f.read(md_len + (npy_len if embedding else 0))
+        return data[:md_len].decode('utf-8'), data[md_len:] if embedding else None
+
+    def scan(self, embeddings: bool = True) -> Iterator[tuple[str, str, Optional[bytes]]]:
+        """
+        Every live record as (ID, markdown, npy bytes or None), read
+        sequentially in log order. Without embeddings only the markdown
+        is read; the .npy payloads are seeked past.
+        """
+        with self._lock:
+            f = self._open_log()
+            if f is None:
+                return
+            entries = sorted(self.entries.items(), key=lambda item: item[1][0])
+        with f:
+            for chunk_id, (payload, md_len, npy_len, _) in entries:
+                if f.tell() != payload:
+                    f.seek(payload)
+                markdown = f.read(md_len).decode('utf-8')
+                if embeddings:
+                    yield chunk_id, markdown, f.read(npy_len)
+                else:
+                    f.seek(npy_len, os.SEEK_CUR)
+                    yield chunk_id, markdown, None
+
+    # ── Writing ──
+
+    def _create(self):
+        """Start an empty log under a new generation (caller holds the locks)."""
+        os.makedirs(self.domain_path, exist_ok=True)
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, uuid.uuid4().bytes))
+        os.replace(tmp_path, self.log_path)
+
+    def _append(self, records: list[tuple[int, str, bytes, bytes, float]]):
+        """Append (kind, ID, markdown, npy, saved_at) records (caller holds the locks)."""
+        if not records:
+            return
+        if not os.path.exists(self.log_path):
+            self._create()
+        self._refresh()
+
+        parts = []
+        applied = []
+        offset = self.end
+        for kind, chunk_id, markdown, npy, saved_at in records:
+            id_bytes = chunk_id.encode('utf-8')
+            parts += [RECORD.pack(kind, saved_at, len(id_bytes), len(markdown), len(npy)), id_bytes, markdown, npy]
+            payload = offset + RECORD.size + len(id_bytes)
+            applied.append((kind, chunk_id, (payload, len(markdown), len(npy), saved_at)))
+            offset = payload + len(markdown) + len(npy)
+
+        with open(self.log_path, 'r+b') as f:
+            f.truncate(self.end)  # Drop a torn tail
+            f.seek(self.end)
+            f.write(b''.join(parts))
+            stat = os.fstat(f.fileno())
+
+        for kind, chunk_id, entry in applied:
+            self._apply(kind, chunk_id, entry)
+        self.end = offset
+        self.pending += len(records)
+        self._stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+        if self.pending >= SNAPSHOT_EVERY:
+            self._write_snapshot()
+        self._maybe_compact()
+
+    def _write_snapshot(self):
+        data = {
+            'version': VERSION,
+            'generation': self.generation.hex(),
+            'end': self.end,
+            'entries': {chunk_id: list(entry) for chunk_id, entry in self.entries.items()},
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+        self.pending = 0
+
+    def put(self, records: list[tuple[str, str, bytes]], saved_at: Optional[list[float]] = None):
+        """
+        Append (ID, markdown, npy bytes) records; a record replaces any
+        earlier one with the same ID.
+
+        Args:
+            records: Records to append
+            saved_at: Modification time per record (default: now)
+        """
+        now = time.time()
+        times = saved_at or [now] * len(records)
+        with self._lock, file_lock(self.lock_path):
+            self._append([
+                (PUT, chunk_id, markdown.encode('utf-8'), npy, at)
+                for (chunk_id, markdown, npy), at in zip(records, times)
+            ])
+
+    def update_markdown(self, chunk_id: str, markdown: str) -> bool:
+        """Replace a record's markdown, keeping its embedding. Returns False if it has no record."""
+        with self._lock, file_lock(self.lock_path):
+            record = self.get(chunk_id)
+            if record is None:
+                return False
+            self._append([(PUT, chunk_id, markdown.encode('utf-8'), record[1], time.time())])
+        return True
+
+    def delete(self, chunk_ids: list[str]) -> list[str]:
+        """Tombstone records. Returns the IDs that had one."""
+        with self._lock:
+            self._refresh()
+            if not any(chunk_id in self.entries for chunk_id in chunk_ids):
+                return []
+            with file_lock(self.lock_path):
+                self._refresh()
+                removed = [chunk_id for chunk_id in dict.fromkeys(chunk_ids) if chunk_id in self.entries]
+                now = time.time()
+                self._append([(DELETE, chunk_id, b'', b'', now) for chunk_id in removed])
+        return removed
+
+    def _maybe_compact(self):
+        """Compact a log that is mostly dead records (caller holds the locks)."""
+        dead = self.end - HEADER.size - self.live_bytes
+        if self.end < Config.SEGMENT_COMPACT_MIN_BYTES or dead <= Config.SEGMENT_COMPACT_RATIO * self.end:
+            return
+        try:
+            self._compact()
+        except PermissionError:
+            pass  # Log open elsewhere on Windows; retried on a later append
+
+    def _compact(self) -> int:
+        """Copy live records into a new log generation (caller holds the locks)."""
+        self._refresh()
+        if self.generation is None:
+            return 0
+        before = self.end
+        generation = uuid.uuid4().bytes
+        entries = {}
+        offset = HEADER.size
+
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        with open(self.log_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            dst.write(HEADER.pack(MAGIC, VERSION, generation))
+            for chunk_id, (payload, md_len, npy_len, saved_at) in sorted(self.entries.items(), key=lambda item: item[1][0]):
+                src.seek(payload)
+                id_bytes = chunk_id.encode('utf-8')
+                dst.write(RECORD.pack(PUT, saved_at, len(id_bytes), md_len, npy_len))
+                dst.write(id_bytes)
+                dst.write(src.read(md_len + npy_len))
+                entries[chunk_id] = (offset + RECORD.size + len(id_bytes), md_len, npy_len, saved_at)
+                offset += _record_size(chunk_id, md_len, npy_len)
+        os.replace(tmp_path, self.log_path)
+
+        stat = os.stat(self.log_path)
+        self.entries, self.generation, self.end, self.live_bytes = entries, generation, offset, offset - HEADER.size
+        self._stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        self._write_snapshot()
+        return before - offset
+
+    def compact(self) -> int:
+        """
+        Rewrite the log without dead records.
+
+        Returns:
+            Bytes reclaimed
+        """
+        with self._lock, file_lock(self.lock_path):
+            return self._compact()
+
+
+# ── Chunk access across files and segment logs ──
+
+def chunk_store() -> str:
+    """
+    The configured store for new chunks.
+
+    Raises:
+        ValueError: If CORTEX_CHUNK_STORE is not files or segments
+    """
+    if Config.CHUNK_STORE not in CHUNK_STORES:
+        raise ValueError(f"Unknown chunk store: {Config.CHUNK_STORE} (expected files or segments)")
+    return Config.CHUNK_STORE
+
+
+def embedding_bytes(vector: np.ndarray) -> bytes:
+    """An embedding encoded exactly as save_embedding() writes its .npy file."""
+    buffer = io.BytesIO()
+    save_embedding(buffer, vector)
+    return buffer.getvalue()
+
+
+def _decode_embedding(npy: bytes) -> np.ndarray:
+    return load_embedding(io.BytesIO(npy))
+
+
+def chunk_ids(domain_path: str) -> set[str]:
+    """IDs of every chunk in a domain directory (files and segment records)."""
+    if not os.path.isdir(domain_path):
+        return set()
+    ids = set(SegmentStore.open(domain_path).ids())
+    ids.update(f[:-3] for f in os.listdir(domain_path) if f.endswith('.md'))
+    return ids
+
+
+def chunk_mtimes(domain_path: str) -> dict[str, float]:
+    """Chunk ID -> last modification time (file mtime or record saved_at)."""
+    if not os.path.isdir(domain_path):
+        return {}
+    mtimes = SegmentStore.open(domain_path).ids()
+    with os.scandir(domain_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.md'):
+                mtimes[entry.name[:-3]] = entry.stat().st_mtime
+    return mtimes
+
+
+def read_chunk(domain_path: str, chunk_id: str, embedding: bool = True) -> Optional[tuple[str, Optional[np.ndarray]]]:
+    """
+    One chunk's markdown and embedding, from its files or its segment record.
+
+    Returns:
+        Tuple of (markdown, embedding or None if not requested), or None
+        if the chunk does not exist or its embedding file is missing
+    """
+    md_path = os.path.join(domain_path, f"{chunk_id}.md")
+    try:
+        with open(md_path, 'r', encoding='utf-8') as f:
+            markdown = f.read()
+    except FileNotFoundError:
+        record = SegmentStore.open(domain_path).get(chunk_id, embedding)
+        if record is None:
+            return None
+        return record[0], _decode_embedding(record[1]) if embedding else None
+
+    if not embedding:
+        return markdown, None
+    npy_path = os.path.join(domain_path, f"{chunk_id}.npy")
+    if not os.path.exists(npy_path):
+        return None
+    return markdown, load_embedding(npy_path)
+
+
+def iter_chunks(domain_path: str, embeddings: bool = True) -> Iterator[tuple[str, str, Optional[np.ndarray]]]:
+    """
+    Every chunk of a domain directory as (ID, markdown, embedding).
+
+    Chunk files come first, then segment records in log order (one
+    sequential read). With embeddings, a chunk file without its .npy is
+    yielded with embedding None.
+    """
+    if not os.path.isdir(domain_path):
+        return
+
+    files = sorted((f[:-3] for f in os.listdir(domain_path) if f.endswith('.md')), key=chunk_id_sort_key)
+    for chunk_id in files:
+        with open(os.path.join(domain_path, f"{chunk_id}.md"), 'r', encoding='utf-8') as f:
+            markdown = f.read()
+        embedding = None
+        npy_path = os.path.join(domain_path, f"{chunk_id}.npy")
+        if embeddings and os.path.exists(npy_path):
+            embedding = load_embedding(npy_path)
+        yield chunk_id, markdown, embedding
+
+    shadowed = set(files)
+    for chunk_id, markdown, npy in SegmentStore.open(domain_path).scan(embeddings):
+        if chunk_id not in shadowed:
+            yield chunk_id, markdown, _decode_embedding(npy) if embeddings else None
+
+
+def write_chunk(domain_path: str, chunk_id: str, markdown: str, embedding: np.ndarray):
+    """Save a chunk to the configured store."""
+    if chunk_store() == 'segments':
+        SegmentStore.open(domain_path).put([(chunk_id, markdown, embedding_bytes(embedding))])
+        return
+
+    with open(os.path.join(domain_path, f"{chunk_id}.md"), 'w', encoding='utf-8') as f:
+        f.write(markdown)
+    save_embedding(os.path.join(domain_path, f"{chunk_id}.npy"), embedding)
+
+
+def rewrite_markdown(domain_path: str, chunk_id: str, markdown: str) -> bool:
+    """Replace a chunk's markdown where it lives, keeping its embedding. Returns False if missing."""
+    md_path = os.path.join(domain_path, f"{chunk_id}.md")
+    if not os.path.exists(md_path):
+        return SegmentStore.open(domain_path).update_markdown(chunk_id, markdown)
+
+    tmp_path = f"{md_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(markdown)
+    os.replace(tmp_path, md_path)
+    return True
+
+
+def remove_chunks(domain_path: str, chunk_ids: list[str]) -> list[str]:
+    """Delete chunks from their files and the segment log. Returns the IDs that existed."""
+    removed = set(SegmentStore.open(domain_path).delete(chunk_ids))
+    for chunk_id in chunk_ids:
+        md_path = os.path.join(domain_path, f"{chunk_id}.md")
+        if os.path.exists(md_path):
+            os.remove(md_path)
+            removed.add(chunk_id)
+        npy_path = os.path.join(domain_path, f"{chunk_id}.npy")
+        if os.path.exists(npy_path):
+            os.remove(npy_path)
+    return [chunk_id for chunk_id in chunk_ids if chunk_id in removed]
+
+
+# ── Maintenance (cortex segments) ──
+
+def _domain_paths(project_root: str) -> list[str]:
+    chunks_path = Config.get_chunks_path(os.path.abspath(project_root))
+    if not os.path.exists(chunks_path):
+        return []
+    return [
+        os.path.join(chunks_path, d) for d in sorted(os.listdir(chunks_path))
+        if os.path.isdir(os.path.join(chunks_path, d))
+    ]
+
+
+def pack_chunks(project_root: str = ".") -> dict[str, int]:
+    """
+    Move chunk .md/.npy files into their domain's segment log.
+
+    Records keep the files' mtimes, so indices see nothing to update.
+    Files without an embedding are left in place.
+
+    Returns:
+        Domain -> chunks packed
+    """
+    packed = {}
+    for domain_path in _domain_paths(project_root):
+        store = SegmentStore.open(domain_path)
+        ids = sorted(
+            (f[:-3] for f in os.listdir(domain_path)
+             if f.endswith('.md') and os.path.exists(os.path.join(domain_path, f"{f[:-3]}.npy"))),
+            key=chunk_id_sort_key
+        )
+        for start in range(0, len(ids), PACK_BATCH):
+            batch = ids[start:start + PACK_BATCH]
+            records, times = [], []
+            for chunk_id in batch:
+                md_path = os.path.join(domain_path, f"{chunk_id}.md")
+                with open(md_path, 'r', encoding='utf-8') as f:
+                    markdown = f.read()
+                with open(os.path.join(domain_path, f"{chunk_id}.npy"), 'rb') as f:
+                    records.append((chunk_id, markdown, f.read()))
+                times.append(os.path.getmtime(md_path))
+            store.put(records, saved_at=times)
+            for chunk_id in batch:
+                os.remove(os.path.join(domain_path, f"{chunk_id}.md"))
+                os.remove(os.path.join(domain_path, f"{chunk_id}.npy"))
+        if ids:
+            packed[os.path.basename(domain_path)] = len(ids)
+    return packed
+
+
+def compact_chunks(project_root: str = ".") -> dict[str, int]:
+    """
+    Compact every domain's segment log.
+
+    Returns:
+        Domain -> bytes reclaimed
+    """
+    reclaimed = {}
+    for domain_path in _domain_paths(project_root):
+        if os.path.exists(os.path.join(domain_path, LOG_FILE)):
+            reclaimed[os.path.basename(domain_path)] = SegmentStore.open(domain_path).compact()
+    return reclaimed
+
+
+def export_chunks(project_root: str = ".", dest: Optional[str] = None) -> dict[str, int]:
+    """
+    Write every chunk's markdown as {dest}/{DOMAIN}/{id}.md.
+
+    Args:
+        project_root: Project root directory
+        dest: Output directory (default: .cortex/export/chunks)
+
+    Returns:
+        Domain -> chunks exported
+    """
+    project_root = os.path.abspath(project_root)
+    dest = dest or os.path.join(Config.get_cortex_path(project_root), 'export', Config.CHUNKS_DIR)
+    exported = {}
+    for domain_path in _domain_paths(project_root):
+        domain = os.path.basename(domain_path)
+        out_dir = os.path.join(dest, domain)
+        count = 0
+        for chunk_id, markdown, _ in iter_chunks(domain_path, embeddings=False):
+            os.makedirs(out_dir, exist_ok=True)
+            with open(os.path.join(out_dir, f"{chunk_id}.md"), 'w', encoding='utf-8') as f:
+                f.write(markdown)
+            count += 1
+        if count:
+            exported[domain] = count
+    return exported
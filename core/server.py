@@ -0,0 +1,289 @@
+"""
+Cortex Server
+
+Long-running local daemon that keeps the embedding model and loaded
+indices (through the indexer's in-process cache) hot between CLI
+invocations, plus the client used by the CLI.
+
+The server listens on localhost HTTP and advertises itself through
+.cortex/server.json (host, port, pid, token). Clients that cannot reach
+it raise ServerUnavailable so callers can fall back to in-process work.
+Once a request has been delivered, failures raise ServerError instead:
+the operation may already have run, so it must not be repeated.
+"""
+
+import os
+import json
+import time
+import secrets
+import threading
+import urllib.request
+import urllib.error
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .config import Config
+
+
+class ServerUnavailable(Exception):
+    """Raised when no usable Cortex server answers for a project."""
+
+
+class ServerError(Exception):
+    """Raised when the server received a request but failed it or did not answer in time."""
+
+
+# Server-side operations. Each takes (server, params) and returns JSON-able data.
+
+def _op_ping(server, params: dict) -> dict:
+    return {
+        'pid': os.getpid(),
+        'project_root': server.project_root,
+        'uptime': round(time.time() - server.started, 1)
+    }
+
+
+def _op_retrieve(server, params: dict) -> list[dict]:
+    from .retriever import retrieve
+    return retrieve(
+        params['query'],
+        server.project_root,
+        top_k=params.get('top_k'),
+        index_type=params.get('index_type', 'both'),
+        include_content=params.get('include_content', False)
+    )
+
+
+def _op_retrieve_many(server, params: dict) -> list[list[dict]]:
+    from .retriever import retrieve_many
+    return retrieve_many(
+        params['queries'],
+        server.project_root,
+        top_k=params.get('top_k'),
+        index_type=params.get('index_type', 'both'),
+        include_content=params.get('include_content', False)
+    )
+
+
+def _op_assemble(server, params: dict) -> dict:
+    from .assembler import assemble_and_render
+    markdown = assemble_and_render(
+        task=params['task'],
+        project_root=server.project_root,
+        acceptance_criteria=params.get('acceptance_criteria'),
+        current_state=params.get('current_state'),
+        instructions=params.get('instructions'),
+        budget=params.get('budget'),
+        output_path=params.get('output_path')
+    )
+    return {'markdown': markdown}
+
+
+def _op_memory_add(server, params: dict) -> dict:
+    from .memory import create_memory
+    memory = create_memory(project_root=server.project_root, **params)
+    return asdict(memory)
+
+
+def _op_memory_list(server, params: dict) -> list[dict]:
+    from .memory import list_memories
+    memories = list_memories(server.project_root, **params)
+    return [asdict(m) for m in memories]
+
+
+def _op_memory_delete(server, params: dict) -> dict:
+    from .memory import delete_memory
+    return {'deleted': delete_memory(params['memory_id'], server.project_root)}
+
+
+def _op_shutdown(server, params: dict) -> dict:
+    threading.Thread(target=server.shutdown, daemon=True).start()
+    return {'stopping': True}
+
+
+OPERATIONS = {
+    'ping': _op_ping,
+    'retrieve': _op_retrieve,
+    'retrieve_many': _op_retrieve_many,
+    'assemble': _op_assemble,
+    'memory.add': _op_memory_add,
+    'memory.list': _op_memory_list,
+    'memory.delete': _op_memory_delete,
+    'shutdown': _op_shutdown,
+}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP: POST /<operation> with a JSON object body."""
+
+    def do_POST(self):
+        if self.headers.get('X-Cortex-Token') != self.server.token:
+            self._reply(403, {'ok': False, 'error': 'invalid token'})
+            return
+
+        op = self.path.strip('/')
+        handler = OPERATIONS.get(op)
+        if handler is None:
+            self._reply(404, {'ok': False, 'error': f'unknown operation: {op}'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            params = json.loads(self.rfile.read(length) or b'{}')
+            # Model and index state are shared; serialize operations
+            with self.server.op_lock:
+                result = handler(self.server, params)
+            self._reply(200, {'ok': True, 'result': result})
+        except Exception as e:
+            self._reply(500, {'ok': False, 'error': f'{type(e).__name__}: {e}'})
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep the daemon quiet; core modules already print progress
+
+
+class CortexServer(ThreadingHTTPServer):
+    """HTTP server bound to a single project root."""
+
+    daemon_threads = True
+
+    def __init__(self, project_root: str, host: str, port: int):
+        super().__init__((host, port), _RequestHandler)
+        self.project_root = project_root
+        self.token = secrets.token_hex(16)
+        self.op_lock = threading.Lock()
+        self.started = time.time()
+
+
+def serve(
+    project_root: str = ".",
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    warm: bool = True
+):
+    """
+    Run the Cortex server until shut down.
+
+    Args:
+        project_root: Project root directory
+        host: Interface to bind (default from config, localhost)
+        port: Port to bind (default from config, 0 picks a free port)
+        warm: Load the embedding model and indices before accepting requests
+    """
+    project_root = os.path.abspath(project_root)
+    host = host or Config.SERVER_HOST
+    port = Config.SERVER_PORT if port is None else port
+
+    server = CortexServer(project_root, host, port)
+
+    if warm:
+        from .embedder import get_embedder, enable_cache
+        get_embedder().model
+        enable_cache(project_root)
+        _warm_indices(project_root)
+
+    server_file = Config.get_server_file(project_root)
+    info = {
+        'host': host,
+        'port': server.server_address[1],
+        'pid': os.getpid(),
+        'token': server.token
+    }
+    _write_server_file(server_file, info)
+
+    print(f"Cortex server listening on {host}:{info['port']} (pid {info['pid']})")
+    print(f"  Project: {project_root}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        # Only remove the discovery file if it still points at us
+        if _read_server_file(server_file).get('pid') == os.getpid():
+            os.remove(server_file)
+        print("Cortex server stopped")
+
+
+def _warm_indices(project_root: str):
+    """Load built indices into the in-process index cache."""
+    from .indexer import get_cached_index
+    for index_type in ("chunks", "memories"):
+        try:
+            get_cached_index(project_root, index_type)
+        except FileNotFoundError:
+            pass
+
+
+def _write_server_file(path: str, info: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    os.replace(tmp_path, path)
+
+
+def _read_server_file(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def call_server(project_root: str, op: str, params: Optional[dict] = None):
+    """
+    Run an operation on the project's Cortex server.
+
+    Returns:
+        The operation result
+
+    Raises:
+        ServerUnavailable: If the server is disabled, not running or
+            refuses the connection (the request was never delivered)
+        ServerError: If the operation failed server-side, or the response
+            was missing, late or unreadable (it may have run)
+    """
+    if not Config.SERVER_ENABLED:
+        raise ServerUnavailable("server disabled")
+
+    info = _read_server_file(Config.get_server_file(os.path.abspath(project_root)))
+    if not info:
+        raise ServerUnavailable("no server running")
+
+    url = f"http://{info['host']}:{info['port']}/{op}"
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(params or {}).encode('utf-8'),
+        headers={'Content-Type': 'application/json', 'X-Cortex-Token': info.get('token', '')},
+        method='POST'
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=Config.SERVER_TIMEOUT) as response:
+            body = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            body = json.loads(e.read())
+        except (ValueError, OSError):
+            body = {'ok': False, 'error': str(e)}
+    except urllib.error.URLError as e:
+        # Raised while connecting or sending, before the server could act
+        raise ServerUnavailable(str(e.reason))
+    except (OSError, ValueError) as e:
+        # Read timeout, dropped connection or bad body after the request went out
+        raise ServerError(str(e) or type(e).__name__)
+
+    if not body.get('ok'):
+        raise ServerError(body.get('error', 'server error'))
+    return body['result']
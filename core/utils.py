@@ -7,8 +7,16 @@ Shared helpers used across core modules.
 import os
 import re
 import json
+import time
+from contextlib import contextmanager
 from typing import Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 
 def parse_frontmatter(content: str) -> dict:
     """
@@ -62,7 +70,9 @@ def parse_chunk_id(chunk_id: str) -> Optional[tuple[str, str, str, str]]:
     """
     Parse a chunk ID into its components.
 
-    Format: CHK-DOMAIN-DOC-SEQ (e.g., CHK-AUTH-001-003)
+    Format: CHK-DOMAIN-DOC-SEQ (e.g., CHK-AUTH-001-003). DOC and SEQ may
+    have any number of digits, and the domain may contain hyphens
+    (CHK-API-V2-0042-0007), so the numbers are read from the right.
 
     Returns:
         Tuple of (prefix, domain, doc_num, seq_num) or None if invalid.
@@ -70,12 +80,26 @@ def parse_chunk_id(chunk_id: str) -> Optional[tuple[str, str, str, str]]:
     parts = chunk_id.split('-')
     if len(parts) < 4:
         return None
-    return (parts[0], parts[1], parts[2], parts[3])
+    return (parts[0], '-'.join(parts[1:-2]), parts[-2], parts[-1])
+
+
+def chunk_id_sort_key(chunk_id: str) -> tuple:
+    """
+    Sort key ordering chunk IDs by domain, then doc and sequence number.
+
+    Numbers grow past CORTEX_ID_DIGITS (CHK-AUTH-1000-001 follows
+    CHK-AUTH-999-001), so plain string order breaks; IDs that do not
+    parse sort by their text.
+    """
+    parsed = parse_chunk_id(chunk_id)
+    if parsed and parsed[2].isdecimal() and parsed[3].isdecimal():
+        return (parsed[1], int(parsed[2]), int(parsed[3]), chunk_id)
+    return (chunk_id, -1, -1, chunk_id)
 
 
 def load_chunk_content(chunk_id: str, project_root: str) -> Optional[str]:
     """
-    Load the body content of a chunk file (after frontmatter).
+    Load the body content of a chunk (after frontmatter).
 
     Args:
         chunk_id: Chunk ID (e.g., CHK-AUTH-001-003)
@@ -85,6 +109,7 @@ def load_chunk_content(chunk_id: str, project_root: str) -> Optional[str]:
         Content string or None if not found.
     """
     from .config import Config
+    from .segments import read_chunk
 
     parsed = parse_chunk_id(chunk_id)
     if not parsed:
@@ -92,13 +117,12 @@ def load_chunk_content(chunk_id: str, project_root: str) -> Optional[str]:
 
     domain = parsed[1]
     chunks_path = Config.get_chunks_path(project_root)
-    md_path = os.path.join(chunks_path, domain, f"{chunk_id}.md")
+    loaded = read_chunk(os.path.join(chunks_path, domain), chunk_id, embedding=False)
 
-    if not os.path.exists(md_path):
+    if loaded is None:
         return None
 
-    with open(md_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = loaded[0]
 
     # Extract content after frontmatter
     if '---' in content:
@@ -109,6 +133,57 @@ def load_chunk_content(chunk_id: str, project_root: str) -> Optional[str]:
     return content
 
 
+def _try_lock(fd: int) -> bool:
+    """Take an exclusive OS lock on an open file without blocking."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(lock_path: str, timeout: float = 30.0):
+    """
+    Cross-process lock: an OS advisory lock (flock, or msvcrt on Windows)
+    on lock_path.
+
+    The OS releases the lock when its holder exits or crashes, so a
+    lock is never broken while a live process holds it, however long it
+    runs. The lock file itself is left in place. Not reentrant.
+
+    Raises:
+        TimeoutError: If the lock cannot be acquired within timeout seconds
+    """
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    deadline = time.time() + timeout
+
+    fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+    try:
+        while not _try_lock(fd):
+            if time.time() > deadline:
+                raise TimeoutError(f"Could not acquire lock: {lock_path}")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
 # Unified stopword set (union of chunker and memory stopwords)
 STOPWORDS = {
     'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had',
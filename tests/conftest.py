@@ -73,3 +73,39 @@ def sample_embedding():
     vec = rng.standard_normal(384).astype(np.float32)
     vec = vec / np.linalg.norm(vec)
     return vec
+
+
+class FakeEmbeddingModel:
+    """Deterministic stand-in for SentenceTransformer that counts encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.encoded.extend(batch)
+        vectors = []
+        for text in batch:
+            seed = sum(text.encode('utf-8')) + len(text)
+            vec = np.random.default_rng(seed).standard_normal(384).astype(np.float32)
+            vectors.append(vec / np.linalg.norm(vec))
+        result = np.vstack(vectors)
+        return result[0] if single else result
+
+
+@pytest.fixture
+def fake_model():
+    """Install a fake embedding model on the Embedder singleton."""
+    from core.embedder import Embedder
+    from core.retriever import clear_query_cache
+
+    model = FakeEmbeddingModel()
+    saved_model, saved_cache = Embedder._model, Embedder._cache
+    Embedder._model = model
+    Embedder._cache = None
+    clear_query_cache()
+    yield model
+    Embedder._model = saved_model
+    Embedder._cache = saved_cache
+    clear_query_cache()
@@ -1,6 +1,7 @@
 """Phase 3: File I/O round-trip tests using tmp_path."""
 
 import os
+import re
 import json
 import pytest
 import numpy as np
@@ -86,9 +87,87 @@ class TestMemoryRoundTrip:
         assert retrieved.type == 'procedural'
 
 
+class TestMetadataCatalog:
+    def test_memory_listing_is_a_catalog_query(self, project_root, sample_embedding):
+        """list_memories filters in SQLite, follows updates/deletes and refills from files."""
+        from core.config import Config
+        from core.memory import create_memory, update_memory, delete_memory, list_memories
+        from core.catalog import count_memories
+
+        with patch('core.memory.embed_passage', return_value=sample_embedding):
+            jwt = create_memory(learning='Use JWT for sessions', domain='AUTH', memory_type='factual',
+                                project_root=project_root)
+            rotate = create_memory(learning='Rotate refresh tokens', domain='AUTH', confidence='high',
+                                   project_root=project_root)
+            create_memory(learning='Paginate list endpoints', domain='API', project_root=project_root)
+            update_memory(jwt.id, project_root, confidence='high')
+
+        with patch('core.memory.parse_memory_file', side_effect=AssertionError):
+            assert [m.id for m in list_memories(project_root, domain='AUTH')] == [rotate.id, jwt.id]
+            assert [m.id for m in list_memories(project_root, domain='auth')] == [rotate.id, jwt.id]
+            assert [m.id for m in list_memories(project_root, confidence='high', memory_type='factual')] == [jwt.id]
+            listed = list_memories(project_root, domain='AUTH', memory_type='experiential')[0]
+            assert (listed.learning, listed.keywords, listed.verified) == (rotate.learning, rotate.keywords, False)
+            assert count_memories(project_root, 'domain') == {'API': 1, 'AUTH': 2}
+
+        delete_memory(rotate.id, project_root)
+        assert [m.id for m in list_memories(project_root, domain='AUTH')] == [jwt.id]
+
+        # Files edited or removed by hand are re-synced by mtime
+        memories_path = os.path.join(project_root, '.cortex', 'memories')
+        jwt_path = os.path.join(memories_path, f'{jwt.id}.md')
+        with open(jwt_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        with open(jwt_path, 'w', encoding='utf-8') as f:
+            f.write(text.replace('Use JWT for sessions', 'Use opaque tokens for sessions'))
+        os.utime(jwt_path, ns=(0, os.stat(jwt_path).st_mtime_ns + 10**9))
+        assert list_memories(project_root, domain='AUTH')[0].learning == 'Use opaque tokens for sessions'
+        api = list_memories(project_root, domain='API')[0]
+        os.remove(os.path.join(memories_path, f'{api.id}.md'))
+        assert count_memories(project_root, 'domain') == {'AUTH': 1}
+        with open(os.path.join(memories_path, f'{api.id}.md'), 'w', encoding='utf-8') as f:
+            f.write(text.replace(jwt.id, api.id))
+        assert sorted(m.id for m in list_memories(project_root)) == sorted([jwt.id, api.id])
+
+        # A lost catalog is refilled from the memory files
+        os.remove(Config.get_catalog_file(project_root))
+        assert sorted(m.domain for m in list_memories(project_root)) == ['AUTH', 'AUTH']
+        assert list_memories(project_root, domain='AUTH')[0].confidence == 'high'
+
+    def test_chunk_rows_follow_chunker(self, project_root, sample_embedding):
+        """save_chunk and delete_chunks keep per-domain counts and source rows current."""
+        import sqlite3
+        from core.config import Config
+        from core.chunker import Chunk, save_chunk, delete_chunks
+        from core.catalog import count_chunks, connect
+
+        for domain, seq in (('AUTH', 1), ('AUTH', 2), ('API', 1)):
+            domain_path = os.path.join(project_root, '.cortex', 'chunks', domain)
+            os.makedirs(domain_path, exist_ok=True)
+            save_chunk(Chunk(
+                id=f'CHK-{domain}-001-00{seq}', source_doc=f'DOC-{domain}-001', source_section='Intro',
+                source_lines=(1, 5), tokens=60, keywords=['token'], content=f'chunk {seq}',
+                created='2026-01-01T00:00:00', source_path=f'docs/{domain.lower()}.md', source_hash='abc'
+            ), domain_path, sample_embedding)
+
+        assert count_chunks(project_root) == {'API': 1, 'AUTH': 2}
+        with connect(project_root) as conn:
+            plan = ' '.join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM chunks WHERE source_path = ?", ('docs/auth.md',)))
+            rows = conn.execute("SELECT id, source_start, source_end FROM chunks WHERE source_path = ?",
+                                ('docs/auth.md',)).fetchall()
+        assert 'chunks_source_path' in plan
+        assert rows == [('CHK-AUTH-001-001', 1, 5), ('CHK-AUTH-001-002', 1, 5)]
+
+        delete_chunks(['CHK-AUTH-001-001'], project_root)
+        assert count_chunks(project_root) == {'API': 1, 'AUTH': 1}
+        with sqlite3.connect(Config.get_catalog_file(project_root)) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
 class TestIndexRoundTrip:
     def test_build_and_load_index(self, project_root, sample_embedding):
-        """build_index + load_index round-trip with .npy + .ids.json format."""
+        """build_index + load_index round-trip with the .cidx + .meta.json format."""
         from core.indexer import build_index, load_index
         from core.chunker import Chunk, save_chunk
 
@@ -125,12 +204,11 @@ class TestIndexRoundTrip:
         # Build the index
         count, index_path = build_index(project_root, 'chunks')
         assert count == 3
-        assert index_path.endswith('.npy')
+        assert index_path.endswith('.cidx')
 
         # Verify index files exist
         index_dir = os.path.join(project_root, '.cortex', 'index')
-        assert os.path.exists(os.path.join(index_dir, 'chunks.npy'))
-        assert os.path.exists(os.path.join(index_dir, 'chunks.ids.json'))
+        assert os.path.exists(os.path.join(index_dir, 'chunks.cidx'))
         assert os.path.exists(os.path.join(index_dir, 'chunks.meta.json'))
 
         # Load the index back
@@ -149,7 +227,7 @@ class TestIndexRoundTrip:
 
 class TestMemoryIndexRoundTrip:
     def test_build_memory_index(self, project_root, sample_embedding):
-        """build_index for memories uses the same .npy + .ids.json format."""
+        """build_index for memories uses the same .cidx format."""
         from core.indexer import build_index, load_index
         from core.memory import create_memory
 
@@ -171,3 +249,892 @@ class TestMemoryIndexRoundTrip:
         embeddings, ids, metadata = load_index(project_root, 'memories')
         assert embeddings.shape == (2, 384)
         assert len(ids) == 2
+
+
+class TestEmbeddingCache:
+    def test_put_and_get_round_trip(self, tmp_path, sample_embedding):
+        from core.cache import EmbeddingCache
+
+        cache = EmbeddingCache(str(tmp_path / 'emb'), max_entries=10)
+        key = EmbeddingCache.make_key('model', 'passage: hello')
+        assert cache.get(key) is None
+
+        cache.put(key, sample_embedding)
+        np.testing.assert_array_almost_equal(cache.get(key), sample_embedding)
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_key_depends_on_model(self):
+        from core.cache import EmbeddingCache
+        assert EmbeddingCache.make_key('a', 'text') != EmbeddingCache.make_key('b', 'text')
+
+    def test_lru_eviction(self, tmp_path, sample_embedding):
+        from core.cache import EmbeddingCache
+
+        cache = EmbeddingCache(str(tmp_path / 'emb'), max_entries=10)
+        keys = [EmbeddingCache.make_key('m', f'passage: {i}') for i in range(10)]
+        for i, key in enumerate(keys):
+            cache.put(key, sample_embedding)
+            path = cache._entry_path(key)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        # Touch the oldest entry so it becomes most recently used
+        assert cache.get(keys[0]) is not None
+
+        cache.put(EmbeddingCache.make_key('m', 'passage: new'), sample_embedding)
+        assert len(cache) == 9
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+
+    def test_embedder_skips_model_for_cached_passages(self, project_root, fake_model):
+        from core.embedder import enable_cache, embed_passage, embed_passages_batch
+
+        enable_cache(project_root)
+        first = embed_passage('unchanged section')
+        assert len(fake_model.encoded) == 1
+
+        batch = embed_passages_batch(['unchanged section', 'edited section'])
+        assert fake_model.encoded == ['passage: unchanged section', 'passage: edited section']
+        np.testing.assert_array_almost_equal(batch[0], first)
+
+        cache_dir = os.path.join(project_root, '.cortex', 'cache', 'embeddings')
+        assert os.path.isdir(cache_dir)
+
+
+class TestLengthBucketing:
+    def test_batches_sorted_by_length_under_token_budget(self, fake_model, monkeypatch):
+        from core.config import Config
+        from core.embedder import embed_passage, embed_passages_batch
+
+        monkeypatch.setattr(Config, 'EMBEDDING_BATCH_TOKENS', 120)
+        texts = ['short', 'x' * 400, 'mid ' * 20, 'tiny', 'y' * 200, 'z' * 30]
+        with patch.object(fake_model, 'encode', wraps=fake_model.encode) as encode:
+            batch = embed_passages_batch(texts)
+
+        calls = [call.args[0] for call in encode.call_args_list]
+        assert sorted(sum(calls, [])) == sorted(f'passage: {t}' for t in texts)
+        estimate = lambda text: len(text) // 4 + 2
+        for call in calls:
+            assert len(call) == 1 or len(call) * max(map(estimate, call)) <= 120
+        longest = [max(map(estimate, call)) for call in calls]
+        assert longest == sorted(longest, reverse=True)
+
+        for text, embedding in zip(texts, batch):
+            np.testing.assert_array_almost_equal(embedding, embed_passage(text))
+
+    def test_sentence_transformers_batches_use_tokenizer_lengths(self, fake_model, monkeypatch):
+        from core.config import Config
+        from core.embedder import embed_passages_batch
+
+        monkeypatch.setattr(Config, 'EMBEDDING_BATCH_TOKENS', 24)
+        # One token per word: far more tokens than the character estimate for short words
+        fake_model.tokenizer = lambda texts, **kwargs: {'input_ids': [t.split() for t in texts]}
+        texts = [' '.join('abcdefghijkl'), ' '.join('mnopqrstuvwx'), 'short']
+        with patch.object(fake_model, 'encode', wraps=fake_model.encode) as encode:
+            embed_passages_batch(texts)
+
+        for call in encode.call_args_list:
+            batch = call.args[0]
+            assert len(batch) == 1 or len(batch) * max(len(t.split()) for t in batch) <= 24
+
+
+class TestBatchedChunking:
+    def test_chunk_directory_batches_across_documents(self, project_root, fake_model, tmp_path):
+        """Passages from several documents share encode calls and get distinct doc numbers."""
+        from core.chunker import chunk_directory
+        from core import embedder
+
+        docs = tmp_path / 'docs' / 'auth'
+        docs.mkdir(parents=True)
+        for i in range(3):
+            (docs / f'spec{i}.md').write_text(
+                f'# Part {i}\n\n' + ' '.join(f'word{i}x{j}' for j in range(80)) + '\n',
+                encoding='utf-8'
+            )
+
+        word_offsets = lambda text: [m.start() for m in re.finditer(r'\S+', text)]
+        with patch('core.chunker.token_offsets', side_effect=word_offsets), \
+                patch('core.chunker.embed_passages_batch',
+                      wraps=embedder.embed_passages_batch) as batch:
+            chunks = chunk_directory(str(docs.parent), project_root, batch_size=2)
+
+        assert len(chunks) == 3
+        assert sorted(c.source_doc for c in chunks) == ['DOC-AUTH-001', 'DOC-AUTH-002', 'DOC-AUTH-003']
+        assert [len(call.args[0]) for call in batch.call_args_list] == [2, 1]
+
+        domain_path = os.path.join(project_root, '.cortex', 'chunks', 'AUTH')
+        for chunk in chunks:
+            assert os.path.exists(os.path.join(domain_path, f'{chunk.id}.md'))
+            assert np.load(os.path.join(domain_path, f'{chunk.id}.npy')).shape == (384,)
+
+    def test_worker_pool_matches_serial_run(self, fake_model, tmp_path):
+        """Parsing in a process pool yields the same chunks, IDs and order as a serial run."""
+        from core.chunker import chunk_directory
+
+        docs = tmp_path / 'docs'
+        for domain in ('auth', 'billing'):
+            (docs / domain).mkdir(parents=True)
+            for i in range(4):
+                words = ' '.join(f'{domain}{i}x{j}' for j in range(60 + 40 * i))
+                (docs / domain / f'spec{i}.md').write_text(f'# {domain} {i}\n\n{words}\n', encoding='utf-8')
+        (docs / 'auth' / 'empty.md').write_text('# Nothing here\n', encoding='utf-8')
+
+        runs = {}
+        word_offsets = lambda text: [m.start() for m in re.finditer(r'\S+', text)]
+        for workers in (1, 3):
+            root = tmp_path / f'project{workers}'
+            os.makedirs(root / '.cortex' / 'chunks')
+            os.makedirs(root / '.cortex' / 'index')
+            with patch('core.chunker.token_offsets', side_effect=word_offsets):
+                runs[workers] = chunk_directory(str(docs), str(root), workers=workers)
+
+        serial, parallel = runs[1], runs[3]
+        assert [c.id for c in parallel] == [c.id for c in serial]
+        assert [c.content for c in parallel] == [c.content for c in serial]
+        assert len({c.source_doc for c in parallel}) == 8
+        assert len({c.id for c in parallel}) == len(parallel)
+
+    def test_parse_window_bounds_documents_in_flight(self):
+        from concurrent.futures import Future
+        from core import chunker
+
+        class Executor:
+            submitted = 0
+
+            def submit(self, fn, job):
+                self.submitted += 1
+                future = Future()
+                future.set_result(job)
+                return future
+
+        executor = Executor()
+        consumed = []
+        for result in chunker._parse_in_window(executor, list(range(10)), 3):
+            consumed.append(result)
+            assert executor.submitted <= len(consumed) + 3
+        assert consumed == list(range(10))
+
+
+class TestIncrementalRefresh:
+    def test_refresh_rechunks_only_changed_sections(self, project_root, fake_model, tmp_path):
+        """Unchanged sections keep IDs and embeddings; edited ones get new chunks."""
+        from core.chunker import chunk_document, refresh_document, parse_chunk_metadata
+        from core.indexer import build_index, load_index
+
+        def section(title, word):
+            return f'# {title}\n\n' + ' '.join(f'{word}{j}' for j in range(60)) + '\n'
+
+        doc = tmp_path / 'docs' / 'auth' / 'spec.md'
+        doc.parent.mkdir(parents=True)
+        doc.write_text(section('Login', 'login') + section('Tokens', 'token') + section('Logout', 'logout'),
+                       encoding='utf-8')
+
+        word_offsets = lambda text: [m.start() for m in re.finditer(r'\S+', text)]
+        with patch('core.chunker.token_offsets', side_effect=word_offsets):
+            original = chunk_document(str(doc), project_root)
+            build_index(project_root, 'chunks')
+            assert [c.id for c in original] == ['CHK-AUTH-001-001', 'CHK-AUTH-001-002', 'CHK-AUTH-001-003']
+
+            domain_path = os.path.join(project_root, '.cortex', 'chunks', 'AUTH')
+            kept_embedding = np.load(os.path.join(domain_path, 'CHK-AUTH-001-003.npy'))
+
+            # Edit the middle section and shift everything down a line
+            doc.write_text('\n' + section('Login', 'login') + section('Tokens', 'refresh')
+                           + section('Logout', 'logout'), encoding='utf-8')
+            fake_model.encoded.clear()
+            result = refresh_document(str(doc), project_root)
+
+        assert result.kept == ['CHK-AUTH-001-001', 'CHK-AUTH-001-003']
+        assert result.removed == ['CHK-AUTH-001-002']
+        assert [c.id for c in result.added] == ['CHK-AUTH-001-004']
+        assert [text.split()[1] for text in fake_model.encoded] == ['refresh0']
+        np.testing.assert_array_equal(np.load(os.path.join(domain_path, 'CHK-AUTH-001-003.npy')), kept_embedding)
+        assert not os.path.exists(os.path.join(domain_path, 'CHK-AUTH-001-002.md'))
+
+        meta = parse_chunk_metadata(os.path.join(domain_path, 'CHK-AUTH-001-003.md'))
+        assert meta['source_lines'] == [original[2].source_lines[0] + 1, original[2].source_lines[1] + 1]
+        assert meta['created'] == original[2].created
+
+        _, ids, metadata = load_index(project_root, 'chunks')
+        assert sorted(ids) == ['CHK-AUTH-001-001', 'CHK-AUTH-001-003', 'CHK-AUTH-001-004']
+        assert metadata['CHK-AUTH-001-001']['source_hash'] == result.added[0].source_hash
+
+
+
+class TestSourceManifest:
+    def test_stale_check_hashes_only_changed_sources(self, project_root, fake_model, tmp_path):
+        """Unchanged sources are skipped by stat; edits and deletions are reported per chunk."""
+        from core import chunker
+        from core.config import Config
+
+        docs = tmp_path / 'docs' / 'auth'
+        docs.mkdir(parents=True)
+        for name in ('login', 'logout'):
+            (docs / f'{name}.md').write_text(f'# {name}\n\n' + ' '.join(f'{name}{j}' for j in range(80)) + '\n',
+                                             encoding='utf-8')
+
+        word_offsets = lambda text: [m.start() for m in re.finditer(r'\S+', text)]
+        with patch('core.chunker.token_offsets', side_effect=word_offsets):
+            chunks = chunker.chunk_directory(str(docs.parent), project_root)
+        by_name = {os.path.basename(c.source_path): c.id for c in chunks}
+
+        with patch('core.chunker.compute_file_hash', wraps=chunker.compute_file_hash) as hashed:
+            assert chunker.get_stale_chunks(project_root) == []
+            assert hashed.call_count == 2  # First check fills in stat data
+            assert chunker.get_stale_chunks(project_root) == []
+            assert hashed.call_count == 2
+
+            (docs / 'login.md').write_text('# login\n\nchanged\n', encoding='utf-8')
+            (docs / 'logout.md').unlink()
+            stale = chunker.get_stale_chunks(project_root)
+            assert hashed.call_count == 3
+
+        assert sorted((s['chunk_id'], s['status']) for s in stale) == sorted([
+            (by_name['login.md'], 'modified'), (by_name['logout.md'], 'deleted')
+        ])
+
+        # A lost manifest is rebuilt from chunk frontmatter
+        os.remove(Config.get_manifest_file(project_root))
+        assert sorted(s['chunk_id'] for s in chunker.get_stale_chunks(project_root)) == sorted(by_name.values())
+
+        chunker.delete_chunks([by_name['logout.md']], project_root)
+        assert [s['chunk_id'] for s in chunker.get_stale_chunks(project_root)] == [by_name['login.md']]
+
+
+    def test_chunks_by_source_answered_from_manifest(self, project_root, sample_embedding, tmp_path):
+        """save_chunk records its source; lookups read no chunk files; delete_chunks forgets them."""
+        from core.chunker import Chunk, save_chunk, get_chunks_by_source, delete_chunks
+
+        domain_path = os.path.join(project_root, '.cortex', 'chunks', 'AUTH')
+        os.makedirs(domain_path)
+        source = os.path.join(project_root, 'docs', 'auth.md')
+        for seq in (1, 2):
+            save_chunk(Chunk(
+                id=f'CHK-AUTH-001-00{seq}', source_doc='DOC-AUTH-001', source_section='Auth',
+                source_lines=(1, 5), tokens=60, keywords=[], content=f'chunk {seq}',
+                created='2026-01-01T00:00:00', source_path=os.path.join('docs', 'auth.md'), source_hash='abc'
+            ), domain_path, sample_embedding)
+
+        with patch('core.chunker.parse_chunk_metadata', side_effect=AssertionError), \
+                patch('core.manifest.parse_frontmatter', side_effect=AssertionError):
+            assert get_chunks_by_source(source, project_root) == ['CHK-AUTH-001-001', 'CHK-AUTH-001-002']
+            assert get_chunks_by_source(os.path.join(project_root, 'docs', 'other.md'), project_root) == []
+
+        delete_chunks(['CHK-AUTH-001-001'], project_root)
+        assert get_chunks_by_source(source, project_root) == ['CHK-AUTH-001-002']
+
+
+
+def _allocate_docs(project_root, n):
+    from core.ids import allocate_doc_numbers
+    return [allocate_doc_numbers(project_root, 'AUTH') for _ in range(n)]
+
+
+class TestIdAllocator:
+    def test_seeds_from_legacy_files_and_pads(self, project_root, monkeypatch):
+        from core.ids import allocate_doc_numbers, allocate_chunk_seqs, format_chunk_id
+        from core.config import Config
+
+        domain_path = os.path.join(project_root, '.cortex', 'chunks', 'AUTH')
+        os.makedirs(domain_path)
+        open(os.path.join(domain_path, 'CHK-AUTH-041-002.md'), 'w').close()
+
+        assert allocate_doc_numbers(project_root, 'AUTH') == 42
+        assert allocate_doc_numbers(project_root, 'AUTH', count=3) == 43
+        assert allocate_doc_numbers(project_root, 'BILLING') == 1
+        assert allocate_chunk_seqs(project_root, 'AUTH', 41, 2, floor=2) == 3
+        assert allocate_chunk_seqs(project_root, 'AUTH', 41, 1) == 5
+
+        monkeypatch.setattr(Config, 'ID_DIGITS', 6)
+        assert format_chunk_id('AUTH', 1000, 7) == 'CHK-AUTH-001000-000007'
+
+    def test_concurrent_processes_get_distinct_numbers(self, project_root):
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            batches = list(pool.map(_allocate_docs, [project_root] * 4, [25] * 4))
+
+        numbers = [n for batch in batches for n in batch]
+        assert sorted(numbers) == list(range(1, 101))
+
+
+class TestSegmentStore:
+    def test_chunks_round_trip_through_segment_log(self, project_root, fake_model, tmp_path, monkeypatch):
+        """Chunking, indexing, refresh, delete and export work without per-chunk files."""
+        from core import chunker
+        from core.config import Config
+        from core.indexer import build_index, load_index
+        from core.segments import SegmentStore, export_chunks, LOG_FILE, LOCK_FILE
+        from core.utils import load_chunk_content
+
+        monkeypatch.setattr(Config, 'CHUNK_STORE', 'segments')
+
+        def section(title, word):
+            return f'# {title}\n\n' + ' '.join(f'{word}{j}' for j in range(60)) + '\n'
+
+        doc = tmp_path / 'docs' / 'auth' / 'spec.md'
+        doc.parent.mkdir(parents=True)
+        doc.write_text(section('Login', 'login') + section('Tokens', 'token') + section('Logout', 'logout'),
+                       encoding='utf-8')
+
+        word_offsets = lambda text: [m.start() for m in re.finditer(r'\S+', text)]
+        with patch('core.chunker.token_offsets', side_effect=word_offsets):
+            chunker.chunk_document(str(doc), project_root)
+            domain_path = os.path.join(project_root, '.cortex', 'chunks', 'AUTH')
+            assert sorted(os.listdir(domain_path)) == [LOCK_FILE, LOG_FILE]
+
+            assert build_index(project_root, 'chunks', full_rebuild=True)[0] == 3
+            assert load_chunk_content('CHK-AUTH-001-002', project_root).split()[0] == 'token0'
+
+            doc.write_text('\n' + section('Login', 'login') + section('Tokens', 'refresh')
+                           + section('Logout', 'logout'), encoding='utf-8')
+            result = chunker.refresh_document(str(doc), project_root)
+
+        assert result.kept == ['CHK-AUTH-001-001', 'CHK-AUTH-001-003']
+        assert load_chunk_content('CHK-AUTH-001-002', project_root) is None
+        _, ids, metadata = load_index(project_root, 'chunks')
+        assert sorted(ids) == ['CHK-AUTH-001-001', 'CHK-AUTH-001-003', 'CHK-AUTH-001-004']
+        assert metadata['CHK-AUTH-001-003']['source_hash'] == result.added[0].source_hash
+
+        # A fresh reader (another process) sees the same records, ignoring a torn append
+        store = SegmentStore.open(domain_path)
+        with open(store.log_path, 'ab') as f:
+            f.write(b'\x01partial')
+        assert sorted(SegmentStore(domain_path).ids()) == sorted(ids)
+
+        # Metadata-only scans read the markdown and seek past the .npy payloads
+        full = list(store.scan())
+        open_log, reads = store._open_log, []
+
+        def recording_log():
+            f = open_log()
+            read = f.read
+            f.read = lambda n=-1: reads.append(n) or read(n)
+            return f
+
+        with patch.object(store, '_open_log', side_effect=recording_log):
+            light = list(store.scan(embeddings=False))
+        assert [(i, md) for i, md, _ in light] == [(i, md) for i, md, _ in full]
+        assert all(npy is None for _, _, npy in light)
+        assert reads == [len(md.encode('utf-8')) for _, md, _ in full]
+
+        reclaimed = store.compact()
+        assert reclaimed > 0 and store.dead_bytes == 0
+        assert chunker.delete_chunks(['CHK-AUTH-001-001'], project_root) == 1
+        assert sorted(SegmentStore(domain_path).ids()) == ['CHK-AUTH-001-003', 'CHK-AUTH-001-004']
+
+        dest = tmp_path / 'export'
+        assert export_chunks(project_root, str(dest)) == {'AUTH': 2}
+        exported = (dest / 'AUTH' / 'CHK-AUTH-001-004.md').read_text(encoding='utf-8')
+        assert exported.startswith('---\nid: CHK-AUTH-001-004\n') and 'refresh0' in exported
+
+    def test_pack_moves_files_without_reindexing(self, project_root, fake_model, tmp_path, capsys):
+        """Packed chunks keep their mtimes, so an incremental index build finds nothing to do."""
+        from core import chunker
+        from core.indexer import build_index
+        from core.segments import pack_chunks, chunk_ids
+        from core.utils import load_chunk_content
+
+        doc = tmp_path / 'docs' / 'auth' / 'spec.md'
+        doc.parent.mkdir(parents=True)
+        doc.write_text('# Login\n\n' + ' '.join(f'login{j}' for j in range(60)) + '\n', encoding='utf-8')
+
+        word_offsets = lambda text: [m.start() for m in re.finditer(r'\S+', text)]
+        with patch('core.chunker.token_offsets', side_effect=word_offsets):
+            chunks = chunker.chunk_document(str(doc), project_root)
+        build_index(project_root, 'chunks')
+
+        assert pack_chunks(project_root) == {'AUTH': len(chunks)}
+        domain_path = os.path.join(project_root, '.cortex', 'chunks', 'AUTH')
+        assert not [f for f in os.listdir(domain_path) if f.endswith(('.md', '.npy'))]
+        assert chunk_ids(domain_path) == {c.id for c in chunks}
+        assert load_chunk_content(chunks[0].id, project_root) == chunks[0].content.strip()
+
+        capsys.readouterr()
+        build_index(project_root, 'chunks')
+        assert '(+0 new, ~0 modified, -0 removed)' in capsys.readouterr().out
+        assert chunker.get_stale_chunks(project_root) == []
+
+
+class TestServerRoundTrip:
+    def test_no_server_raises_unavailable(self, project_root):
+        from core.server import call_server, ServerUnavailable
+        with pytest.raises(ServerUnavailable):
+            call_server(project_root, 'ping')
+
+    def test_retrieve_through_server_reloads_index(self, project_root, fake_model):
+        """Server answers retrieve from its held index and picks up rebuilt indices."""
+        import threading
+        import time
+        from core.server import serve, call_server, ServerError
+        from core.memory import create_memory
+        from core.indexer import build_index
+
+        create_memory(learning='Use JWT for session tokens', project_root=project_root)
+        build_index(project_root, 'memories')
+
+        thread = threading.Thread(target=serve, args=(project_root,), kwargs={'warm': False}, daemon=True)
+        thread.start()
+        server_file = os.path.join(project_root, '.cortex', 'server.json')
+        for _ in range(100):
+            if os.path.exists(server_file):
+                break
+            time.sleep(0.02)
+
+        try:
+            results = call_server(project_root, 'retrieve', {'query': 'jwt', 'index_type': 'memories'})
+            assert len(results) == 1
+
+            create_memory(learning='Rotate refresh tokens on every use', project_root=project_root)
+            build_index(project_root, 'memories')
+
+            results = call_server(project_root, 'retrieve', {'query': 'jwt', 'index_type': 'memories'})
+            assert len(results) == 2
+
+            # Delivered but failed server-side: an error, not "no server"
+            with pytest.raises(ServerError):
+                call_server(project_root, 'memory.delete', {})
+        finally:
+            call_server(project_root, 'shutdown')
+            thread.join(timeout=5)
+
+        assert not os.path.exists(server_file)
+
+
+class TestIncrementalIndex:
+    def _save_chunk(self, project_root, seq, vec):
+        from core.chunker import Chunk, save_chunk
+
+        domain_path = os.path.join(project_root, '.cortex', 'chunks', 'TEST')
+        os.makedirs(domain_path, exist_ok=True)
+        chunk = Chunk(
+            id=f'CHK-TEST-001-{seq:03d}', source_doc='DOC-TEST-001',
+            source_section='Section', source_lines=(1, 10), tokens=50,
+            keywords=['test'], content=f'Content {seq}', created='2026-01-15T10:00:00',
+            source_path='test.md', source_hash='abc123'
+        )
+        save_chunk(chunk, domain_path, vec)
+        return chunk.id
+
+    def test_memory_add_and_delete_update_index_without_build(self, project_root, fake_model):
+        from core.memory import create_memory, delete_memory
+        from core.indexer import load_index
+
+        first = create_memory(learning='Cache tokens per tenant', project_root=project_root)
+        second = create_memory(learning='Retry webhooks with backoff', project_root=project_root)
+
+        embeddings, ids, metadata = load_index(project_root, 'memories')
+        assert ids == [first.id, second.id]
+        assert embeddings.shape == (2, 384)
+        assert metadata[first.id]['domain'] == 'GENERAL'
+
+        delete_memory(first.id, project_root)
+        _, ids, metadata = load_index(project_root, 'memories')
+        assert ids == [second.id]
+        assert first.id not in metadata
+
+    def test_index_update_is_best_effort_while_locked(self, project_root, fake_model, monkeypatch):
+        import core.indexer
+        from core.utils import file_lock
+        from core.memory import create_memory, get_memory
+        from core.indexer import build_index, load_index
+
+        first = create_memory(learning='Cache tokens per tenant', project_root=project_root)
+        build_index(project_root, 'memories')
+
+        # A build holding the index lock: the write lands, the index catches up later
+        monkeypatch.setattr(core.indexer, 'file_lock', lambda path: file_lock(path, timeout=0.05))
+        lock_path = os.path.join(project_root, '.cortex', 'index', 'memories.lock')
+        with file_lock(lock_path):
+            second = create_memory(learning='Retry webhooks with backoff', project_root=project_root)
+        assert get_memory(second.id, project_root) is not None
+        assert load_index(project_root, 'memories')[1] == [first.id]
+
+        build_index(project_root, 'memories')
+        assert load_index(project_root, 'memories')[1] == [first.id, second.id]
+
+        # An item that cannot be read back leaves the index stale instead of failing the write
+        def corrupt(*args):
+            raise ValueError('cannot reshape array')
+        monkeypatch.setattr(core.indexer, '_load_item', corrupt)
+        assert core.indexer.update_index(project_root, 'memories', added_ids=[second.id]) == 0
+        assert load_index(project_root, 'memories')[1] == [first.id, second.id]
+
+    def test_pending_delta_keeps_base_memory_mapped(self, project_root, fake_model, monkeypatch):
+        from core.config import Config
+        from core.memory import create_memory
+        from core.indexer import build_index, load_index
+        from core.quantization import OverlayMatrix
+
+        monkeypatch.setattr(Config, 'INDEX_MMAP_MIN_BYTES', 0)
+        create_memory(learning='Cache tokens per tenant', project_root=project_root)
+        build_index(project_root, 'memories')
+        create_memory(learning='Retry webhooks with backoff', project_root=project_root)
+
+        embeddings, ids, _ = load_index(project_root, 'memories', compact=True)
+        assert isinstance(embeddings, OverlayMatrix)
+        assert isinstance(embeddings.base.values, np.memmap)
+        query = np.asarray(embeddings)[1]
+        np.testing.assert_allclose(embeddings @ query, np.asarray(embeddings) @ query, rtol=1e-5)
+
+    def test_incremental_build_reconciles_and_compacts(self, project_root, sample_embedding):
+        from core.indexer import build_index, load_index, compact_index
+
+        ids = [self._save_chunk(project_root, i, sample_embedding) for i in range(1, 4)]
+        count, _ = build_index(project_root, 'chunks')
+        assert count == 3
+
+        # Changes made behind the index's back: one new chunk, one removed
+        new_id = self._save_chunk(project_root, 4, sample_embedding)
+        domain_path = os.path.join(project_root, '.cortex', 'chunks', 'TEST')
+        os.remove(os.path.join(domain_path, f'{ids[0]}.md'))
+        os.remove(os.path.join(domain_path, f'{ids[0]}.npy'))
+
+        count, _ = build_index(project_root, 'chunks')
+        assert count == 3
+        delta_path = os.path.join(project_root, '.cortex', 'index', 'chunks.delta.jsonl')
+        assert os.path.exists(delta_path)
+
+        _, loaded_ids, _ = load_index(project_root, 'chunks')
+        assert loaded_ids == [ids[1], ids[2], new_id]
+
+        assert compact_index(project_root, 'chunks') == 3
+        assert not os.path.exists(delta_path)
+        embeddings, loaded_ids, metadata = load_index(project_root, 'chunks')
+        assert loaded_ids == [ids[1], ids[2], new_id]
+        assert embeddings.shape == (3, 384)
+        assert set(metadata) == set(loaded_ids)
+
+
+class TestLexicalIndex:
+    def test_bm25_covers_full_text_through_delta_and_compaction(self, project_root, fake_model):
+        from core.memory import create_memory
+        from core.indexer import build_index, compact_index, load_index, load_lexical_index
+        from core.retriever import retrieve
+
+        context = ' '.join(f'word{chr(97 + i)}ing filler{chr(97 + i)}ed' * 3 for i in range(8)) + ' kubernetes'
+        target = create_memory(learning='Restart pods after config changes', context=context,
+                               project_root=project_root)
+        assert 'kubernetes' not in target.keywords
+        create_memory(learning='Rotate signing keys monthly', project_root=project_root)
+        build_index(project_root, 'memories')
+        assert os.path.exists(os.path.join(project_root, '.cortex', 'index', 'memories.lex.npz'))
+
+        results = retrieve('kubernetes', project_root, index_type='memories')
+        assert results[0]['id'] == target.id and 0 < results[0]['keyword_score'] < 1
+
+        # Normalized by the query's upper bound, not by the best row
+        lexical = load_lexical_index(project_root, 'memories', load_index(project_root, 'memories')[1])
+        bound = lexical.max_score(['kubernetes', 'unindexed'], 1.2)
+        assert bound > lexical.scores(['kubernetes'], 1.2, 0.75).max()
+        assert bound == lexical.max_score(['kubernetes'], 1.2)
+
+        # Added after the build: its term counts ride in the delta log
+        late = create_memory(learning='Drain kubernetes nodes before upgrades', project_root=project_root)
+        _, ids, _ = load_index(project_root, 'memories')
+        before = load_lexical_index(project_root, 'memories', ids).scores(['kubernetes', 'drain'], 1.2, 0.75)
+        assert before[ids.index(late.id)] > 0
+
+        compact_index(project_root, 'memories')
+        after = load_lexical_index(project_root, 'memories', ids).scores(['kubernetes', 'drain'], 1.2, 0.75)
+        np.testing.assert_allclose(after, before)
+
+
+class TestIndexFileFormat:
+    def test_round_trip_and_header_only_reads(self, tmp_path):
+        from core.index_format import (
+            write_index_file, read_index_header, read_index_ids, open_index_matrix
+        )
+
+        rng = np.random.default_rng(3)
+        embeddings = rng.standard_normal((5, 384)).astype(np.float32)
+        ids = [f'CHK-ÜBER-001-{i:03d}' for i in range(5)]
+        path = str(tmp_path / 'chunks.cidx')
+        write_index_file(path, embeddings, ids)
+
+        header = read_index_header(path)
+        assert header.shape == (5, 384)
+        assert header.matrix_offset % 64 == 0
+        assert read_index_ids(path, header) == ids
+
+        mapped = open_index_matrix(path, header, mmap=True)
+        assert isinstance(mapped, np.memmap)
+        np.testing.assert_array_equal(mapped, embeddings)
+        np.testing.assert_array_equal(open_index_matrix(path, header, mmap=False), embeddings)
+
+    def test_int8_matrix_with_scales(self, tmp_path):
+        from core.index_format import (
+            write_index_file, read_index_header, read_index_ids, open_index_matrix, open_index_scales
+        )
+        from core.quantization import quantize
+
+        rng = np.random.default_rng(4)
+        values, scales = quantize(rng.standard_normal((5, 384)), 'int8')
+        ids = [f'MEM-2026-01-15-{i:03d}' for i in range(5)]
+        path = str(tmp_path / 'memories.cidx')
+        write_index_file(path, values, ids, scales)
+
+        header = read_index_header(path)
+        assert header.dtype == np.int8
+        assert header.scales_offset % 64 == 0
+        np.testing.assert_array_equal(open_index_matrix(path, header), values)
+        np.testing.assert_array_equal(open_index_scales(path, header), scales)
+        assert read_index_ids(path, header) == ids
+
+        with pytest.raises(ValueError):
+            write_index_file(path, values, ids)
+
+    def test_rejects_foreign_files(self, tmp_path):
+        from core.index_format import read_index_header
+        path = tmp_path / 'bogus.cidx'
+        path.write_bytes(b'\x93NUMPY' + b'\0' * 100)
+        with pytest.raises(ValueError):
+            read_index_header(str(path))
+
+    def test_legacy_npy_index_still_loads(self, project_root, sample_embedding):
+        from core.indexer import load_index, get_index_stats
+
+        index_dir = os.path.join(project_root, '.cortex', 'index')
+        np.save(os.path.join(index_dir, 'chunks.npy'), np.vstack([sample_embedding, sample_embedding]))
+        with open(os.path.join(index_dir, 'chunks.ids.json'), 'w') as f:
+            json.dump(['CHK-A-001-001', 'CHK-A-001-002'], f)
+
+        embeddings, ids, _ = load_index(project_root, 'chunks')
+        assert embeddings.shape == (2, 384)
+        assert ids == ['CHK-A-001-001', 'CHK-A-001-002']
+        assert get_index_stats(project_root)['chunks']['count'] == 2
+
+    def test_stats_from_header_and_delta(self, project_root, fake_model):
+        from core.memory import create_memory
+        from core.indexer import build_index, get_index_stats
+
+        create_memory(learning='First learning', project_root=project_root)
+        build_index(project_root, 'memories')
+        create_memory(learning='Second learning', project_root=project_root)
+
+        with patch('core.indexer.open_index_matrix') as matrix:
+            stats = get_index_stats(project_root)
+        matrix.assert_not_called()
+        assert stats['memories']['count'] == 2
+        assert stats['memories']['shape'] == (2, 384)
+        assert stats['memories']['delta_ops'] == 1
+
+
+class TestEmbeddingStorage:
+    LEARNINGS = [
+        'Rotate signing keys monthly', 'Retry webhooks with backoff',
+        'Cache tokens per tenant', 'Paginate audit log exports',
+    ]
+
+    def test_item_files_round_trip(self, tmp_path, sample_embedding):
+        from core.quantization import save_embedding, load_embedding
+        for dtype, tolerance in [('float32', 0), ('float16', 1e-3), ('int8', 1e-2)]:
+            path = str(tmp_path / f'{dtype}.npy')
+            save_embedding(path, sample_embedding, dtype)
+            loaded = load_embedding(path)
+            assert loaded.dtype == np.float32
+            np.testing.assert_allclose(loaded, sample_embedding, atol=tolerance)
+
+    def test_int8_index_ranks_like_float32(self, project_root, fake_model, monkeypatch):
+        from core.config import Config
+        from core.memory import create_memory, update_memory, find_related_memories
+        from core.indexer import build_index, get_index_stats, get_cached_index, invalidate_index_cache
+        from core.retriever import retrieve
+
+        query = 'signing key rotation'
+        memories = [create_memory(learning=l, project_root=project_root) for l in self.LEARNINGS]
+        build_index(project_root, 'memories')
+        exact = retrieve(query, project_root, top_k=4, index_type='memories')
+        related = [m.id for m, _ in find_related_memories(memories[0].id, project_root)]
+
+        monkeypatch.setattr(Config, 'EMBEDDING_DTYPE', 'int8')
+        for memory, learning in zip(memories, self.LEARNINGS):
+            update_memory(memory.id, project_root, learning=learning)  # re-save item files as int8
+        build_index(project_root, 'memories', full_rebuild=True)
+        invalidate_index_cache(project_root)
+
+        assert get_index_stats(project_root)['memories']['dtype'] == 'int8'
+        compact = retrieve(query, project_root, top_k=4, index_type='memories')
+        assert [r['id'] for r in compact] == [r['id'] for r in exact]
+        assert [r['score'] for r in compact] == pytest.approx([r['score'] for r in exact], abs=0.02)
+        assert [m.id for m, _ in find_related_memories(memories[0].id, project_root)][:3] == related[:3]
+
+        # Delta-log rows join the cached matrix in int8 as well
+        create_memory(learning='Expire sessions after idle', project_root=project_root)
+        cached = get_cached_index(project_root, 'memories')
+        assert cached.embeddings.storage == 'int8'
+        assert cached.embeddings.shape == (5, 384)
+
+
+class TestIndexCache:
+    def test_repeated_retrieve_reuses_index_and_query(self, project_root, fake_model):
+        from core.memory import create_memory
+        from core import indexer
+        from core.retriever import retrieve
+
+        create_memory(learning='Rotate signing keys monthly', project_root=project_root)
+        indexer.build_index(project_root, 'memories')
+
+        with patch.object(indexer, 'load_index', wraps=indexer.load_index) as load:
+            first = retrieve('signing keys', project_root, index_type='memories')
+            second = retrieve('signing keys', project_root, index_type='memories')
+
+        assert load.call_count == 1
+        assert [r['id'] for r in first] == [r['id'] for r in second]
+        assert fake_model.encoded.count('query: signing keys') == 1
+
+    def test_retrieval_counts_bypass_index(self, project_root, fake_model):
+        from core.memory import create_memory, increment_retrieval
+        from core import indexer
+        from core.retriever import retrieve
+
+        memory = create_memory(learning='Rotate signing keys monthly', project_root=project_root)
+        indexer.build_index(project_root, 'memories')
+        assert retrieve('signing keys', project_root, index_type='memories')[0]['frequency_score'] == 0.0
+        generation = indexer.get_index_generation(project_root, 'memories')
+
+        with patch.object(indexer, 'load_index', wraps=indexer.load_index) as load:
+            increment_retrieval(memory.id, project_root)
+            result = retrieve('signing keys', project_root, index_type='memories')[0]
+
+        assert indexer.get_index_generation(project_root, 'memories') == generation
+        assert load.call_count == 0
+        assert result['frequency_score'] > 0.0
+
+    def test_retrieve_many_matches_retrieve_with_one_encode(self, project_root, fake_model):
+        from core.memory import create_memory
+        from core.retriever import retrieve, retrieve_many, clear_query_cache
+
+        for learning in ['Rotate signing keys monthly', 'Retry webhooks with backoff',
+                         'Cache tokens per tenant']:
+            create_memory(learning=learning, project_root=project_root)
+
+        queries = ['signing keys', 'webhook retries', 'tenant token cache']
+        fake_model.encoded.clear()
+        batched = retrieve_many(queries, project_root, top_k=2, index_type='memories')
+        assert len(fake_model.encoded) == len(queries)
+
+        clear_query_cache()
+        for query, results in zip(queries, batched):
+            single = retrieve(query, project_root, top_k=2, index_type='memories')
+            assert [r['id'] for r in results] == [r['id'] for r in single]
+            assert [r['score'] for r in results] == pytest.approx([r['score'] for r in single], abs=1e-3)
+
+    def test_cache_follows_index_changes(self, project_root, fake_model):
+        from core.memory import create_memory
+        from core.indexer import get_cached_index, invalidate_index_cache
+
+        first = create_memory(learning='Cache tokens per tenant', project_root=project_root)
+        cached = get_cached_index(project_root, 'memories')
+        assert cached.ids == [first.id]
+        assert get_cached_index(project_root, 'memories') is cached
+
+        second = create_memory(learning='Retry webhooks with backoff', project_root=project_root)
+        refreshed = get_cached_index(project_root, 'memories')
+        assert refreshed.ids == [first.id, second.id]
+
+        invalidate_index_cache(project_root)
+        assert get_cached_index(project_root, 'memories') is not refreshed
+
+
+class TestANNIndex:
+    LEARNINGS = [
+        'Rotate signing keys monthly', 'Retry webhooks with backoff', 'Cache tokens per tenant',
+        'Paginate audit log exports', 'Use idempotency keys for payments', 'Expire sessions after idle',
+        'Shard queues by customer', 'Vacuum the events table weekly', 'Pin the TLS cipher suite',
+        'Compress archived reports', 'Throttle password reset emails', 'Version the public API',
+    ]
+
+    def test_graph_built_and_searched_like_brute_force(self, project_root, fake_model, monkeypatch):
+        from core.config import Config
+        from core.memory import create_memory
+        from core.indexer import build_index, invalidate_index_cache, load_ann_searcher, load_index
+        from core.retriever import retrieve
+
+        monkeypatch.setattr(Config, 'ANN_MIN_ITEMS', 8)
+        monkeypatch.setattr(Config, 'HNSW_M', 4)
+        for learning in self.LEARNINGS:
+            create_memory(learning=learning, project_root=project_root)
+        build_index(project_root, 'memories')
+        assert os.path.exists(os.path.join(project_root, '.cortex', 'index', 'memories.hnsw.npz'))
+
+        # Added after the build: lives in the delta log, outside the graph
+        late = create_memory(learning='Backfill search index nightly', project_root=project_root)
+        _, ids, _ = load_index(project_root, 'memories')
+        assert load_ann_searcher(project_root, 'memories', ids) is not None
+
+        query = 'nightly search backfill'
+        approximate = retrieve(query, project_root, top_k=5, index_type='memories')
+        assert approximate[0]['id'] == late.id
+
+        monkeypatch.setattr(Config, 'ANN_ENABLED', False)
+        invalidate_index_cache(project_root)
+        exact = retrieve(query, project_root, top_k=5, index_type='memories')
+        assert [r['id'] for r in approximate] == [r['id'] for r in exact]
+
+    def test_small_or_stale_index_falls_back(self, project_root, fake_model, monkeypatch):
+        from core.config import Config
+        from core.memory import create_memory
+        from core.indexer import build_index, load_ann_searcher, load_index
+
+        for learning in self.LEARNINGS[:4]:
+            create_memory(learning=learning, project_root=project_root)
+        build_index(project_root, 'memories')
+        _, ids, _ = load_index(project_root, 'memories')
+        assert load_ann_searcher(project_root, 'memories', ids) is None
+
+        monkeypatch.setattr(Config, 'ANN_MIN_ITEMS', 2)
+        build_index(project_root, 'memories', full_rebuild=True)
+        assert load_ann_searcher(project_root, 'memories', ids) is not None
+
+        # Changing build parameters invalidates the graph until the next build
+        monkeypatch.setattr(Config, 'HNSW_M', 5)
+        assert load_ann_searcher(project_root, 'memories', ids) is None
+
+    def test_ivfpq_backend_replaces_graph(self, project_root, fake_model, monkeypatch):
+        from core.config import Config
+        from core.memory import create_memory
+        from core.indexer import build_index, get_index_stats, invalidate_index_cache
+        from core.retriever import retrieve
+
+        monkeypatch.setattr(Config, 'ANN_MIN_ITEMS', 8)
+        for learning in self.LEARNINGS:
+            create_memory(learning=learning, project_root=project_root)
+        build_index(project_root, 'memories')
+        assert get_index_stats(project_root)['memories']['ann'] == 'hnsw'
+
+        monkeypatch.setattr(Config, 'ANN_BACKEND', 'ivfpq')
+        monkeypatch.setattr(Config, 'PQ_SUBVECTORS', 24)
+        build_index(project_root, 'memories')
+        index_dir = os.path.join(project_root, '.cortex', 'index')
+        assert os.path.exists(os.path.join(index_dir, 'memories.ivfpq.npz'))
+        assert not os.path.exists(os.path.join(index_dir, 'memories.hnsw.npz'))
+        assert get_index_stats(project_root)['memories']['ann'] == 'ivfpq'
+
+        query = 'idempotent payment keys'
+        approximate = retrieve(query, project_root, top_k=3, index_type='memories')
+        monkeypatch.setattr(Config, 'ANN_ENABLED', False)
+        invalidate_index_cache(project_root)
+        exact = retrieve(query, project_root, top_k=3, index_type='memories')
+        assert [r['id'] for r in approximate] == [r['id'] for r in exact]
+
+    def test_binary_backend_prefilters(self, project_root, fake_model, monkeypatch):
+        from core.config import Config
+        from core.memory import create_memory
+        from core.indexer import build_index, get_index_stats, invalidate_index_cache
+        from core.retriever import retrieve
+
+        monkeypatch.setattr(Config, 'ANN_MIN_ITEMS', 8)
+        monkeypatch.setattr(Config, 'ANN_BACKEND', 'binary')
+        for learning in self.LEARNINGS:
+            create_memory(learning=learning, project_root=project_root)
+        build_index(project_root, 'memories')
+        index_dir = os.path.join(project_root, '.cortex', 'index')
+        assert os.path.exists(os.path.join(index_dir, 'memories.binary.npz'))
+        assert get_index_stats(project_root)['memories']['ann'] == 'binary'
+
+        query = 'idempotent payment keys'
+        approximate = retrieve(query, project_root, top_k=3, index_type='memories')
+        monkeypatch.setattr(Config, 'ANN_ENABLED', False)
+        invalidate_index_cache(project_root)
+        exact = retrieve(query, project_root, top_k=3, index_type='memories')
+        assert [r['id'] for r in approximate] == [r['id'] for r in exact]
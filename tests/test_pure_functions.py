@@ -59,6 +59,17 @@ class TestParseChunkId:
         result = parse_chunk_id('A-B-C-D')
         assert result == ('A', 'B', 'C', 'D')
 
+    def test_wide_numbers_and_hyphenated_domain(self):
+        from core.utils import parse_chunk_id
+        assert parse_chunk_id('CHK-API-V2-001234-0007') == ('CHK', 'API-V2', '001234', '0007')
+
+    def test_sort_key_orders_numbers_past_padding(self):
+        from core.utils import chunk_id_sort_key
+        ids = ['CHK-AUTH-1000-001', 'CHK-AUTH-999-1000', 'CHK-AUTH-999-002', 'CHK-API-002-001', 'notes']
+        assert sorted(ids, key=chunk_id_sort_key) == [
+            'CHK-API-002-001', 'CHK-AUTH-999-002', 'CHK-AUTH-999-1000', 'CHK-AUTH-1000-001', 'notes'
+        ]
+
 
 class TestExtractKeywords:
     def test_extracts_frequent_words(self):
@@ -146,6 +157,65 @@ class TestAddOverlap:
         assert result[1].startswith('...')  # second chunk has overlap prefix
 
 
+
+class TestSplitSection:
+    @pytest.fixture
+    def word_tokens(self, monkeypatch):
+        """One token per whitespace-separated word; records tokenized texts."""
+        import re
+        import core.chunker
+        calls = []
+
+        def word_offsets(text):
+            calls.append(text)
+            return [m.start() for m in re.finditer(r'\S+', text)]
+
+        monkeypatch.setattr(core.chunker, 'token_offsets', word_offsets)
+        return calls
+
+    def test_section_that_fits_is_kept_whole(self, word_tokens):
+        from core.chunker import split_section
+        text = 'Short section.\n\nTwo paragraphs.'
+        assert split_section(text, max_tokens=50, overlap_tokens=10) == [(text, 4)]
+
+    def test_matches_paragraph_split_with_one_tokenizer_pass(self, word_tokens):
+        from core.chunker import split_section, split_by_paragraphs, add_overlap
+        long_para = '. '.join(' '.join(f's{i}w{j}' for j in range(8)) for i in range(12)) + '.'
+        text = '\n\n'.join(['alpha ' * 30, 'beta ' * 25, long_para, 'gamma ' * 10])
+
+        result = split_section(text, max_tokens=40)
+        assert len(word_tokens) == 1
+        assert [chunk for chunk, _ in result] == split_by_paragraphs(text, 40)
+        assert [tokens for _, tokens in result] == [len(chunk.split()) for chunk, _ in result]
+        assert all(tokens <= 40 for _, tokens in result)
+
+        overlapped = split_section(text, max_tokens=40, overlap_tokens=13)
+        assert [chunk for chunk, _ in overlapped] == add_overlap(split_by_paragraphs(text, 40), 13)
+        # 10 overlap words plus the "..." marker and blank line
+        assert [tokens for _, tokens in overlapped][1:] == [tokens + 12 for _, tokens in result][1:]
+
+
+    def test_content_defined_cuts_survive_an_insert(self, word_tokens):
+        import random
+        from core.chunker import split_section
+        rng = random.Random(7)
+        paras = [' '.join(f'w{rng.randint(0, 9999)}' for _ in range(rng.randint(10, 120))) for _ in range(120)]
+        edited = paras[:2] + ['inserted ' * 40] + paras[2:]
+
+        before = split_section('\n\n'.join(paras), 500, 0, 50, strategy='content')
+        after = split_section('\n\n'.join(edited), 500, 0, 50, strategy='content')
+
+        assert all(50 <= tokens <= 500 for _, tokens in before)
+        unchanged = {text for text, _ in before}
+        assert sum(text not in unchanged for text, _ in after) <= 2
+        assert after[-1] == before[-1]
+
+    def test_unknown_strategy_rejected(self, word_tokens):
+        from core.chunker import split_section
+        with pytest.raises(ValueError):
+            split_section('text', 500, strategy='fixed')
+
+
 class TestParseSections:
     def test_single_header(self):
         from core.chunker import parse_sections
@@ -254,6 +324,429 @@ class TestComputeFrequencyScore:
             assert scores[i] < scores[i + 1]
 
 
+class TestVectorizedScoring:
+    def _metadata(self):
+        now = datetime.now()
+        return {
+            'A': {'keywords': ['Auth', 'login'], 'created': now.isoformat(), 'retrieval_count': 3},
+            'B': {'keywords': ['database'], 'created': (now - timedelta(days=45)).isoformat()},
+            'C': {'keywords': [], 'created': None, 'retrieval_count': 120},
+            'D': {'created': 'not-a-date'},
+        }
+
+    def test_matches_scalar_scoring(self):
+        from core.retriever import (
+            ScoringColumns, compute_keyword_scores, compute_recency_scores,
+            compute_frequency_scores, compute_keyword_overlap,
+            compute_recency_score, compute_frequency_score
+        )
+        metadata = self._metadata()
+        ids = list(metadata)
+        columns = ScoringColumns.from_metadata(ids, metadata)
+        query = ['auth', 'session']
+
+        keyword = compute_keyword_scores(query, columns)
+        recency = compute_recency_scores(columns.created_epoch)
+        frequency = compute_frequency_scores(columns.retrieval_count)
+
+        for row, item_id in enumerate(ids):
+            meta = metadata[item_id]
+            assert keyword[row] == pytest.approx(
+                compute_keyword_overlap(query, meta.get('keywords', [])))
+            assert recency[row] == pytest.approx(compute_recency_score(meta.get('created')))
+            assert frequency[row] == pytest.approx(
+                compute_frequency_score(meta.get('retrieval_count', 0)))
+
+    def test_top_k_indices_orders_best_first(self):
+        from core.retriever import _top_k_indices
+        scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+        assert list(_top_k_indices(scores, 3)) == [1, 3, 2]
+        assert list(_top_k_indices(scores, 10)) == [1, 3, 2, 4, 0]
+
+    def test_search_index_materializes_only_winners(self):
+        from core.retriever import _search_index
+        rng = np.random.default_rng(7)
+        embeddings = rng.standard_normal((50, 384)).astype(np.float32)
+        ids = [f'CHK-T-001-{i:03d}' for i in range(50)]
+        query = embeddings[17] / np.linalg.norm(embeddings[17])
+
+        results = _search_index(query, [], embeddings, ids, {}, '.', 'chunks', False, top_k=5)
+        assert len(results) == 5
+        assert results[0]['id'] == 'CHK-T-001-017'
+        assert [r['score'] for r in results] == sorted((r['score'] for r in results), reverse=True)
+
+
+# ── core/ann.py ──
+
+class TestHNSWIndex:
+    def _vectors(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        latent = rng.standard_normal((n, 16)) @ rng.standard_normal((16, 384))
+        vectors = latent + rng.standard_normal((n, 384))
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    def test_search_recall_against_brute_force(self):
+        from core.ann import HNSWIndex
+        vectors = self._vectors(800)
+        graph = HNSWIndex.build(vectors, m=8, ef_construction=64)
+
+        hits = 0
+        for query in vectors[:40]:
+            exact = set(np.argsort(-(vectors @ query))[:10].tolist())
+            hits += len(exact & set(graph.search(vectors, query, 10, ef=64).tolist()))
+        assert hits / 400 >= 0.9
+
+    def test_links_respect_degree_bounds(self):
+        from core.ann import HNSWIndex
+        graph = HNSWIndex.build(self._vectors(300), m=4, ef_construction=16)
+        assert graph.tables[0].shape == (300, 8)
+        for level, table in enumerate(graph.tables[1:], start=1):
+            assert table.shape[1] == 4
+            assert len(table) == int((graph.levels >= level).sum())
+        assert (graph.tables[0] < 300).all()
+
+    def test_empty_graph_returns_nothing(self):
+        from core.ann import HNSWIndex
+        graph = HNSWIndex.build(np.zeros((0, 384), dtype=np.float32))
+        assert len(graph.search(np.zeros((0, 384)), np.ones(384), 5, 10)) == 0
+
+
+class TestIVFPQIndex:
+    def _vectors(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        centers = rng.standard_normal((20, 384))
+        vectors = centers[rng.integers(0, 20, n)] + 0.3 * rng.standard_normal((n, 384))
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    def test_codes_are_compact_and_recall_is_reported(self):
+        from core.ann import IVFPQIndex, measure_recall
+        vectors = self._vectors(1000)
+        index = IVFPQIndex.build(vectors, nlist=16, m=48, nprobe=4)
+
+        assert index.codes.shape == (1000, 48)
+        assert index.codes.dtype == np.uint8
+        assert sorted(index.list_rows.tolist()) == list(range(1000))
+        # Per-vector cost: 48 code bytes + a 4-byte row ID instead of 1536 bytes
+        assert (index.codes.nbytes + index.list_rows.nbytes) * 25 < vectors.nbytes
+        assert measure_recall(index, vectors, k=10, ef=64) >= 0.9
+
+    def test_search_reranks_exactly(self):
+        from core.ann import IVFPQIndex
+        vectors = self._vectors(300)
+        index = IVFPQIndex.build(vectors, nlist=4, m=24, nprobe=4)
+        found = index.search(vectors, vectors[5], 5, ef=300)
+        exact = np.argsort(-(vectors @ vectors[5]))[:5]
+        assert found.tolist() == exact.tolist()
+
+    def test_subvectors_must_divide_dimension(self):
+        from core.ann import IVFPQIndex
+        with pytest.raises(ValueError):
+            IVFPQIndex.build(self._vectors(50), m=50)
+
+
+class TestBinaryIndex:
+    def _vectors(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        # Shared offset mimics the common direction of real embeddings
+        centers = rng.standard_normal((20, 384)) + 2.0
+        vectors = centers[rng.integers(0, 20, n)] + 0.5 * rng.standard_normal((n, 384))
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    def test_codes_are_one_bit_per_dimension(self):
+        from core.ann import BinaryIndex, measure_recall
+        vectors = self._vectors(1000)
+        index = BinaryIndex.build(vectors)
+
+        assert index.codes.shape == (1000, 6)
+        assert index.codes.nbytes * 32 == vectors.nbytes
+        assert measure_recall(index, vectors, k=10, ef=100) >= 0.9
+
+    def test_hamming_matches_bit_differences(self):
+        from core.ann import BinaryIndex
+        vectors = self._vectors(50)
+        index = BinaryIndex.build(vectors)
+        bits = (vectors - index.mean) > 0
+        expected = (bits != bits[7]).sum(axis=1)
+        assert index.hamming(vectors[7]).tolist() == expected.tolist()
+
+    def test_popcount_fallback_matches(self, monkeypatch):
+        from core import ann
+        monkeypatch.delattr(np, 'bitwise_count', raising=False)
+        words = np.random.default_rng(1).integers(0, 2**63, 64, dtype=np.uint64)
+        expected = [bin(int(w)).count('1') for w in words]
+        assert ann._popcount(words).tolist() == expected
+
+    def test_search_reranks_exactly(self):
+        from core.ann import BinaryIndex
+        vectors = self._vectors(300)
+        index = BinaryIndex.build(vectors)
+        found = index.search(vectors, vectors[5], 5, ef=300)
+        exact = np.argsort(-(vectors @ vectors[5]))[:5]
+        assert found.tolist() == exact.tolist()
+
+
+# ── core/quantization.py ──
+
+class TestEmbeddingMatrix:
+    def _vectors(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        vectors = rng.standard_normal((n, 384))
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    @pytest.mark.parametrize('dtype, itemsize', [('float16', 2), ('int8', 1)])
+    def test_scores_within_reported_bound(self, dtype, itemsize):
+        from core.quantization import EmbeddingMatrix
+        vectors = self._vectors(200)
+        queries = self._vectors(20, seed=1)
+        matrix = EmbeddingMatrix.from_vectors(vectors, dtype)
+
+        assert matrix.values.dtype.itemsize == itemsize
+        error = np.abs(matrix @ queries.T - vectors @ queries.T).max()
+        assert 0 < error <= matrix.score_error_bound()
+
+    def test_blocks_match_full_decode(self, monkeypatch):
+        from core.quantization import EmbeddingMatrix
+        matrix = EmbeddingMatrix.from_vectors(self._vectors(50), 'int8')
+        monkeypatch.setattr(EmbeddingMatrix, 'BLOCK_ROWS', 7)
+        query = self._vectors(1, seed=2)[0]
+        np.testing.assert_allclose(matrix @ query, np.asarray(matrix) @ query, rtol=1e-5)
+        np.testing.assert_array_equal(matrix[[3, 9]], np.asarray(matrix)[[3, 9]])
+
+    def test_int8_requantization_is_lossless(self):
+        from core.quantization import EmbeddingMatrix
+        matrix = EmbeddingMatrix.from_vectors(self._vectors(20), 'int8')
+        again = EmbeddingMatrix.from_vectors(np.asarray(matrix), 'int8')
+        np.testing.assert_array_equal(again.values, matrix.values)
+
+    def test_overlay_matches_materialized_merge(self):
+        from core.quantization import EmbeddingMatrix, OverlayMatrix
+        base = EmbeddingMatrix.from_vectors(self._vectors(30), 'int8')
+        live = np.ones(30, dtype=bool)
+        live[[4, 17]] = False
+        overlay = OverlayMatrix(base, live, EmbeddingMatrix.from_vectors(self._vectors(3, seed=3), 'int8'))
+        merged = overlay.as_storage()
+
+        assert overlay.shape == merged.shape == (31, 384)
+        queries = self._vectors(2, seed=4)
+        np.testing.assert_allclose(overlay @ queries.T, merged @ queries.T, rtol=1e-5)
+        np.testing.assert_array_equal(overlay[[0, 4, 29, -1]], merged[[0, 4, 29, -1]])
+        np.testing.assert_array_equal(overlay[5], merged[5])
+
+    def test_unknown_dtype_rejected(self):
+        from core.quantization import storage_dtype
+        with pytest.raises(ValueError):
+            storage_dtype('bfloat16')
+
+
+# ── core/onnx_encoder.py ──
+
+class TestOnnxEncoder:
+    class _Encoding:
+        def __init__(self, ids):
+            self.ids = ids
+
+    class _Tokenizer:
+        def encode_batch(self, texts):
+            # One token per word, IDs from word length
+            return [TestOnnxEncoder._Encoding([len(w) for w in t.split()]) for t in texts]
+
+    class _Input:
+        def __init__(self, name):
+            self.name = name
+
+    class _Session:
+        def __init__(self, names):
+            self.names = names
+            self.feeds = []
+
+        def get_inputs(self):
+            return [TestOnnxEncoder._Input(n) for n in self.names]
+
+        def run(self, outputs, feeds):
+            self.feeds.append(feeds)
+            ids = feeds['input_ids'].astype(np.float32)
+            # Hidden state: token ID in dim 0, constant in dim 1; padding is garbage
+            hidden = np.stack([ids, np.ones_like(ids)], axis=-1)
+            hidden[feeds['attention_mask'] == 0] = 1000.0
+            return [hidden]
+
+    def test_mean_pools_over_real_tokens_and_normalizes(self):
+        from core.onnx_encoder import OnnxEncoder
+        session = self._Session(['input_ids', 'attention_mask'])
+        encoder = OnnxEncoder(session, self._Tokenizer())
+
+        raw = encoder.encode(['aaa b', 'cc'], batch_size=8)
+        np.testing.assert_allclose(raw, [[2.0, 1.0], [2.0, 1.0]])
+        assert session.feeds[0]['input_ids'].shape == (2, 2)
+        assert 'token_type_ids' not in session.feeds[0]
+
+        single = encoder.encode('aaaa', normalize_embeddings=True)
+        assert single.shape == (2,)
+        np.testing.assert_allclose(single, np.array([4.0, 1.0]) / np.sqrt(17), rtol=1e-6)
+
+    def test_batches_and_token_types(self):
+        from core.onnx_encoder import OnnxEncoder
+        session = self._Session(['input_ids', 'attention_mask', 'token_type_ids'])
+        encoder = OnnxEncoder(session, self._Tokenizer())
+
+        assert encoder.encode(['a', 'b', 'c'], batch_size=2).shape == (3, 2)
+        assert len(session.feeds) == 2
+        assert not session.feeds[0]['token_type_ids'].any()
+
+    def test_export_redone_when_tokenizer_missing(self, tmp_path, monkeypatch):
+        from core import onnx_encoder
+        from core.config import Config
+
+        monkeypatch.setattr(Config, 'ONNX_DIR', str(tmp_path))
+        directory = tmp_path / 'org--model'
+        directory.mkdir()
+        (directory / 'model.onnx').write_bytes(b'')  # Crashed before the tokenizer was saved
+        exports = []
+
+        def export(model_name, directory, path):
+            exports.append(model_name)
+            (tmp_path / 'org--model' / 'tokenizer.json').write_text('{}')
+            (tmp_path / 'org--model' / 'model.onnx').write_bytes(b'')
+
+        monkeypatch.setattr(onnx_encoder, '_export_fp32', export)
+        assert onnx_encoder.export_model('org/model') == str(directory / 'model.onnx')
+        onnx_encoder.export_model('org/model')
+        assert exports == ['org/model']
+
+    def test_embedder_tokenizes_bucketed_passages_once(self, monkeypatch):
+        from core.config import Config
+        from core.embedder import Embedder
+        from core.onnx_encoder import OnnxEncoder
+
+        tokenizer = self._Tokenizer()
+        calls = []
+        encode_batch = tokenizer.encode_batch
+        tokenizer.encode_batch = lambda texts: calls.append(list(texts)) or encode_batch(texts)
+        session = self._Session(['input_ids', 'attention_mask'])
+        monkeypatch.setattr(Embedder, '_model', OnnxEncoder(session, tokenizer))
+        monkeypatch.setattr(Config, 'EMBEDDING_DIMENSIONS', 2)
+        monkeypatch.setattr(Config, 'EMBEDDING_BATCH_TOKENS', 4)
+
+        texts = ['aa b', 'a b c d e', 'ccc']
+        embeddings = Embedder()._encode_bucketed(texts)
+        assert calls == [texts]
+        assert [feeds['input_ids'].shape for feeds in session.feeds] == [(1, 5), (2, 2)]
+        np.testing.assert_allclose(embeddings[2], np.array([3.0, 1.0]) / np.sqrt(10), rtol=1e-6)
+
+    def test_embedder_backend_selection(self, monkeypatch):
+        from core.config import Config
+        from core.embedder import Embedder
+
+        embedder = Embedder()
+        monkeypatch.setattr(Embedder, '_model', None)
+        monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'onnx')
+        assert embedder.model_key == Config.EMBEDDING_MODEL
+        monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'onnx-int8')
+        assert embedder.model_key != Config.EMBEDDING_MODEL
+        monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'tensorflow')
+        with pytest.raises(ValueError):
+            embedder.model
+
+
+# ── core/pipeline.py ──
+
+class TestRunPipeline:
+    def test_every_item_encoded_in_batches_and_written(self):
+        from core.pipeline import run_pipeline
+        encoded, written = [], {}
+
+        def encode(batch):
+            encoded.append(list(batch))
+            return [item * 10 for item in batch]
+
+        stats = run_pipeline(
+            ([i, i + 100] for i in range(7)), encode, written.__setitem__,
+            batch_size=3, queue_batches=2, writers=3
+        )
+        assert [len(b) for b in encoded] == [3, 3, 3, 3, 2]
+        assert sum(encoded, []) == [x for i in range(7) for x in (i, i + 100)]
+        assert written == {x: x * 10 for i in range(7) for x in (i, i + 100)}
+        assert [stage.items for stage in stats.stages] == [14, 14, 14]
+        assert all(q.peak <= q.capacity for q in stats.queues)
+        assert len(stats.report()) == 6
+
+    def test_memory_bounded_by_queues(self):
+        import time
+        from core.pipeline import run_pipeline
+        produced, written, lead = [0], [0], []
+
+        def source():
+            for i in range(40):
+                produced[0] += 1
+                lead.append(produced[0] - written[0])
+                yield [i]
+
+        def encode(batch):
+            time.sleep(0.002)
+            return batch
+
+        def write(item, result):
+            written[0] += 1
+
+        run_pipeline(source(), encode, write, batch_size=2, queue_batches=1, writers=1)
+        # Items queue (2) + encoding batch (2) + batch queue (2) + writer (2) + reader (1)
+        assert written[0] == 40
+        assert max(lead) <= 9
+
+    def test_stage_errors_propagate(self):
+        from core.pipeline import run_pipeline
+
+        def write(item, result):
+            if item == 5:
+                raise OSError('disk full')
+
+        with pytest.raises(OSError, match='disk full'):
+            run_pipeline(([i] for i in range(50)), lambda b: b, write, batch_size=2, writers=2)
+
+        def broken_source():
+            yield [1]
+            raise ValueError('bad document')
+
+        with pytest.raises(ValueError, match='bad document'):
+            run_pipeline(broken_source(), lambda b: b, lambda i, r: None, batch_size=2)
+
+
+# ── core/lexical.py ──
+
+class TestLexicalIndex:
+    def test_merge_matches_rebuild_and_round_trips(self, tmp_path):
+        from core.lexical import LexicalIndex, term_counts
+        texts = ['rotate signing keys', 'retry webhooks with backoff backoff',
+                 'signing service outage', 'cache tenant tokens']
+        base = LexicalIndex.build([term_counts(t) for t in texts])
+
+        live = np.array([True, False, True, True])
+        merged = base.merge(live, [term_counts('webhooks signing retries')])
+        rebuilt = LexicalIndex.build([term_counts(t) for t in
+                                      ['rotate signing keys', 'signing service outage',
+                                       'cache tenant tokens', 'webhooks signing retries']])
+        query = ['signing', 'webhooks']
+        np.testing.assert_allclose(merged.scores(query, 1.2, 0.75), rebuilt.scores(query, 1.2, 0.75))
+        assert 'backoff' not in merged.terms
+
+        merged.signature = 'sig'
+        merged.save(str(tmp_path / 'x.lex.npz'))
+        loaded = LexicalIndex.load(str(tmp_path / 'x.lex.npz'))
+        assert loaded.signature == 'sig'
+        np.testing.assert_allclose(loaded.scores(query, 1.2, 0.75), rebuilt.scores(query, 1.2, 0.75))
+
+    def test_bm25_prefers_rarer_terms_and_shorter_rows(self):
+        from core.lexical import LexicalIndex, term_counts
+        index = LexicalIndex.build([term_counts(t) for t in [
+            'token refresh', 'token expiry', 'token rotation window policy notes',
+            'token rotation'
+        ]])
+        scores = index.scores(['token', 'rotation'], 1.2, 0.75)
+        assert scores.argmax() == 3
+        assert scores[3] > scores[2] > scores[0] > 0
+        assert not index.scores(['missing'], 1.2, 0.75).any()
+
+
 # ── core/assembler.py ──
 
 class TestContextBudget: